@@ -0,0 +1,152 @@
+# allocationTracker.py - Per-tick and per-phase allocation diagnostics built on tracemalloc
+#
+# Phases are the same ones FrameProfiler times (obstacles, player_move,
+# enemy_ai, ...). For every phase the tracker records the bytes allocated
+# while it ran (traced peak above the starting size), which counts objects
+# freed again before the phase ends, and the bytes it left allocated. A
+# tracemalloc snapshot diff around every phase points at the lines those
+# bytes came from, attributed through the traceback to the innermost line of
+# game code, so an allocation inside NumPy or a helper lands on its caller.
+# Nothing here traces Python execution, a trace function would itself make
+# allocations (bound methods for every C method call) that the game doesn't.
+import argparse
+import json
+import os
+import tracemalloc
+from collections import Counter, defaultdict
+
+# Frames kept per traced allocation, enough to walk out of library code to the game line
+TRACEBACK_FRAMES = 8
+
+_GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+# Frames from these files are measurement bookkeeping, not game allocations
+_IGNORED_FILES = (tracemalloc.__file__, os.path.abspath(__file__), os.path.join(_GAME_DIR, 'frameProfiler.py'))
+
+
+class AllocationTracker:
+    def __init__(self, top=15):
+        self.top = top
+        self.ticks = 0
+        self.current = None
+        self.phase_start_size = 0
+        self.phase_snapshot = None
+        self.phase_bytes = defaultdict(int)  # Bytes allocated while each phase ran
+        self.phase_retained = defaultdict(int)  # Net bytes each phase left behind
+        self.line_bytes = Counter()  # (filename, lineno) -> bytes a phase left allocated, summed over ticks
+        self.line_blocks = Counter()
+        self.started_tracemalloc = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEBACK_FRAMES)
+            self.started_tracemalloc = True
+
+    def stop(self):
+        self.end()
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    def begin(self, name):
+        """End the running phase (if any) and start measuring `name`"""
+        self.end()
+        self.current = name
+        self.phase_snapshot = self._snapshot()
+        # Indexed rather than unpacked, so no int from the call is still alive when the peak resets
+        self.phase_start_size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def end(self):
+        if self.current is None:
+            return
+        size, peak = tracemalloc.get_traced_memory()
+        self.phase_bytes[self.current] += peak - self.phase_start_size
+        self.phase_retained[self.current] += size - self.phase_start_size
+        self.current = None
+
+        for diff in self._snapshot().compare_to(self.phase_snapshot, 'traceback'):
+            if diff.size_diff > 0:
+                key = _game_line(diff.traceback)
+                self.line_bytes[key] += diff.size_diff
+                self.line_blocks[key] += max(0, diff.count_diff)
+        self.phase_snapshot = None
+
+    def begin_tick(self):
+        self.end()
+
+    def end_tick(self):
+        self.end()
+        self.ticks += 1
+
+    def _snapshot(self):
+        # Anything made under tracemalloc itself (the re cache behind its filters) is bookkeeping
+        # too, the other files are only skipped as the innermost frame since main() runs the game
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__, all_frames=True)] +
+            [tracemalloc.Filter(False, filename) for filename in _IGNORED_FILES]
+        )
+
+    def report(self):
+        """Mean per-tick numbers as plain data, ready for JSON"""
+        ticks = max(1, self.ticks)
+        return {
+            'ticks': self.ticks,
+            'phases': {
+                name: {
+                    'allocated_bytes_per_tick': self.phase_bytes[name] / ticks,
+                    'retained_bytes_per_tick': self.phase_retained[name] / ticks,
+                }
+                for name in self.phase_retained
+            },
+            'top_lines': [
+                {
+                    'file': os.path.relpath(filename),
+                    'line': lineno,
+                    'retained_bytes_per_tick': size / ticks,
+                    'blocks_per_tick': self.line_blocks[(filename, lineno)] / ticks,
+                }
+                for (filename, lineno), size in self.line_bytes.most_common(self.top)
+            ],
+        }
+
+
+def _game_line(traceback):
+    """(filename, lineno) of the innermost frame in game code, or of the innermost frame if none is"""
+    for frame in reversed(traceback):
+        if frame.filename.startswith(_GAME_DIR):
+            return frame.filename, frame.lineno
+    frame = traceback[-1]
+    return frame.filename, frame.lineno
+
+
+def main(argv=None):
+    # Only the CLI runs headless, start_memory_diagnostics imports this module into windowed games too
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # Keep stdout pure JSON
+    from gameClass import Game
+    from inputSource import ScriptedBotInput
+
+    parser = argparse.ArgumentParser(description="Report per-phase allocations of a seeded headless match")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ticks', type=int, default=600)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--max-bytes-per-tick', type=float, default=None,
+                        help="Exit with status 1 if the ticks allocate more than this on average (for CI)")
+    args = parser.parse_args(argv)
+
+    game = Game(headless=True, seed=args.seed)
+    game.input_source = ScriptedBotInput(game.streams.stream('bot'))
+    game.start_memory_diagnostics(AllocationTracker(args.top))
+    for _ in range(args.ticks):
+        game.step()
+    report = game.stop_memory_diagnostics().report()
+    print(json.dumps(report, indent=2))
+
+    if args.max_bytes_per_tick is not None:
+        total = sum(phase['allocated_bytes_per_tick'] for phase in report['phases'].values())
+        if total > args.max_bytes_per_tick:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
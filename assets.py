@@ -0,0 +1,61 @@
+# assets.py - Process-wide cache of loaded images, fonts and pre-rendered shapes
+import pygame
+
+_image_cache = {}
+_circle_cache = {}
+_font_cache = {}
+
+# Transparent color of pre-rendered shapes, colorkey blits are faster than per-pixel alpha
+SPRITE_COLORKEY = (255, 0, 255)
+
+
+def load_image(path, size):
+    """Load and scale an image once per process, returns None if it can't be loaded.
+
+    The returned surface is shared between every caller, so it must be treated
+    as read-only.
+    """
+    key = (path, size)
+    if key in _image_cache:
+        return _image_cache[key]
+
+    try:
+        image = pygame.transform.scale(pygame.image.load(path), size)
+    except (pygame.error, FileNotFoundError):
+        print("Character image not found, using rectangle instead")
+        image = None
+
+    _image_cache[key] = image
+    return image
+
+
+def sprite_surface(width, height):
+    """Blank surface whose unpainted pixels are transparent when blitted"""
+    surface = pygame.Surface((width, height))
+    surface.fill(SPRITE_COLORKEY)
+    surface.set_colorkey(SPRITE_COLORKEY, pygame.RLEACCEL)
+    return surface
+
+
+def circle_surface(color, radius):
+    """Filled circle on a transparent surface, blit at (x - radius, y - radius) to center it on (x, y).
+
+    Shared and read-only like load_image, pixel-identical to pygame.draw.circle.
+    """
+    key = (color, radius)
+    surface = _circle_cache.get(key)
+    if surface is None:
+        surface = sprite_surface(radius * 2, radius * 2)
+        pygame.draw.circle(surface, color, (radius, radius), radius)
+        _circle_cache[key] = surface
+    return surface
+
+
+def get_font(size):
+    """Default font at `size`, initialising pygame.font on first use"""
+    font = _font_cache.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _font_cache[size] = pygame.font.SysFont(None, size)
+    return font
@@ -0,0 +1,9 @@
+# benchmarks - Headless, seeded performance scenarios for the game loop
+#
+# The environment is set up before anything imports pygame, so scenarios never
+# open a window or an audio device and stdout only carries the JSON report.
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
@@ -0,0 +1,31 @@
+# Run with `python -m benchmarks` from the repository root
+import argparse
+import json
+import sys
+
+from benchmarks.runner import run
+from benchmarks.scenarios import SCENARIOS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run the headless benchmark scenarios")
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO',
+                        help="Scenarios to run (default: all): " + ", ".join(SCENARIOS))
+    parser.add_argument('--ticks', type=int, default=None, help="Override every scenario's tick count")
+    parser.add_argument('--output', default=None, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}")
+
+    report = run(args.scenarios, args.ticks)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# runner.py - Times benchmark scenarios and reports them as JSON
+import gc
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.scenarios import SCENARIOS
+
+WARMUP_TICKS = 50
+ALLOCATION_TICKS = 200
+
+
+def percentile(sorted_values, p):
+    last = len(sorted_values) - 1
+    return sorted_values[min(last, int(last * p / 100 + 0.5))]
+
+
+def measure_allocations(tick, ticks):
+    """Mean transient peak bytes and net allocated blocks per tick, measured with tracemalloc.
+
+    Runs separately from the timed pass because tracing slows every allocation.
+    """
+    tracemalloc.start()
+    peak_total = 0
+    blocks_before = sys.getallocatedblocks()
+    for _ in range(ticks):
+        start_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        tick()
+        _, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - start_size
+    blocks_after = sys.getallocatedblocks()
+    tracemalloc.stop()
+    return peak_total / ticks, (blocks_after - blocks_before) / ticks
+
+
+def run_scenario(name, ticks=None):
+    factory, default_ticks = SCENARIOS[name]
+    ticks = ticks or default_ticks
+    tick = factory()
+
+    for _ in range(WARMUP_TICKS):
+        tick()
+
+    # Timed pass with the cyclic GC held off so collections land between scenarios
+    durations = []
+    clock = time.perf_counter
+    gc.collect()
+    gc.disable()
+    try:
+        total_start = clock()
+        for _ in range(ticks):
+            start = clock()
+            tick()
+            durations.append(clock() - start)
+        total = clock() - total_start
+    finally:
+        gc.enable()
+
+    peak_bytes, net_blocks = measure_allocations(tick, min(ticks, ALLOCATION_TICKS))
+
+    durations.sort()
+    return {
+        'ticks': ticks,
+        'ticks_per_sec': ticks / total,
+        'p50_ms': percentile(durations, 50) * 1000,
+        'p99_ms': percentile(durations, 99) * 1000,
+        'max_ms': durations[-1] * 1000,
+        'alloc_peak_bytes_per_tick': peak_bytes,
+        'net_blocks_per_tick': net_blocks,
+    }
+
+
+def run(names=None, ticks=None):
+    """Run the named scenarios (all by default) and return the full report"""
+    names = names or list(SCENARIOS)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'scenarios': {name: run_scenario(name, ticks) for name in names},
+    }
@@ -0,0 +1,131 @@
+# scenarios.py - Fixed, seeded workloads for the benchmark runner
+#
+# Each scenario factory builds its world from a seed and returns a tick
+# function; the runner only ever calls that function. Keep the workloads
+# stable so numbers stay comparable between commits.
+import random
+
+from bullet import Bullet
+from enemy import Enemy
+from gameClass import Game, WIDTH, HEIGHT
+from inputSource import NO_INPUT
+from obstacalsManager import ObstacleManager
+from player import Player
+
+SEED = 1234
+LEVEL_ID = 1
+
+
+def idle_arena(seed=SEED):
+    """Default arena with nobody touching the controls"""
+    game = Game(headless=True, seed=seed, level_id=LEVEL_ID)
+
+    def tick():
+        game.step(NO_INPUT)
+    return tick
+
+
+def bullet_crossfire(seed=SEED, bullet_count=500):
+    """500 bullets in flight at all times, half from each side"""
+    game = Game(headless=True, seed=seed, level_id=LEVEL_ID)
+    rng = random.Random(seed)
+
+    def refill(bullets, count, from_left):
+        while len(bullets) < count:
+            x = 5 if from_left else WIDTH - 5
+            y = rng.uniform(20, HEIGHT - 80)
+            speed = 10 if from_left else -10
+            bullets.append(Bullet(x, y, speed, rng.uniform(-2, 2), 5))
+
+    def tick():
+        refill(game.bullets, bullet_count // 2, True)
+        refill(game.enemy_bullets, bullet_count - bullet_count // 2, False)
+        game.step(NO_INPUT)
+    return tick
+
+
+def enemies_chasing(seed=SEED, enemy_count=100):
+    """100 enemies chasing the player across the arena"""
+    game = Game(headless=True, seed=seed, level_id=LEVEL_ID)
+    rng = game.streams.stream('benchmark')
+
+    enemies = [game.enemy]
+    for i in range(enemy_count - 1):
+        enemies.append(Enemy(rng.randint(0, WIDTH - 50), rng.randint(0, HEIGHT - 150), 50, 50, rng=rng))
+    for enemy in enemies:
+        # Always see the player and never get close enough to switch to attacking
+        enemy.pathfinding.detection_range = WIDTH * 2
+        enemy.combat.attack_range = 0
+
+    def tick():
+        game.step(NO_INPUT)
+        obstacles = game.obstacle_manager.get_all_obstacles()
+        health_items = game.health_item_manager.health_items
+        for enemy in enemies[1:]:
+            enemy.move(obstacles, game.player, health_items)
+    return tick
+
+
+def health_item_spam(seed=SEED, max_items=50):
+    """A new health item every tick, up to 50 falling at once"""
+    game = Game(headless=True, seed=seed, level_id=LEVEL_ID)
+    manager = game.health_item_manager
+    manager.active_items.max_items = max_items
+    manager.spawn_interval = 1
+
+    def tick():
+        game.step(NO_INPUT)
+    return tick
+
+
+def level_generation(seed=SEED, platform_count=300, moving_count=60):
+    """Generate a 300-platform level every tick"""
+    manager = ObstacleManager(random.Random(seed))
+    player = Player(WIDTH // 2, HEIGHT - 100, 50, 50)
+
+    def tick():
+        manager.generate_level(player, platform_count, moving_count)
+    return tick
+
+
+def repeated_reset(seed=SEED):
+    """reset_game every tick, regenerating the level from the game's own stream"""
+    game = Game(headless=True, seed=seed)
+
+    def tick():
+        game.reset_game()
+        game.step(NO_INPUT)
+    return tick
+
+
+def draw_scrolling_world(seed=SEED, world_chunks=40, bullet_count=1000):
+    """Draw a frame every tick of a 40-screen world with 1000 bullets spread across it"""
+    game = Game(headless=True, seed=seed, world_chunks=world_chunks)
+    rng = random.Random(seed)
+    world = game.world
+    for _ in range(bullet_count):
+        # Slow bullets high above the platforms so they stay in flight
+        game.bullets.append(Bullet(rng.uniform(0, world.right), rng.uniform(20, 150), rng.uniform(-1, 1), 0, 5))
+    positions = [rng.randint(0, world.right - 50) for _ in range(64)]
+    ticks = [0]
+
+    def tick():
+        # Jump the player around the world so the camera visits every part of it
+        ticks[0] += 1
+        if ticks[0] % 30 == 0:
+            game.player.rect.x = positions[ticks[0] // 30 % len(positions)]
+        game.step(NO_INPUT)
+        game.draw()
+    return tick
+
+
+# name -> (factory, default tick count)
+SCENARIOS = {
+    'idle_arena': (idle_arena, 3000),
+    'bullet_crossfire_500': (bullet_crossfire, 1000),
+    'enemies_chasing_100': (enemies_chasing, 300),
+    'health_item_spam': (health_item_spam, 2000),
+    'level_generation_300': (level_generation, 100),
+    'repeated_reset': (repeated_reset, 1000),
+    'draw_scrolling_world': (draw_scrolling_world, 600),
+}
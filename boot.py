@@ -0,0 +1,78 @@
+# boot.py - Startup path that initialises only the pygame modules a mode needs
+#
+# Nothing in the game calls pygame.init(): a headless simulation worker needs
+# no pygame module at all, offline rendering needs fonts, and only a windowed
+# game needs the display. Fonts, images and enemy states are also created on
+# first use, so short match jobs never pay for them.
+import argparse
+import os
+import time
+
+# pygame modules each mode initialises up front
+MODES = {
+    'headless': (),
+    'render': ('font',),
+    'windowed': ('display', 'font'),
+}
+
+
+def init_pygame(mode):
+    """Initialise the pygame modules `mode` needs, returns [(module name, seconds)]"""
+    import pygame
+    timings = []
+    for name in MODES[mode]:
+        start = time.perf_counter()
+        getattr(pygame, name).init()
+        timings.append((name, time.perf_counter() - start))
+    return timings
+
+
+def cold_start(mode='headless', seed=0):
+    """Boot a game for `mode` and time each step, returns (game, [(step, seconds)]).
+
+    Import times are only meaningful in a fresh process.
+    """
+    timings = []
+    last = time.perf_counter()
+
+    def lap(step):
+        nonlocal last
+        now = time.perf_counter()
+        timings.append((step, now - last))
+        last = now
+
+    import pygame
+    lap('import pygame')
+    import gameClass
+    lap('import game modules')
+    for name, seconds in init_pygame(mode):
+        timings.append((f'init pygame.{name}', seconds))
+    last = time.perf_counter()
+    game = gameClass.Game(headless=mode != 'windowed', seed=seed)
+    lap('build game')
+    game.step()
+    lap('first tick')
+    if mode != 'headless':
+        game.draw()
+        lap('first frame')
+    return game, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report a cold-start timing breakdown")
+    parser.add_argument('--mode', choices=sorted(MODES), default='headless')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.mode != 'windowed':
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+    _, timings = cold_start(args.mode, args.seed)
+    for step, seconds in timings:
+        print(f"{step:<24}{seconds * 1000:8.2f} ms")
+    print(f"{'total':<24}{sum(seconds for _, seconds in timings) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
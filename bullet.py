@@ -1,38 +1,256 @@
+from collections import namedtuple
+
 import pygame
+import numpy as np
+
+from assets import circle_surface
+from camera import arena_bounds
+from ecs import Archetype, Component, EntityView, first_overlap, rect_coords
+
+# Bullets leaving this rect are dropped unless move() is given the world's bounds
+ARENA_BOUNDS = arena_bounds()
+
+BULLET_COLOR = (255, 255, 0)  # Yellow bullet
 
-import math
+# Components of the bullet archetype, left and top are the collider rect's corner and
+# id numbers the bullets of one array in firing order (networked games track them by it)
+BULLET_COMPONENTS = [
+    ('x', np.float64),
+    ('y', np.float64),
+    ('velocity_x', np.float64),
+    ('velocity_y', np.float64),
+    ('size', np.int32),
+    ('left', np.int32),
+    ('top', np.int32),
+    ('id', np.int64),
+]
+# Components that make up a bullet's state, the collider follows from them and ids aren't simulated
+BULLET_STATE = ('x', 'y', 'velocity_x', 'velocity_y', 'size')
+
+# One bullet overlapping one target this tick, (x, y) is where the bullet hit
+Hit = namedtuple('Hit', ['bullet', 'target', 'x', 'y'])
+
+# Below this many bullets a Python loop over the columns beats NumPy's per-call overhead
+VECTOR_MIN_BULLETS = 32
 
 
 class Bullet:
+    """A single bullet, as fired by shoot() before it is added to a BulletArray"""
+
     def __init__(self, x, y, velocity_x, velocity_y, size):
         self.x = x
         self.y = y
         self.velocity_x = velocity_x
         self.velocity_y = velocity_y
         self.size = size
-        self.color = (255, 255, 0)  # Yellow bullet
+        self.color = BULLET_COLOR
         self.rect = pygame.Rect(x - size // 2, y - size // 2, size, size)
 
-    def move(self, obstacles):
-        # Update position
-        self.x += self.velocity_x
-        self.y += self.velocity_y
+    def snapshot(self):
+        return self.x, self.y, self.velocity_x, self.velocity_y, self.size
+
+
+class BulletView(EntityView):
+    """A bullet stored in a BulletArray"""
+    __slots__ = ()
+    color = BULLET_COLOR
+    x = Component()
+    y = Component()
+    velocity_x = Component()
+    velocity_y = Component()
+    size = Component()
+    left = Component()
+    top = Component()
+    id = Component()
+
+    @property
+    def rect(self):
+        size = self.size
+        return pygame.Rect(self.left, self.top, size, size)
+
+    def snapshot(self):
+        return self.x, self.y, self.velocity_x, self.velocity_y, self.size
+
+
+class BulletArray:
+    """One side's bullets in flight, stored as a packed archetype.
+
+    Behaves like the list of bullets it replaces for appending, counting and
+    iterating (which yields BulletViews), while the per-tick work runs once
+    over whole component arrays.
+    """
+
+    def __init__(self, capacity=64):
+        self.archetype = Archetype(BULLET_COMPONENTS, capacity)
+        self.rect = pygame.Rect(0, 0, 0, 0)  # Scratch collider for the per-bullet path
+        self.next_id = 1
+
+    def __len__(self):
+        return self.archetype.count
+
+    def __iter__(self):
+        archetype = self.archetype
+        return (BulletView(archetype, i) for i in range(archetype.count))
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.archetype.count:
+            raise IndexError(index)
+        return BulletView(self.archetype, index)
+
+    def append(self, bullet):
+        """Add a copy of `bullet` (a Bullet or anything with the same attributes)"""
+        rect = bullet.rect
+        self.archetype.spawn(bullet.x, bullet.y, bullet.velocity_x, bullet.velocity_y, bullet.size, rect.x, rect.y,
+                             self.next_id)
+        self.next_id += 1
+
+    def clear(self):
+        self.archetype.clear()
+
+    def keep(self, mask):
+        """Remove the bullets where mask (as returned by move) is False"""
+        if type(mask) is list:
+            if all(mask):
+                return
+            mask = np.array(mask, dtype=np.bool_)
+        self.archetype.keep(mask)
+
+    def move(self, obstacles, bounds=ARENA_BOUNDS):
+        """Move every bullet one tick.
+
+        Returns (in_flight, impacts): a mask of the bullets still inside
+        `bounds` and clear of every obstacle, and the indices of the bullets
+        that hit an obstacle this tick, in order. Nothing is removed until the
+        mask is passed to keep(). The mask is a bool array, or a list when
+        there are only a few bullets.
+        """
+        archetype = self.archetype
+        n = archetype.count
+        if n == 0:
+            return [], []
+        if n < VECTOR_MIN_BULLETS:
+            return self._move_each(obstacles, bounds)
+
+        x = archetype.column('x')
+        y = archetype.column('y')
+        x += archetype.column('velocity_x')
+        y += archetype.column('velocity_y')
+        size = archetype.column('size')
+        left = archetype.column('left')
+        top = archetype.column('top')
+        left[:] = rect_coords(x - size // 2)
+        top[:] = rect_coords(y - size // 2)
+
+        in_bounds = (x >= bounds.left) & (x <= bounds.right) & (y >= bounds.top) & (y <= bounds.bottom)
+        hit_obstacle = first_overlap(left, top, left + size, top + size, obstacles) >= 0
+        hit_obstacle &= in_bounds
+        return in_bounds & ~hit_obstacle, np.flatnonzero(hit_obstacle).tolist()
+
+    def _move_each(self, obstacles, bounds):
+        """move() one bullet at a time, through a scratch Rect whose setters round like rect_coords"""
+        columns = self.archetype.columns
+        x, y, size = columns['x'], columns['y'], columns['size']
+        velocity_x, velocity_y = columns['velocity_x'], columns['velocity_y']
+        left, top = columns['left'], columns['top']
+        rect = self.rect
+        in_flight = []
+        impacts = []
+        for i in range(self.archetype.count):
+            bx = x.item(i) + velocity_x.item(i)
+            by = y.item(i) + velocity_y.item(i)
+            s = size.item(i)
+            x[i] = bx
+            y[i] = by
+            rect.width = rect.height = s
+            rect.x = bx - s // 2
+            rect.y = by - s // 2
+            left[i] = rect.x
+            top[i] = rect.y
+            if bx < bounds.left or bx > bounds.right or by < bounds.top or by > bounds.bottom:
+                in_flight.append(False)
+            elif rect.collidelist(obstacles) != -1:
+                in_flight.append(False)
+                impacts.append(i)
+            else:
+                in_flight.append(True)
+        return in_flight, impacts
+
+    def find_hits(self, targets, mask=None):
+        """Hit events for the bullets (all, or those where mask is set) overlapping a target.
+
+        Events are in bullet order, a bullet overlapping several targets only
+        hits the first. Every bullet is tested against every target in one
+        vectorized pass, which beats sorting the bullets by x for anything
+        short of thousands of bullets against hundreds of targets.
+        """
+        archetype = self.archetype
+        n = archetype.count
+        if n == 0 or not targets:
+            return []
+        target_rects = [target.rect for target in targets]
+        hits = []
+
+        if n < VECTOR_MIN_BULLETS:
+            columns = archetype.columns
+            size, left, top = columns['size'], columns['left'], columns['top']
+            rect = self.rect
+            for i in range(n):
+                if mask is not None and not mask[i]:
+                    continue
+                s = size.item(i)
+                rect.update(left.item(i), top.item(i), s, s)
+                j = rect.collidelist(target_rects)
+                if j != -1:
+                    hits.append(Hit(BulletView(archetype, i), targets[j], rect.centerx, rect.centery))
+            return hits
+
+        size = archetype.column('size')
+        left = archetype.column('left')
+        top = archetype.column('top')
+        first = first_overlap(left, top, left + size, top + size, target_rects)
+        if mask is not None:
+            first[~mask] = -1
+        for i in np.flatnonzero(first >= 0).tolist():
+            half = int(size[i]) // 2
+            hits.append(Hit(BulletView(archetype, i), targets[first[i]], int(left[i]) + half, int(top[i]) + half))
+        return hits
+
+    def ids(self):
+        """Ids of the bullets in flight, in order"""
+        return self.archetype.column('id').tolist()
 
-        # Update rect position
-        self.rect.x = self.x - self.size // 2
-        self.rect.y = self.y - self.size // 2
+    def position(self, index):
+        return self.archetype.columns['x'][index].item(), self.archetype.columns['y'][index].item()
 
-        # Check if bullet is out of screen
-        if self.x < 0 or self.x > 1000 or self.y < 0 or self.y > 600:  # Updated for new WIDTH
-            return False, None
+    def snapshot(self):
+        return self.archetype.rows(BULLET_STATE)
 
-        # Check collisions with obstacles
-        for obstacle in obstacles:
-            if self.rect.colliderect(obstacle):
-                impact_pos = (self.x, self.y)
-                return False, impact_pos
+    def restore(self, state):
+        """Load bullets from snapshot(), they get new ids"""
+        archetype = self.archetype
+        archetype.load_rows(state, BULLET_STATE)
+        n = archetype.count
+        archetype.column('id')[:] = np.arange(self.next_id, self.next_id + n)
+        self.next_id += n
+        size = archetype.column('size')
+        archetype.column('left')[:] = rect_coords(archetype.column('x') - size // 2)
+        archetype.column('top')[:] = rect_coords(archetype.column('y') - size // 2)
 
-        return True, None
 
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.size)
\ No newline at end of file
+def draw_bullets(screen, *bullet_arrays, offset=(0, 0)):
+    """Draw every on-screen bullet of the given BulletArrays with a single blits call"""
+    ox, oy = offset
+    width, height = screen.get_size()
+    blits = []
+    for bullets in bullet_arrays:
+        archetype = bullets.archetype
+        if archetype.count == 0:
+            continue
+        size = archetype.column('size')
+        x = archetype.column('x').astype(np.int32) - ox
+        y = archetype.column('y').astype(np.int32) - oy
+        # Skip circles that wouldn't touch a single screen pixel
+        visible = (x > -size) & (x < width + size) & (y > -size) & (y < height + size)
+        for s, bx, by in zip(size[visible].tolist(), x[visible].tolist(), y[visible].tolist()):
+            blits.append((circle_surface(BULLET_COLOR, s), (bx - s, by - s)))
+    screen.blits(blits, doreturn=False)
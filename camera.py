@@ -0,0 +1,36 @@
+# camera.py - World bounds and the camera that scrolls the screen over them
+import pygame
+
+# Size of the classic single-screen arena, the default world
+ARENA_WIDTH, ARENA_HEIGHT = 1000, 600
+
+
+def arena_bounds():
+    return pygame.Rect(0, 0, ARENA_WIDTH, ARENA_HEIGHT)
+
+
+class Camera:
+    """The part of the world shown on screen, centered on whatever it follows.
+
+    `view` is a world-space rect updated in place, so other objects can keep a
+    reference to it (for example to spawn things on screen). Following is a
+    pure function of the target position, which keeps the simulation
+    deterministic when the camera is updated during ticks.
+    """
+
+    def __init__(self, width, height, world):
+        self.view = pygame.Rect(0, 0, width, height)
+        self.world = world
+        self.view.clamp_ip(world)
+
+    def follow(self, rect):
+        self.view.center = rect.center
+        self.view.clamp_ip(self.world)
+
+    @property
+    def offset(self):
+        """World position of the screen's top left corner"""
+        return self.view.x, self.view.y
+
+    def to_world(self, pos):
+        return pos[0] + self.view.x, pos[1] + self.view.y
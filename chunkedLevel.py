@@ -0,0 +1,146 @@
+# chunkedLevel.py - Worlds wider than the screen, generated and streamed as fixed-size chunks
+#
+# Every chunk is an ObstacleManager filled from its own seed, derived from the
+# level seed and the chunk index. A chunk can therefore be dropped and rebuilt
+# identically at any time. Only chunks near the focus rects (the player and the
+# enemy) are simulated and collided against. Loaded chunks are kept in an LRU,
+# so memory stays flat however long the world is.
+from collections import OrderedDict
+import random
+
+import pygame
+
+from determinism import derive_seed
+from obstacalsManager import ObstacleManager
+
+
+class ChunkedLevel:
+    """Drop-in replacement for ObstacleManager covering num_chunks screens side by side"""
+
+    def __init__(self, rng=None, num_chunks=16, chunk_width=1000, height=600, max_loaded=8, active_radius=1):
+        self.rng = rng if rng is not None else random
+        self.chunk_width = chunk_width
+        self.height = height
+        self.max_loaded = max_loaded
+        self.active_radius = active_radius  # Chunks on each side of a focus rect that are simulated
+        self.num_chunks = num_chunks
+        self.bounds = pygame.Rect(0, 0, num_chunks * chunk_width, height)
+
+        # (level seed, num_chunks, platforms per chunk, moving platforms per chunk)
+        self.layout = None
+        self.chunks = OrderedDict()  # Chunk index -> ObstacleManager, least recently used first
+        self.active = ()  # Sorted indices of the simulated chunks
+        self.active_obstacles = None  # Cached get_all_obstacles result for the active chunks
+
+    def generate_level(self, player=None, num_platforms=8, num_moving=4):
+        """Start a new world from the level stream, chunks are only built when first needed"""
+        self.load_layout((self.rng.randrange(1 << 64), self.num_chunks, num_platforms, num_moving))
+
+    def get_layout(self):
+        return self.layout
+
+    def load_layout(self, layout):
+        self.layout = layout
+        self.num_chunks = layout[1]
+        self.bounds.width = self.num_chunks * self.chunk_width
+        self.chunks.clear()
+        self.active = ()
+        self.active_obstacles = None
+
+    def chunk(self, index):
+        """The chunk at `index`, building it (and evicting an old one) if it isn't loaded"""
+        manager = self.chunks.get(index)
+        if manager is not None:
+            self.chunks.move_to_end(index)
+            return manager
+
+        seed, _, num_platforms, num_moving = self.layout
+        manager = ObstacleManager(random.Random(derive_seed(seed, f'chunk:{index}')))
+        area = pygame.Rect(index * self.chunk_width, 0, self.chunk_width, self.height)
+        manager.generate_level(None, num_platforms, num_moving, bounds=area)
+        self.chunks[index] = manager
+
+        # Evict the least recently used chunks that aren't being simulated
+        while len(self.chunks) > self.max_loaded:
+            for old_index in self.chunks:
+                if old_index not in self.active:
+                    del self.chunks[old_index]
+                    break
+            else:
+                break
+        return manager
+
+    def focus(self, rects):
+        """Simulate the chunks within active_radius of any of `rects` this tick"""
+        radius = self.active_radius
+        last = self.num_chunks - 1
+        indices = set()
+        for rect in rects:
+            center = rect.centerx // self.chunk_width
+            indices.update(range(max(0, center - radius), min(last, center + radius) + 1))
+        active = tuple(sorted(indices))
+        if active != self.active:
+            self.active = active
+            self.active_obstacles = None
+        for index in active:
+            self.chunk(index)
+
+    def update(self):
+        chunks = self.chunks
+        for index in self.active:
+            chunks[index].update()
+
+    def get_all_obstacles(self):
+        """Static and moving obstacles of the active chunks, rebuilt only when the active set changes"""
+        if self.active_obstacles is None:
+            obstacles = []
+            for index in self.active:
+                obstacles += self.chunks[index].get_all_obstacles()
+            self.active_obstacles = obstacles
+        return self.active_obstacles
+
+    def get_moving_indices(self):
+        """Positions of the moving platforms in get_all_obstacles(), chunk by chunk"""
+        indices = []
+        start = 0
+        for index in self.active:
+            chunk = self.chunks[index]
+            indices += [start + i for i in chunk.get_moving_indices()]
+            start += len(chunk.get_all_obstacles())
+        return indices
+
+    def snapshot(self):
+        """Level, loaded chunks in LRU order and the active set, see Game.snapshot"""
+        return (
+            self.layout,
+            tuple((index, chunk.snapshot()) for index, chunk in self.chunks.items()),
+            self.active
+        )
+
+    def restore(self, state):
+        layout, chunks, active = state
+        if self.layout is not layout:
+            self.load_layout(layout)
+        loaded = self.chunks
+        self.chunks = OrderedDict()
+        for index, chunk_state in chunks:
+            chunk = loaded.get(index)
+            if chunk is None:
+                chunk = ObstacleManager()
+            chunk.restore(chunk_state)
+            self.chunks[index] = chunk
+        self.active = active
+        self.active_obstacles = None
+
+    def draw(self, screen, offset=(0, 0)):
+        """Draw the loaded chunks overlapping the screen.
+
+        Drawing never loads chunks, so rendering can't change which chunks the
+        simulation keeps.
+        """
+        first = max(0, offset[0] // self.chunk_width)
+        last = (offset[0] + screen.get_width() - 1) // self.chunk_width
+        for index in range(first, last + 1):
+            chunk = self.chunks.get(index)
+            if chunk is not None:
+                chunk.draw(screen, offset)
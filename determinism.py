@@ -0,0 +1,95 @@
+# determinism.py - Per-game random streams and bit-exact reproducibility checks
+#
+# Every Game draws all of its randomness from a RandomStreams built from the
+# game's seed. Each subsystem gets its own stream, so extra draws in one
+# subsystem (for example a new particle effect) never shift the numbers another
+# subsystem sees, and two games with the same seed and inputs stay identical
+# tick for tick.
+import argparse
+import hashlib
+import random
+
+
+def derive_seed(seed, name):
+    """Seed for the stream `name` of `seed`, stable across processes unlike hash()"""
+    digest = hashlib.blake2b(f"{seed}:{name}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class RandomStreams:
+    """Independent random.Random streams derived from one seed, one per subsystem name"""
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.streams = {}
+
+    def stream(self, name):
+        rng = self.streams.get(name)
+        if rng is None:
+            rng = random.Random(derive_seed(self.seed, name))
+            self.streams[name] = rng
+        return rng
+
+    def getstate(self):
+        return tuple((name, rng.getstate()) for name, rng in sorted(self.streams.items()))
+
+    def setstate(self, state):
+        for name, rng_state in state:
+            self.stream(name).setstate(rng_state)
+
+
+def state_hash(game):
+    """Hash of the full simulation state, equal only if two games are bit-identical"""
+    state = game.snapshot()
+    digest = hashlib.blake2b(digest_size=16)
+
+    # Everything but the particle arrays is plain Python data whose repr is exact
+    digest.update(repr(state[:-1]).encode())
+    count, fields = state[-1]
+    digest.update(str(count).encode())
+    for field in fields:
+        digest.update(field.tobytes())
+    return digest.hexdigest()
+
+
+def trace_hashes(seed, ticks, level_id=None):
+    """Run a bot-driven headless match and return the state hash after every tick"""
+    from gameClass import Game
+    from inputSource import ScriptedBotInput
+
+    game = Game(headless=True, seed=seed, level_id=level_id)
+    game.input_source = ScriptedBotInput(game.streams.stream('bot'))
+    hashes = []
+    for _ in range(ticks):
+        game.step()
+        hashes.append(state_hash(game))
+    return hashes
+
+
+def first_divergence(seed, ticks, level_id=None):
+    """Run the same match twice and return the first tick whose states differ, or None"""
+    first = trace_hashes(seed, ticks, level_id)
+    second = trace_hashes(seed, ticks, level_id)
+    for tick, (a, b) in enumerate(zip(first, second), 1):
+        if a != b:
+            return tick
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that a seeded match is bit-reproducible")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ticks', type=int, default=3600)
+    parser.add_argument('--level-id', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    tick = first_divergence(args.seed, args.ticks, args.level_id)
+    if tick is None:
+        print(f"Seed {args.seed}: {args.ticks} ticks reproduced exactly")
+    else:
+        print(f"Seed {args.seed}: states diverge at tick {tick}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
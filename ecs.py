@@ -0,0 +1,144 @@
+# ecs.py - Entities stored as packed component arrays, one table per archetype
+#
+# Entities that have the same components (an archetype) live in one Archetype:
+# every component is a NumPy array and the live entities fill the first
+# `count` slots of all of them, in spawn order. Systems are functions over
+# those arrays, so moving or colliding a thousand entities is a handful of
+# vectorized operations instead of a thousand method calls. Code outside the
+# hot loops can still hold an entity as a thin view that reads and writes its
+# row through attributes.
+from itertools import chain
+
+import numpy as np
+
+
+class Archetype:
+    """Packed component arrays for entities that all have the same components"""
+
+    def __init__(self, components, capacity=64):
+        # components is [(name, dtype)], values are passed to spawn in that order
+        self.names = tuple(name for name, _ in components)
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in components}
+        self.capacity = capacity
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name):
+        """Live values of one component, a view that systems can update in place"""
+        return self.columns[name][:self.count]
+
+    def reserve(self, count):
+        """Make room for `count` entities, doubling the arrays as needed"""
+        if count <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < count:
+            capacity *= 2
+        for name, array in self.columns.items():
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            self.columns[name] = grown
+        self.capacity = capacity
+
+    def spawn(self, *values):
+        """Add one entity with component values in `names` order, returns its row"""
+        i = self.count
+        if i == self.capacity:
+            self.reserve(i + 1)
+        columns = self.columns
+        for name, value in zip(self.names, values):
+            columns[name][i] = value
+        self.count = i + 1
+        return i
+
+    def keep(self, mask):
+        """Remove the entities where mask is False, the others keep their order"""
+        if mask.all():
+            return
+        keep = np.flatnonzero(mask)
+        k = len(keep)
+        for array in self.columns.values():
+            array[:k] = array[keep]
+        self.count = k
+
+    def clear(self):
+        self.count = 0
+
+    def rows(self, names=None):
+        """Live entities as tuples of Python values, in spawn order"""
+        return tuple(zip(*(self.column(name).tolist() for name in names or self.names)))
+
+    def load_rows(self, rows, names=None):
+        """Replace every entity with `rows`, the inverse of rows()"""
+        n = len(rows)
+        self.count = 0
+        self.reserve(n)
+        self.count = n
+        if n:
+            for name, values in zip(names or self.names, zip(*rows)):
+                self.columns[name][:n] = values
+
+
+class Component:
+    """Attribute of an EntityView that reads and writes one component of its row"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        return view.archetype.columns[self.name][view.index].item()
+
+    def __set__(self, view, value):
+        view.archetype.columns[self.name][view.index] = value
+
+
+class EntityView:
+    """One entity of an archetype, valid until the archetype next removes entities"""
+    __slots__ = ('archetype', 'index')
+
+    def __init__(self, archetype, index):
+        self.archetype = archetype
+        self.index = index
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.archetype is self.archetype and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.archetype), self.index))
+
+
+def rect_coords(values):
+    """Round floats the way assigning them to a pygame.Rect does, halves away from zero"""
+    whole = np.trunc(values)
+    return (whole + np.copysign(np.abs(values - whole) >= 0.5, values)).astype(np.int32)
+
+
+def rect_array(rects):
+    """(n, 4) array of left, top, right, bottom for a list of pygame.Rects"""
+    bounds = np.fromiter(chain.from_iterable(rects), np.int32, 4 * len(rects)).reshape(-1, 4)
+    bounds[:, 2:] += bounds[:, :2]
+    return bounds
+
+
+def first_overlap(left, top, right, bottom, rects):
+    """Index of the first rect in `rects` each box overlaps, -1 where there is none.
+
+    Boxes are given as edge arrays, `rects` as a list of pygame.Rects or a
+    rect_array, and all must have a positive size. Overlap follows
+    Rect.colliderect: touching edges don't count.
+    """
+    others = rects if isinstance(rects, np.ndarray) else rect_array(rects)
+    if len(left) == 0 or len(others) == 0:
+        return np.full(len(left), -1, dtype=np.intp)
+    o_left, o_top, o_right, o_bottom = others.T
+    overlap = left[:, None] < o_right
+    overlap &= right[:, None] > o_left
+    overlap &= top[:, None] < o_bottom
+    overlap &= bottom[:, None] > o_top
+    first = overlap.argmax(axis=1)
+    first[~overlap.any(axis=1)] = -1
+    return first
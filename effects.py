@@ -0,0 +1,32 @@
+# effects.py - Particle effects driven by simulation events
+from events import BulletHit, ItemCollected
+
+# Impact flash (color, lifetime, radius) by who fired the bullet and what it hit
+IMPACT_STYLES = {
+    ('player', 'obstacle'): ((255, 165, 0), 10, 10),  # Orange
+    ('enemy', 'obstacle'): ((200, 200, 100), 10, 10),
+    ('player', 'enemy'): ((255, 100, 100), 15, 12),  # Red
+    ('enemy', 'player'): ((255, 0, 0), 15, 15),  # Red
+}
+PICKUP_BURST_COLOR = (255, 100, 100)
+PICKUP_BURST_SIZE = 15
+
+
+class ParticleEffects:
+    """Event bus subscriber adding impact flashes and pickup bursts to a ParticleSystem.
+
+    Subscribe with `bus.subscribe(effects, *ParticleEffects.event_types)`.
+    """
+    event_types = (BulletHit, ItemCollected)
+
+    def __init__(self, particles):
+        self.particles = particles
+
+    def __call__(self, events):
+        particles = self.particles
+        for event in events:
+            if type(event) is BulletHit:
+                color, life, radius = IMPACT_STYLES[event.shooter, event.target]
+                particles.emit_impact(event.x, event.y, color=color, life=life, max_radius=radius)
+            else:
+                particles.emit_burst(event.x, event.y, count=PICKUP_BURST_SIZE, color=PICKUP_BURST_COLOR)
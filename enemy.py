@@ -2,56 +2,96 @@
 import pygame
 import random
 import math
+import time
+
+from assets import circle_surface, load_image
+from camera import arena_bounds
+from enemyCombat import EnemyCombat
+from enemyMovement import EnemyMovement
+from enemyPathfinding import EnemyPathfinding
+from enemyStates import AttackState, ChaseState, FleeState, IdleState, PatrolState, SeekHealthState
+from events import EnemyStateChanged, Respawned
 from healthItem import HealthItem
 
+# FSM state classes by name
+STATE_CLASSES = {
+    'patrol': PatrolState,
+    'chase': ChaseState,
+    'attack': AttackState,
+    'flee': FleeState,
+    'idle': IdleState,
+    'seek_health': SeekHealthState
+}
+
+# State indicator colors (for debugging)
+STATE_COLORS = {
+    'patrol': (0, 255, 255),  # Cyan
+    'chase': (255, 165, 0),  # Orange
+    'attack': (255, 0, 0),  # Red
+    'flee': (128, 0, 128),  # Purple
+    'idle': (200, 200, 200),  # Light gray
+    'seek_health': (0, 255, 0)  # Green for health seeking
+}
+
+
+class StateTable(dict):
+    """Enemy states by name, each built on first lookup"""
+
+    def __init__(self, enemy):
+        super().__init__()
+        self.enemy = enemy
+
+    def __missing__(self, name):
+        state = self[name] = STATE_CLASSES[name](self.enemy)
+        return state
 
 
 class Enemy:
-    def __init__(self, x, y, width, height):
+    name = 'enemy'  # How events refer to the enemy
+
+    def __init__(self, x, y, width, height, rng=None):
         self.rect = pygame.Rect(x, y, width, height)
         self.width = width
         self.height = height
         self.color = (255, 0, 0)  # Red color for enemy
 
+        # World the enemy is kept inside and the area it respawns in, the
+        # single-screen arena unless a game sets them (respawn_area may be the camera view)
+        self.bounds = arena_bounds()
+        self.respawn_area = self.bounds
+
+        # Random source for AI decisions, the global random module unless a game supplies its own
+        self.rng = rng if rng is not None else random
+
         # Initialize systems
-        from enemyMovement import EnemyMovement
         self.movement = EnemyMovement(self)
-        from enemyCombat import EnemyCombat
         self.combat = EnemyCombat(self)
-        from enemyPathfinding import EnemyPathfinding
         self.pathfinding = EnemyPathfinding(self)
 
-        # State management
-        from enemyStates import PatrolState
-        from enemyStates import ChaseState
-        from enemyStates import AttackState
-        from enemyStates import FleeState
-        from enemyStates import IdleState
-        from enemyStates import SeekHealthState
-        self.states = {
-            'patrol': PatrolState(self),
-            'chase': ChaseState(self),
-            'attack': AttackState(self),
-            'flee': FleeState(self),
-            'idle': IdleState(self),
-            'seek_health': SeekHealthState(self)
-        }
+        # State management, states are built the first time the enemy enters them
+        self.states = StateTable(self)
         self.current_state = self.states['patrol']
         self.state_timer = 0
         self.state_cooldown = 0
         self.min_state_time = 30  # Minimum frames to stay in a state
 
+        # TraceRecorder for FSM and pathfinding events while tracing, see Game.start_tracing
+        self.tracer = None
+        # EventBus told about damage, state changes and respawns, set by the game
+        self.events = None
+
         # Target tracking
         self.target_health_item = None
+        self.items_collected = 0
 
-        # Load image
-        try:
-            self.image = pygame.image.load("assets/enemy/character.png")
-            self.image = pygame.transform.scale(self.image, (width, height))
-            self.use_image = True
-        except (pygame.error, FileNotFoundError):
-            print("Character image not found, using rectangle instead")
-            self.use_image = False
+    @property
+    def image(self):
+        """Enemy image, loaded on first draw and shared between instances"""
+        return load_image("assets/enemy/character.png", (self.width, self.height))
+
+    @property
+    def use_image(self):
+        return self.image is not None
 
     def move(self, obstacles, player=None, health_items=None):
         # Update state based on player and enemy conditions
@@ -61,7 +101,12 @@ class Enemy:
         self.combat.update()
 
         # Execute current state behavior
-        self.current_state.execute(obstacles, player, health_items)
+        if self.tracer:
+            start = time.perf_counter()
+            self.current_state.execute(obstacles, player, health_items)
+            self.tracer.complete('state:' + self.current_state.name, start, time.perf_counter() - start, 'enemy_fsm')
+        else:
+            self.current_state.execute(obstacles, player, health_items)
 
         # Apply gravity (common to all states)
         self.movement.apply_gravity(obstacles)
@@ -89,6 +134,11 @@ class Enemy:
 
     def transition_to(self, new_state_name):
         if self.state_cooldown == 0:
+            if self.tracer:
+                self.tracer.instant('transition', 'enemy_fsm',
+                                    {'from': self.current_state.name, 'to': new_state_name})
+            if self.events is not None:
+                self.events.publish(EnemyStateChanged(self.current_state.name, new_state_name))
             self.current_state = self.states[new_state_name]
             self.state_timer = 0
             self.state_cooldown = self.min_state_time
@@ -97,56 +147,87 @@ class Enemy:
             if new_state_name != 'seek_health':
                 self.target_health_item = None
 
-    def take_damage(self):
-        self.combat.take_damage()
+    def take_damage(self, amount=10):
+        self.combat.take_damage(amount)
+
+    def heal(self, amount):
+        return self.combat.heal(amount)
 
     def respawn(self):
         self.combat.reset_health()
         self.current_state = self.states['patrol']
         self.target_health_item = None
 
-        # Randomly choose one of the four corners for the enemy to appear
-        corner = random.choice(['top-left', 'top-right', 'bottom-left', 'bottom-right'])
+        # Randomly choose one of the four corners of the respawn area for the enemy to appear
+        corner = self.rng.choice(['top-left', 'top-right', 'bottom-left', 'bottom-right'])
+        area = self.respawn_area
 
         if corner == 'top-left':
-            self.rect.x = 0
-            self.rect.y = 0
+            self.rect.x = area.left
+            self.rect.y = area.top
         elif corner == 'top-right':
-            self.rect.x = 1000 - self.width
-            self.rect.y = 0
+            self.rect.x = area.right - self.width
+            self.rect.y = area.top
         elif corner == 'bottom-left':
-            self.rect.x = 0
-            self.rect.y = 600 - self.height - 50
+            self.rect.x = area.left
+            self.rect.y = area.bottom - self.height - 50
         elif corner == 'bottom-right':
-            self.rect.x = 1000 - self.width
-            self.rect.y = 600 - self.height - 50
+            self.rect.x = area.right - self.width
+            self.rect.y = area.bottom - self.height - 50
+
+        if self.events is not None:
+            self.events.publish(Respawned(self.name, self.rect.x, self.rect.y))
+
+    def snapshot(self, health_items):
+        """Simulation state as an immutable tuple, see Game.snapshot.
+
+        The target health item is stored as its index in health_items.
+        """
+        target = -1
+        if self.target_health_item is not None and self.target_health_item.active:
+            target = health_items.index(self.target_health_item)
+        movement = self.movement
+        combat = self.combat
+        return (self.rect.x, self.rect.y, self.current_state.name, self.state_timer,
+                self.state_cooldown, target, self.items_collected,
+                movement.velocity_x, movement.velocity_y, movement.is_jumping,
+                combat.health, combat.shoot_cooldown, combat.deaths,
+                self.pathfinding.path_check_timer)
+
+    def restore(self, state, health_items):
+        movement = self.movement
+        combat = self.combat
+        (self.rect.x, self.rect.y, state_name, self.state_timer,
+         self.state_cooldown, target, self.items_collected,
+         movement.velocity_x, movement.velocity_y, movement.is_jumping,
+         combat.health, combat.shoot_cooldown, combat.deaths,
+         self.pathfinding.path_check_timer) = state
+        self.current_state = self.states[state_name]
+        self.target_health_item = health_items[target] if target >= 0 else None
+
+    def draw(self, screen, offset=(0, 0)):
+        ox, oy = offset
+        rect = self.rect.move(-ox, -oy)
+
+        # Skip an off-screen enemy, the margin covers the health bar and state indicator
+        if not rect.inflate(40, 40).colliderect(screen.get_rect()):
+            return
 
-    def draw(self, screen):
         if self.use_image:
             # Draw enemy using image
-            screen.blit(self.image, self.rect)
+            screen.blit(self.image, rect)
         else:
             # Draw enemy as a rectangle (fallback)
-            pygame.draw.rect(screen, self.color, self.rect)
+            pygame.draw.rect(screen, self.color, rect)
 
         # Draw health bar
-        self.combat.draw_health_bar(screen)
+        self.combat.draw_health_bar(screen, offset)
 
         # State indicator (for debugging)
-        state_colors = {
-            'patrol': (0, 255, 255),  # Cyan
-            'chase': (255, 165, 0),  # Orange
-            'attack': (255, 0, 0),  # Red
-            'flee': (128, 0, 128),  # Purple
-            'idle': (200, 200, 200),  # Light gray
-            'seek_health': (0, 255, 0)  # Green for health seeking
-        }
         indicator_size = 8
-        pygame.draw.circle(
-            screen,
-            state_colors.get(self.current_state.name, (255, 255, 255)),
-            (self.rect.right + 10, self.rect.top + 10),
-            indicator_size
+        screen.blit(
+            circle_surface(STATE_COLORS.get(self.current_state.name, (255, 255, 255)), indicator_size),
+            (rect.right + 10 - indicator_size, rect.top + 10 - indicator_size)
         )
 
         # Draw a line to target health item if in seek health state
@@ -154,8 +235,8 @@ class Enemy:
             pygame.draw.line(
                 screen,
                 (0, 255, 0),
-                (self.rect.centerx, self.rect.centery),
-                (self.target_health_item.rect.centerx, self.target_health_item.rect.centery),
+                (rect.centerx, rect.centery),
+                (self.target_health_item.rect.centerx - ox, self.target_health_item.rect.centery - oy),
                 2
             )
 
@@ -1,8 +1,9 @@
 # enemy_combat.py - Handles enemy combat and health mechanics
 import pygame
-import random
 import math
 
+from events import EnemyDamaged
+
 
 class EnemyCombat:
     def __init__(self, enemy):
@@ -12,6 +13,7 @@ class EnemyCombat:
         self.max_health = 100
         self.health = self.max_health
         self.flee_health_threshold = 30  # Health below which enemy seeks health
+        self.deaths = 0
 
         # Combat variables
         self.attack_range = 200  # Distance to attack player
@@ -28,19 +30,29 @@ class EnemyCombat:
         if self.shoot_cooldown > 0:
             self.shoot_cooldown -= 1
 
-    def take_damage(self):
+    def take_damage(self, amount=10):
         """Handle enemy taking damage"""
-        self.health -= 10
+        self.health -= amount
+        if self.enemy.events is not None:
+            self.enemy.events.publish(EnemyDamaged(amount, self.health))
         if self.health <= 0:
+            self.deaths += 1
             self.enemy.respawn()
         else:
             # Chance to flee when hit
-            if random.random() < 0.3:  # 30% chance to flee when hit
+            if self.enemy.rng.random() < 0.3:  # 30% chance to flee when hit
                 self.enemy.transition_to('flee')
             # Higher chance (70%) to seek health when hit and health is low
-            elif self.health <= self.flee_health_threshold and random.random() < 0.7:
+            elif self.health <= self.flee_health_threshold and self.enemy.rng.random() < 0.7:
                 self.enemy.transition_to('seek_health')
 
+    def heal(self, amount):
+        """Restore up to `amount` health, returns False if already at full health"""
+        if self.health >= self.max_health:
+            return False
+        self.health = min(self.health + amount, self.max_health)
+        return True
+
     def reset_health(self):
         """Reset health to max"""
         self.health = self.max_health
@@ -65,8 +77,8 @@ class EnemyCombat:
 
         # Add some randomness to make it less accurate
         accuracy_variation = 0.2  # Lower means more accurate
-        dx += random.uniform(-accuracy_variation, accuracy_variation)
-        dy += random.uniform(-accuracy_variation, accuracy_variation)
+        dx += self.enemy.rng.uniform(-accuracy_variation, accuracy_variation)
+        dy += self.enemy.rng.uniform(-accuracy_variation, accuracy_variation)
 
         # Re-normalize after adding randomness
         distance = max(1, math.sqrt(dx * dx + dy * dy))
@@ -90,15 +102,15 @@ class EnemyCombat:
             return False
 
         # Random chance to shoot when in attack state (to prevent constant firing)
-        return random.random() < 0.05  # 5% chance to shoot each frame when in attack state
+        return self.enemy.rng.random() < 0.05  # 5% chance to shoot each frame when in attack state
 
-    def draw_health_bar(self, screen):
+    def draw_health_bar(self, screen, offset=(0, 0)):
         """Draw the enemy's health bar"""
         health_bar_width = self.enemy.width * (self.health / self.max_health)
         health_bar_height = 5
         health_bar_rect = pygame.Rect(
-            self.enemy.rect.x,
-            self.enemy.rect.y - 10,
+            self.enemy.rect.x - offset[0],
+            self.enemy.rect.y - 10 - offset[1],
             health_bar_width,
             health_bar_height
         )
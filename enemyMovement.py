@@ -31,8 +31,8 @@ class EnemyMovement:
                     self.velocity_y = 0
 
         # Prevent falling through the ground
-        if self.enemy.rect.bottom > 600:  # Assuming screen height is 600
-            self.enemy.rect.bottom = 600
+        if self.enemy.rect.bottom > self.enemy.bounds.bottom:
+            self.enemy.rect.bottom = self.enemy.bounds.bottom
             self.velocity_y = 0
             self.is_jumping = False
 
@@ -48,12 +48,13 @@ class EnemyMovement:
                     self.velocity_x *= -1  # Reverse direction
 
     def enforce_boundaries(self):
-        """Keep enemy within screen bounds"""
-        if self.enemy.rect.left < 0:
-            self.enemy.rect.left = 0
+        """Keep enemy within world bounds"""
+        bounds = self.enemy.bounds
+        if self.enemy.rect.left < bounds.left:
+            self.enemy.rect.left = bounds.left
             self.velocity_x *= -1
-        if self.enemy.rect.right > 1000:  # Updated to 1000 for new WIDTH
-            self.enemy.rect.right = 1000
+        if self.enemy.rect.right > bounds.right:
+            self.enemy.rect.right = bounds.right
             self.velocity_x *= -1
 
     def jump(self):
@@ -1,6 +1,7 @@
 # enemy_pathfinding.py - Handles enemy pathfinding and spatial awareness
 import pygame
 import math
+import time
 
 
 class EnemyPathfinding:
@@ -25,6 +26,10 @@ class EnemyPathfinding:
 
     def check_path_to_target(self, obstacles, target_x, target_y):
         """Check if there's a clear path to the target"""
+        tracer = self.enemy.tracer
+        if tracer:
+            trace_start = time.perf_counter()
+
         # Simple ray casting
         start_x, start_y = self.enemy.rect.centerx, self.enemy.rect.centery
 
@@ -53,10 +58,16 @@ class EnemyPathfinding:
             if not path_clear:
                 break
 
+        if tracer:
+            tracer.complete('check_path_to_target', trace_start, time.perf_counter() - trace_start, 'pathfinding')
         return path_clear
 
     def should_jump(self, obstacles, player):
         """Determine if the enemy should jump to reach the player"""
+        tracer = self.enemy.tracer
+        if tracer:
+            trace_start = time.perf_counter()
+
         should_jump = False
 
         # Check if there's an obstacle in front of us
@@ -95,10 +106,16 @@ class EnemyPathfinding:
             if not ground_detected and not self.enemy.movement.is_jumping:
                 should_jump = True
 
+        if tracer:
+            tracer.complete('should_jump', trace_start, time.perf_counter() - trace_start, 'pathfinding')
         return should_jump
 
     def should_jump_for_path(self, obstacles, target):
         """Determine if the enemy should jump to reach a target"""
+        tracer = self.enemy.tracer
+        if tracer:
+            trace_start = time.perf_counter()
+
         # Check if there's an obstacle in front of us
         jump_check_rect = pygame.Rect(
             self.enemy.rect.x + (30 if self.enemy.movement.velocity_x > 0 else -30),
@@ -128,5 +145,8 @@ class EnemyPathfinding:
                 ground_ahead = True
                 break
 
+        if tracer:
+            tracer.complete('should_jump_for_path', trace_start, time.perf_counter() - trace_start, 'pathfinding')
+
         # Jump if obstacle ahead, target is above, or there's a gap
         return obstacle_ahead or target.rect.centery < self.enemy.rect.centery - 40 or not ground_ahead
\ No newline at end of file
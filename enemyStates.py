@@ -1,5 +1,4 @@
 # enemy_states.py - States for enemy behavior
-import random
 import math
 
 
@@ -70,7 +69,7 @@ class EnemyState:
         elif self.name == 'chase' and distance_to_player > self.enemy.pathfinding.detection_range:
             return 'patrol'
         elif self.name == 'patrol' and self.enemy.state_timer > 300:
-            if random.random() < 0.1:  # 10% chance to idle
+            if self.enemy.rng.random() < 0.1:  # 10% chance to idle
                 return 'idle'
 
         return self.name  # Default to current state
@@ -106,10 +105,10 @@ class PatrolState(EnemyState):
     def execute(self, obstacles, player, health_items):
         # Change direction periodically
         if self.enemy.state_timer >= self.direction_change_time or self.enemy.movement.velocity_x == 0:
-            self.enemy.movement.velocity_x = random.choice([-2, 2])
+            self.enemy.movement.velocity_x = self.enemy.rng.choice([-2, 2])
 
         # Random jump during patrol
-        if not self.enemy.movement.is_jumping and random.randint(0, 100) < 2:  # 2% chance to jump
+        if not self.enemy.movement.is_jumping and self.enemy.rng.randint(0, 100) < 2:  # 2% chance to jump
             self.enemy.movement.jump()
 
         # Apply horizontal movement
@@ -190,10 +189,10 @@ class FleeState(EnemyState):
         else:
             # If no player to flee from, just move in a random direction away
             if self.enemy.movement.velocity_x == 0:
-                self.enemy.movement.velocity_x = random.choice([-3, 3])  # Random direction
+                self.enemy.movement.velocity_x = self.enemy.rng.choice([-3, 3])  # Random direction
 
         # Jump more frequently when fleeing
-        if not self.enemy.movement.is_jumping and random.randint(0, 100) < 8:  # 8% chance to jump
+        if not self.enemy.movement.is_jumping and self.enemy.rng.randint(0, 100) < 8:  # 8% chance to jump
             self.enemy.movement.jump()
 
         # Apply horizontal movement
@@ -0,0 +1,67 @@
+# events.py - Typed simulation events and the per-tick bus that delivers them
+#
+# Simulation code publishes what happened (a bullet hit, an item was picked
+# up, the enemy changed state) instead of calling into effects, audio or
+# telemetry itself. The bus queues the events of one tick and hands each
+# subscriber the ones it asked for in a single batch when the game dispatches
+# at the end of the tick. Events are plain immutable data, names instead of
+# object references, so they can be logged or sent over the network as is.
+from collections import namedtuple
+
+# A bullet fired by `shooter` ('player' or 'enemy') hit `target` ('obstacle',
+# 'player' or 'enemy') at (x, y)
+BulletHit = namedtuple('BulletHit', ['shooter', 'target', 'x', 'y'])
+
+# Damage that was applied, health is what is left afterwards
+PlayerDamaged = namedtuple('PlayerDamaged', ['amount', 'health'])
+EnemyDamaged = namedtuple('EnemyDamaged', ['amount', 'health'])
+
+# A health item centered at (x, y) healed `collector` ('player' or 'enemy') by up to `amount`
+ItemCollected = namedtuple('ItemCollected', ['collector', 'amount', 'x', 'y'])
+
+# A health item ran out of lifetime or fell out of the world, `reason` is 'timeout' or 'fell'
+ItemExpired = namedtuple('ItemExpired', ['reason', 'x', 'y'])
+
+EnemyStateChanged = namedtuple('EnemyStateChanged', ['previous', 'state'])
+
+# `entity` ('player' or 'enemy') came back with full health at (x, y)
+Respawned = namedtuple('Respawned', ['entity', 'x', 'y'])
+
+EVENT_TYPES = (BulletHit, PlayerDamaged, EnemyDamaged, ItemCollected, ItemExpired, EnemyStateChanged, Respawned)
+
+
+class EventBus:
+    """Queue of the current tick's events and the subscribers they go to"""
+
+    def __init__(self):
+        self.queue = []
+        self.subscribers = []  # [(handler, event types)]
+
+    def publish(self, event):
+        self.queue.append(event)
+
+    def subscribe(self, handler, *event_types):
+        """Call handler(events) once per dispatch with that tick's events of the given types.
+
+        Events arrive in publish order, handlers are not called for ticks
+        without any matching event. No types means every event.
+        """
+        self.subscribers.append((handler, event_types or EVENT_TYPES))
+
+    def unsubscribe(self, handler):
+        self.subscribers = [entry for entry in self.subscribers if entry[0] != handler]
+
+    def dispatch(self):
+        """Deliver and drop the queued events"""
+        queue = self.queue
+        if not queue:
+            return
+        self.queue = []
+        for handler, event_types in self.subscribers:
+            events = [event for event in queue if isinstance(event, event_types)]
+            if events:
+                handler(events)
+
+    def clear(self):
+        """Drop the queued events without delivering them"""
+        self.queue.clear()
@@ -0,0 +1,99 @@
+# frameProfiler.py - Per-phase frame timing with rolling percentiles and an on-screen overlay
+from collections import deque
+import time
+
+from assets import get_font
+
+
+class FrameProfiler:
+    """Times named phases of every frame.
+
+    Phases are marked with begin(name), which also ends the previous phase, so
+    instrumenting a sequence of steps costs one clock read per step. The last
+    `window` samples of each phase are kept for percentiles.
+    """
+
+    def __init__(self, window=240, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self.samples = {}  # phase name -> deque of durations in seconds, in first-seen order
+        self.current = None
+        self.start = 0.0
+        self.tracer = None  # TraceRecorder that also receives every phase, see traceRecorder.py
+        self.allocations = None  # AllocationTracker that follows the same phases, see allocationTracker.py
+
+        # Overlay state, the text is only re-rendered every refresh_interval frames
+        self.show_overlay = False
+        self.refresh_interval = 15
+        self.frames_since_refresh = 0
+        self.overlay_lines = []
+        self.font = None
+
+    def begin(self, name):
+        """End the running phase (if any) and start timing `name`"""
+        if not self.enabled:
+            return
+        # The allocation phase stops before and starts after the bookkeeping here (even
+        # the clock read allocates a float), so none of it is charged to the game's phases
+        allocations = self.allocations
+        if allocations is not None:
+            allocations.end()
+        now = time.perf_counter()
+        if self.current is not None:
+            self._record(self.current, self.start, now)
+        self.current = name
+        if allocations is not None:
+            allocations.begin(name)
+        self.start = now
+
+    def end(self):
+        """End the running phase"""
+        if not self.enabled or self.current is None:
+            return
+        if self.allocations is not None:
+            self.allocations.end()
+        now = time.perf_counter()
+        self._record(self.current, self.start, now)
+        self.current = None
+
+    def _record(self, name, start, end):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(end - start)
+        if self.tracer is not None:
+            self.tracer.complete(name, start, end - start)
+
+    def percentiles(self, name, points=(50, 95, 99)):
+        """Return the requested percentiles of a phase in milliseconds"""
+        samples = sorted(self.samples.get(name, ()))
+        if not samples:
+            return tuple(0.0 for _ in points)
+        last = len(samples) - 1
+        return tuple(samples[min(last, int(last * p / 100 + 0.5))] * 1000 for p in points)
+
+    def report(self):
+        """Percentiles of every phase as {name: (p50, p95, p99)} in milliseconds"""
+        return {name: self.percentiles(name) for name in self.samples}
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+        self.frames_since_refresh = self.refresh_interval
+
+    def draw_overlay(self, screen, x, y):
+        if not self.show_overlay:
+            return
+
+        if self.font is None:
+            self.font = get_font(22)
+
+        self.frames_since_refresh += 1
+        if self.frames_since_refresh >= self.refresh_interval:
+            self.frames_since_refresh = 0
+            lines = ["Phase (ms)          p50    p95    p99"]
+            for name, (p50, p95, p99) in self.report().items():
+                lines.append(f"{name:<18}{p50:6.2f} {p95:6.2f} {p99:6.2f}")
+            self.overlay_lines = [self.font.render(line, True, (0, 0, 0)) for line in lines]
+
+        for i, text in enumerate(self.overlay_lines):
+            screen.blit(text, (x, y + i * 18))
@@ -1,15 +1,30 @@
+import argparse
+import functools
+import random
 import sys
+import threading
 
 import pygame
 
+from assets import get_font
+from bullet import BulletArray, draw_bullets
+from camera import Camera
+from chunkedLevel import ChunkedLevel
+from determinism import RandomStreams
+from effects import ParticleEffects
 from enemy import Enemy
+from events import BulletHit, EventBus
+from frameProfiler import FrameProfiler
 from healthItem import HealthItem
-from impactEffect import ImpactEffect
+from inputSource import InputSource, KeyboardMouseInput
 from obstacalsManager import ObstacleManager
+from particleSystem import ParticleSystem
 from player import Player
+from replay import EVENT_RESET, EVENT_SPAWN_HEALTH, ReplayRecorder
+from traceRecorder import TraceRecorder
 from healthManager import HealthItemManager
 
-pygame.init()
+# pygame modules are initialised on demand (see boot.py), importing this starts nothing
 WIDTH, HEIGHT = 1000, 600
 WHITE = (255, 255, 255)
 GREEN = (0, 255, 0)
@@ -20,65 +35,249 @@ BLACK = (0, 0, 0)
 OBSTACLE_COLOR = (139, 69, 19)  # Brown color for obstacles
 PLATFORM_COLORS = [(120, 60, 20), (110, 55, 15), (130, 65, 25), (100, 50, 10)]  # Variety of browns
 GROUND_Y = HEIGHT - 50
+PLAYER_SPAWN = (WIDTH // 2, HEIGHT - 100)
+PLAYER_BULLET_DAMAGE = 10
+ENEMY_BULLET_DAMAGE = 5
+
+
+@functools.lru_cache(maxsize=256)
+def level_layout(level_id):
+    """Generate the level identified by level_id, cached and shared read-only within the process"""
+    manager = ObstacleManager(RandomStreams(level_id).stream('level'))
+    manager.generate_level(Player(PLAYER_SPAWN[0], PLAYER_SPAWN[1], 50, 50))
+    return manager.get_layout()
 
 
 class Game:
-    def __init__(self):
-        # Create the screen
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption("Rogue Shot")
+    def __init__(self, headless=False, seed=None, level=None, level_id=None, input_source=None, record=False,
+                 world_chunks=None, screen=None):
+        # Create the screen, headless games draw to an off-screen surface instead of a window.
+        # Headless games that never draw (servers hosting many of them) can share one screen.
+        self.headless = headless
+        if headless:
+            self.screen = screen if screen is not None else pygame.Surface((WIDTH, HEIGHT))
+        else:
+            pygame.display.init()
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+            pygame.display.set_caption("Rogue Shot")
+
+        # All randomness comes from streams derived from this seed, one per subsystem,
+        # so a seed plus the input log reproduces the match exactly (see determinism.py)
+        if seed is None:
+            seed = random.randrange(1 << 32)
+        self.seed = seed
+        self.streams = RandomStreams(seed)
+
+        # Levels come from the game's own stream unless a level ID names a shared layout
+        self.level_id = level_id
+
+        # Input log for replays, see replay.py
+        self.recorder = ReplayRecorder(seed, level_id, world_chunks) if record else None
 
         # Clock for controlling FPS
         self.clock = pygame.time.Clock()
 
+        # Where player input comes from, the live keyboard and mouse unless something else drives the player
+        if input_source is None:
+            input_source = InputSource() if headless else KeyboardMouseInput()
+        self.input_source = input_source
+
         # Game objects
-        self.player = Player(WIDTH // 2, HEIGHT - 100, 50, 50)
-        self.enemy = Enemy(WIDTH - 100, HEIGHT - 100, 50, 50)
-        self.obstacle_manager = ObstacleManager()
-        self.health_item_manager = HealthItemManager()  # Add health item manager
+        self.player = Player(PLAYER_SPAWN[0], PLAYER_SPAWN[1], 50, 50)
+        self.enemy = Enemy(WIDTH - 100, HEIGHT - 100, 50, 50, rng=self.streams.stream('enemy'))
+        # World wider than the screen when world_chunks is given, streamed in screen-sized chunks
+        self.world_chunks = world_chunks
+        if world_chunks:
+            if level_id is not None:
+                raise ValueError("Shared level IDs are single-screen arenas, they can't be used with world_chunks")
+            self.obstacle_manager = ChunkedLevel(self.streams.stream('level'), world_chunks, WIDTH, HEIGHT)
+            self.world = self.obstacle_manager.bounds
+        else:
+            self.obstacle_manager = ObstacleManager(self.streams.stream('level'))
+            self.world = pygame.Rect(0, 0, WIDTH, HEIGHT)
+        self.health_item_manager = HealthItemManager(rng=self.streams.stream('health_items'))
+
+        # Hits, damage, pickups and state changes are published during the tick and
+        # delivered once at its end, the particle effects are one of the subscribers
+        self.events = EventBus()
+        self.player.events = self.events
+        self.enemy.events = self.events
+        self.health_item_manager.events = self.events
+        self.particles = ParticleSystem(rng=self.streams.stream('effects'))  # Impact flashes and pickup bursts
+        self.effects = ParticleEffects(self.particles)
+        self.events.subscribe(self.effects, *ParticleEffects.event_types)
+
+        # Camera following the player, enemies respawn and health items drop in on screen
+        self.camera = Camera(WIDTH, HEIGHT, self.world)
+        self.player.bounds = self.world
+        self.enemy.bounds = self.world
+        self.enemy.respawn_area = self.camera.view
+        self.health_item_manager.spawn_area = self.camera.view
+
+        # Per-phase frame timing, toggle the overlay with F4
+        self.profiler = FrameProfiler(enabled=not headless)
+        self.tracer = None  # TraceRecorder while tracing, see start_tracing
+        self.allocations = None  # AllocationTracker in memory diagnostics mode, see start_memory_diagnostics
+        self.profiler_was_enabled = None  # profiler.enabled before tracing or memory diagnostics turned it on
 
         # Game variables
-        self.bullets = []
-        self.enemy_bullets = []
-        self.impact_effects = []
+        self.bullets = BulletArray()  # Packed bullet archetypes, see ecs.py
+        self.enemy_bullets = BulletArray()
         self.debug_mode = False
         self.running = True
 
-        # Generate initial level
-        self.obstacle_manager.generate_level(self.player)
+        # Match statistics
+        self.damage_dealt = 0
+        self.damage_taken = 0
+
+        # Generate initial level, or load a shared layout from ObstacleManager.get_layout
+        self.load_level(level)
+
+    def load_level(self, level=None):
+        tracer = self.tracer
+        if tracer:
+            tracer.begin('load_level')
+        if level is None and self.level_id is not None:
+            level = level_layout(self.level_id)
+        if level is None:
+            self.obstacle_manager.generate_level(self.player)
+        else:
+            self.obstacle_manager.load_layout(level)
+        if tracer:
+            tracer.end('load_level')
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
 
-            # Mouse click to shoot bullet
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:  # Left click
-                    mouse_pos = pygame.mouse.get_pos()
-                    self.bullets.append(self.player.shoot(mouse_pos))
+            # Player controls (mouse clicks to shoot) are handled by the input source
+            self.input_source.handle_event(event, self.camera)
 
             # Toggle debug mode with F3
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_F3:
                     self.debug_mode = not self.debug_mode
+                # Toggle the frame profiler overlay with F4
+                if event.key == pygame.K_F4:
+                    self.profiler.toggle_overlay()
                 # Reset game with R key
                 if event.key == pygame.K_r:
                     self.reset_game()
                 # Debug: Spawn health item with H key
                 if event.key == pygame.K_h and self.debug_mode:
-                    self.health_item_manager.spawn_health_item()
-
-    def reset_game(self):
-        self.obstacle_manager.generate_level(self.player)
+                    self.spawn_health_item()
+
+    def _enable_profiler(self):
+        """Turn the profiler on for diagnostics, remembering its setting when the first one starts"""
+        if self.tracer is None and self.allocations is None:
+            self.profiler_was_enabled = self.profiler.enabled
+        self.profiler.enabled = True
+
+    def _restore_profiler(self):
+        """Put the profiler setting back once no diagnostics need it"""
+        if self.tracer is None and self.allocations is None:
+            self.profiler.enabled = self.profiler_was_enabled
+
+    def start_tracing(self, tracer=None):
+        """Record frame phases and enemy AI activity into a TraceRecorder"""
+        self._enable_profiler()
+        self.tracer = tracer if tracer is not None else TraceRecorder()
+        self.profiler.tracer = self.tracer
+        self.enemy.tracer = self.tracer
+        return self.tracer
+
+    def stop_tracing(self):
+        tracer = self.tracer
+        self.tracer = None
+        self.profiler.tracer = None
+        self.enemy.tracer = None
+        if tracer is not None:
+            self._restore_profiler()
+        return tracer
+
+    def start_memory_diagnostics(self, tracker=None):
+        """Track allocations per tick and per profiler phase with tracemalloc"""
+        from allocationTracker import AllocationTracker  # Diagnostics only, keeps tracemalloc out of startup
+        self._enable_profiler()
+        self.allocations = tracker if tracker is not None else AllocationTracker()
+        self.allocations.start()
+        self.profiler.allocations = self.allocations
+        return self.allocations
+
+    def stop_memory_diagnostics(self):
+        allocations = self.allocations
+        self.allocations = None
+        self.profiler.allocations = None
+        if allocations:
+            allocations.stop()
+            self._restore_profiler()
+        return allocations
+
+    def fire(self, target_pos):
+        """Shoot a player bullet towards target_pos"""
+        self.bullets.append(self.player.shoot(target_pos))
+
+    def spawn_health_item(self):
+        if self.recorder:
+            self.recorder.record_event(EVENT_SPAWN_HEALTH)
+        self.health_item_manager.spawn_health_item()
+
+    def reset_game(self, level=None):
+        if self.recorder:
+            self.recorder.record_event(EVENT_RESET)
+        if self.tracer:
+            self.tracer.begin('reset_game')
+        self.load_level(level)
         self.player.falling_speed = 0
         self.player.is_jumping = False
         self.player.is_on_ground = False
         self.bullets.clear()
         self.enemy_bullets.clear()
-        self.impact_effects.clear()
+        self.particles.clear()
         self.health_item_manager.clear()  # Clear health items
         self.enemy.respawn()
+        if self.tracer:
+            self.tracer.end('reset_game')
+
+    def snapshot(self):
+        """Capture the whole simulation state as nested immutable tuples.
+
+        Snapshots share nothing mutable with the game, so they can be kept
+        around and restored any number of times. Rendering state (debug mode,
+        recorder, input source) is not included.
+        """
+        health_items = self.health_item_manager.health_items
+        return (
+            self.damage_dealt,
+            self.damage_taken,
+            self.streams.getstate(),
+            self.player.snapshot(),
+            self.enemy.snapshot(health_items),
+            self.bullets.snapshot(),
+            self.enemy_bullets.snapshot(),
+            self.health_item_manager.snapshot(),
+            self.obstacle_manager.snapshot(),
+            self.particles.snapshot()
+        )
+
+    def restore(self, state):
+        """Return the simulation to a state captured by snapshot()"""
+        (self.damage_dealt, self.damage_taken, rng_state, player, enemy, bullets,
+         enemy_bullets, health_items, obstacles, particles) = state
+
+        self.player.restore(player)
+        self.bullets.restore(bullets)
+        self.enemy_bullets.restore(enemy_bullets)
+        self.health_item_manager.restore(health_items)
+        self.enemy.restore(enemy, self.health_item_manager.health_items)
+        self.obstacle_manager.restore(obstacles)
+        self.particles.restore(particles)
+        self.events.clear()
+        self.camera.follow(self.player.rect)
+
+        # Rebuilding health items draws from their stream, so stream states go back last
+        self.streams.setstate(rng_state)
 
     def handle_enemy_shooting(self):
         # Check if enemy should shoot - using the combat system
@@ -87,45 +286,55 @@ class Game:
             if bullet:
                 self.enemy_bullets.append(bullet)
 
-        # Move enemy bullets and check for collisions
-        bullets_to_remove = []
-        for i, bullet in enumerate(self.enemy_bullets):
-            active, impact_pos = bullet.move(self.obstacle_manager.get_all_obstacles())
-
-            # Check for collision with player
-            if bullet.rect.colliderect(self.player.rect):
-                self.player.take_damage(5)  # Enemy bullets deal 5 damage
-                bullets_to_remove.append(i)
-                # Add player hit effect (red)
-                self.impact_effects.append(ImpactEffect(
-                    bullet.rect.centerx, bullet.rect.centery,
-                    color=(255, 0, 0), life=15, max_radius=15
-                ))
-
-            # Remove bullet if it hit something or went off-screen
-            if not active:
-                bullets_to_remove.append(i)
-                if impact_pos:
-                    # Add impact effect for obstacle hit
-                    self.impact_effects.append(ImpactEffect(
-                        impact_pos[0], impact_pos[1],
-                        color=(200, 200, 100), life=10, max_radius=10
-                    ))
-
-        # Remove bullets that hit something or went off-screen, check if list is not empty
-        if bullets_to_remove:
-            for i in sorted(bullets_to_remove, reverse=True):
-                if i < len(self.enemy_bullets):  # Check if index is valid
-                    self.enemy_bullets.pop(i)
-
-    def update(self):
-        # Update obstacles
+        # Move enemy bullets, dropping those that hit an obstacle or went off-screen
+        bullets = self.enemy_bullets
+        in_flight, impacts = bullets.move(self.obstacle_manager.get_all_obstacles(), self.world)
+        events = self.events
+        for i in impacts:
+            events.publish(BulletHit('enemy', 'obstacle', *bullets.position(i)))
+
+        # Bullets hitting the player are removed too, even on the tick they hit an obstacle
+        hits = bullets.find_hits((self.player,))
+        for hit in hits:
+            events.publish(BulletHit('enemy', hit.target.name, hit.x, hit.y))
+            if hit.target.take_damage(ENEMY_BULLET_DAMAGE):
+                self.damage_taken += ENEMY_BULLET_DAMAGE
+            in_flight[hit.bullet.index] = False
+        bullets.keep(in_flight)
+
+    def step(self, player_input=None):
+        """Advance one tick, polling the input source unless a PlayerInput is given"""
+        if self.tracer:
+            self.tracer.begin('tick')
+        if self.allocations:
+            self.allocations.begin_tick()
+        if player_input is None:
+            player_input = self.input_source.poll(self)
+        if self.recorder:
+            player_input = self.recorder.record(player_input)
+        if player_input.fire:
+            self.fire((player_input.aim_x, player_input.aim_y))
+        self.update(player_input)
+        if self.allocations:
+            self.allocations.end_tick()
+        if self.tracer:
+            self.tracer.end('tick')
+
+    def update(self, player_input):
+        profiler = self.profiler
+
+        # Update obstacles, only the chunks near the player and enemy in large worlds
+        profiler.begin('obstacles')
+        self.obstacle_manager.focus((self.player.rect, self.enemy.rect))
         self.obstacle_manager.update()
 
         # Move the player - use updated obstacles list
-        self.player.move(self.obstacle_manager.get_all_obstacles())
+        profiler.begin('player_move')
+        self.player.move(self.obstacle_manager.get_all_obstacles(), player_input)
+        self.camera.follow(self.player.rect)
 
         # Move the enemy - use updated obstacles list
+        profiler.begin('enemy_ai')
         self.enemy.move(
             self.obstacle_manager.get_all_obstacles(),
             self.player,
@@ -133,9 +342,11 @@ class Game:
         )
 
         # Handle enemy shooting
+        profiler.begin('enemy_shooting')
         self.handle_enemy_shooting()
 
         # Update health items
+        profiler.begin('health_items')
         self.health_item_manager.update(
             self.obstacle_manager.get_all_obstacles(),
             self.player,
@@ -143,70 +354,73 @@ class Game:
         )
 
         # Update bullets with new obstacle list
-        bullets_to_keep = []
-        for bullet in self.bullets:
-            keep_bullet, impact_pos = bullet.move(self.obstacle_manager.get_all_obstacles())
-
-            # Check bullet-enemy collision
-            if keep_bullet and bullet.rect.colliderect(self.enemy.rect):
-                keep_bullet = False
-                impact_pos = (bullet.rect.centerx, bullet.rect.centery)
-                self.enemy.take_damage()
-                # Add enemy hit effect (red)
-                self.impact_effects.append(ImpactEffect(
-                    impact_pos[0], impact_pos[1],
-                    color=(255, 100, 100), life=15, max_radius=12
-                ))
-
-            if keep_bullet:
-                bullets_to_keep.append(bullet)
-            elif impact_pos:
-                # Add impact effect for obstacle hit (orange)
-                self.impact_effects.append(ImpactEffect(
-                    impact_pos[0], impact_pos[1]
-                ))
-
-        self.bullets = bullets_to_keep
-
-        # Update impact effects
-        self.impact_effects = [effect for effect in self.impact_effects if effect.update()]
+        profiler.begin('bullets')
+        bullets = self.bullets
+        in_flight, impacts = bullets.move(self.obstacle_manager.get_all_obstacles(), self.world)
+        events = self.events
+        for i in impacts:
+            events.publish(BulletHit('player', 'obstacle', *bullets.position(i)))
+
+        # Bullets still in flight that hit the enemy
+        hits = bullets.find_hits((self.enemy,), in_flight)
+        for hit in hits:
+            events.publish(BulletHit('player', hit.target.name, hit.x, hit.y))
+            hit.target.take_damage(PLAYER_BULLET_DAMAGE)
+            self.damage_dealt += PLAYER_BULLET_DAMAGE
+            in_flight[hit.bullet.index] = False
+        bullets.keep(in_flight)
+
+        # Deliver this tick's events (spawning impact effects and pickup particles), then update particles
+        profiler.begin('effects')
+        self.events.dispatch()
+        self.particles.update()
+        profiler.end()
 
     def draw(self):
+        profiler = self.profiler
+        self.camera.follow(self.player.rect)
+        offset = self.camera.offset
+
         # Draw background
+        profiler.begin('draw_background')
         self.screen.fill((200, 230, 255))  # Light blue sky background
 
         # Draw obstacles
-        self.obstacle_manager.draw(self.screen)
+        profiler.begin('draw_obstacles')
+        self.obstacle_manager.draw(self.screen, offset)
 
         # Draw health items
-        self.health_item_manager.draw(self.screen)
+        profiler.begin('draw_health_items')
+        self.health_item_manager.draw(self.screen, offset)
 
         # Draw player
-        self.player.draw(self.screen)
+        profiler.begin('draw_player')
+        self.player.draw(self.screen, offset)
 
-        # Draw bullets
-        for bullet in self.bullets:
-            bullet.draw(self.screen)
+        # Draw player and enemy bullets
+        profiler.begin('draw_bullets')
+        draw_bullets(self.screen, self.bullets, self.enemy_bullets, offset=offset)
 
-        # Draw enemy bullets
-        for bullet in self.enemy_bullets:
-            bullet.draw(self.screen)
-
-        # Draw impact effects
-        for effect in self.impact_effects:
-            effect.draw(self.screen)
+        # Draw impact effects and pickup particles
+        profiler.begin('draw_effects')
+        self.particles.draw(self.screen, offset)
 
         # Draw enemy
-        self.enemy.draw(self.screen)
+        profiler.begin('draw_enemy')
+        self.enemy.draw(self.screen, offset)
 
         # Draw HUD
+        profiler.begin('draw_hud')
         self.draw_hud()
 
         # Update the display
-        pygame.display.update()
+        profiler.begin('display_update')
+        if not self.headless:
+            pygame.display.update()
+        profiler.end()
 
     def draw_hud(self):
-        font = pygame.font.SysFont(None, 30)
+        font = get_font(30)
 
         # Display enemy health
         health_text = font.render(f"Enemy Health: {self.enemy.combat.health} / {self.enemy.combat.max_health}", True, BLACK)
@@ -225,7 +439,8 @@ class Game:
             "Mouse - Aim",
             "Left Click - Shoot",
             "R - Reset Level",
-            "F3 - Debug Mode"
+            "F3 - Debug Mode",
+            "F4 - Profiler"
         ]
 
         for i, text in enumerate(controls_text):
@@ -244,12 +459,69 @@ class Game:
                 debug_text = font.render(info, True, BLACK)
                 self.screen.blit(debug_text, (10, 80 + i * 25))
 
+        # Frame profiler overlay, next to the debug text
+        self.profiler.draw_overlay(self.screen, 340, 80)
+
+    def run_threaded(self):
+        """Simulate on a worker thread while this thread handles events and draws.
+
+        After every tick the simulation publishes Game.snapshot(), which is
+        immutable, so handing it over needs no copy. The render thread restores
+        the newest snapshot into a mirror Game and draws that, so drawing
+        overlaps with the next update instead of following it.
+        """
+        lock = threading.Lock()  # Held by the simulation for a tick and by event handling
+        self.published = self.snapshot()
+
+        view = Game(headless=True, seed=self.seed, level=self.obstacle_manager.get_layout(),
+                    world_chunks=self.world_chunks)
+        view.screen = self.screen
+        # Draw phases land next to the simulation phases in one overlay, names never clash
+        view.profiler.enabled = True
+        view.profiler.samples = self.profiler.samples
+
+        def simulate():
+            clock = pygame.time.Clock()
+            try:
+                while self.running:
+                    clock.tick(60)
+                    with lock:
+                        self.step()
+                        self.published = self.snapshot()
+            finally:
+                self.running = False
+
+        worker = threading.Thread(target=simulate, name="simulation", daemon=True)
+        worker.start()
+
+        drawn = None
+        while self.running:
+            self.clock.tick(60)  # FPS
+            with lock:
+                self.handle_events()
+            state = self.published
+            if state is not drawn:
+                view.restore(state)
+                drawn = state
+            view.debug_mode = self.debug_mode
+            view.profiler.show_overlay = self.profiler.show_overlay
+            view.draw()
+            pygame.display.update()
+
+        worker.join()
+        pygame.quit()
+        sys.exit()
+
     def run(self):
         while self.running:
             self.clock.tick(60)  # FPS
+            if self.tracer:
+                self.tracer.begin('frame')
             self.handle_events()
-            self.update()
+            self.step()
             self.draw()
+            if self.tracer:
+                self.tracer.end('frame')
 
         pygame.quit()
         sys.exit()
@@ -257,5 +529,29 @@ class Game:
 
 # Start the game
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Rogue Shot")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--level-id', type=int, default=None)
+    parser.add_argument('--world-chunks', type=int, default=None,
+                        help="Play a scrolling world this many screens wide instead of the arena")
+    parser.add_argument('--record', metavar='PATH', default=None, help="Save a replay of the match to PATH")
+    parser.add_argument('--threaded', action='store_true',
+                        help="Run the simulation on its own thread, drawing on the main thread")
+    parser.add_argument('--trace', metavar='PATH', default=None,
+                        help="Save a Chrome trace (Perfetto, chrome://tracing) of the session to PATH")
+    args = parser.parse_args()
+
+    game = Game(seed=args.seed, level_id=args.level_id, record=args.record is not None,
+                world_chunks=args.world_chunks)
+    if args.trace:
+        game.start_tracing()
+    try:
+        if args.threaded:
+            game.run_threaded()
+        else:
+            game.run()
+    finally:
+        if args.record:
+            game.recorder.save(args.record)
+        if args.trace:
+            game.tracer.save(args.trace)
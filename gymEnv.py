@@ -0,0 +1,414 @@
+# gymEnv.py - Gymnasium-style environment around a headless Game, for training bots
+#
+# The agent controls the player against the built-in enemy AI. Observations
+# are written into one preallocated float32 vector, with arrays made once per
+# level and no arrays, slices or lists made per step, so writing them keeps no
+# memory (see --check-allocations). gymnasium is optional: with
+# it the env is a gymnasium.Env registered as RogueShot-v0, without it the
+# same reset/step/render API works but there are no action or observation spaces.
+import argparse
+import itertools
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+# Training workers never open a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+try:
+    import gymnasium
+    from gymnasium import spaces
+except ImportError:
+    gymnasium = None
+
+from gameClass import Game, WIDTH, HEIGHT
+from inputSource import PlayerInput
+from vectorGame import OBSERVATION_SIZE as BASE_SIZE, restart_game, write_observation
+
+MAX_EPISODE_STEPS = 60 * 60  # One minute at 60 FPS
+
+# Observation layout after vectorGame's 12 player and enemy values
+NEAREST_BULLETS = 4  # Enemy bullets closest to the player
+BULLET_FEATURES = 5  # present, dx, dy, velocity_x, velocity_y
+NEAREST_ITEMS = 2  # Health items closest to the player
+ITEM_FEATURES = 3  # present, dx, dy
+NUM_RAYS = 8  # Distance to the nearest obstacle every 45 degrees, starting to the right
+RAY_LENGTH = 400.0
+
+BULLETS_AT = BASE_SIZE
+ITEMS_AT = BULLETS_AT + NEAREST_BULLETS * BULLET_FEATURES
+RAYS_AT = ITEMS_AT + NEAREST_ITEMS * ITEM_FEATURES
+OBSERVATION_SIZE = RAYS_AT + NUM_RAYS
+
+# Actions are 6 floats: move_x, jump, fast_fall, fire, aim_dx, aim_dy. move_x
+# below -1/3 or above 1/3 moves, the buttons are pressed above 0.5 and the aim
+# is an offset from the player in screen widths and heights.
+ACTION_LOW = np.array([-1, 0, 0, 0, -1, -1], dtype=np.float32)
+ACTION_HIGH = np.array([1, 1, 1, 1, 1, 1], dtype=np.float32)
+
+
+def action_to_input(action, player):
+    """PlayerInput for an action vector, PlayerInputs are passed through"""
+    if isinstance(action, PlayerInput):
+        return action
+    if isinstance(action, np.ndarray):
+        action = action.tolist()
+    move, jump, fast_fall, fire, aim_dx, aim_dy = action
+    return PlayerInput(
+        -1 if move < -1 / 3 else 1 if move > 1 / 3 else 0,
+        jump > 0.5,
+        fast_fall > 0.5,
+        fire > 0.5,
+        player.rect.centerx + aim_dx * WIDTH,
+        player.rect.centery + aim_dy * HEIGHT
+    )
+
+
+class ObservationWriter:
+    """Writes observation vectors without making arrays, slices or lists per call.
+
+    Obstacle arrays are made once per loaded level, with the static rects
+    filled in then and only the moving platforms copied each call, and the
+    slices of `out` are made once per out buffer.
+    """
+
+    def __init__(self):
+        # Inverse ray directions, infinite for the axis-aligned components
+        angles = np.arange(NUM_RAYS) * (2 * math.pi / NUM_RAYS)
+        directions = np.round(np.array([np.cos(angles), np.sin(angles)]), 12)
+        with np.errstate(divide='ignore'):
+            self.inv_dx, self.inv_dy = 1 / directions
+        self.ray_hits = np.zeros(NUM_RAYS)
+        self.origin = np.zeros(4)  # Player center for the left, top, right and bottom edges
+        self.origin_column = self.origin[:, None, None]
+        # Constants as 0-d arrays, NumPy converts Python numbers on every ufunc call
+        self.zero = np.zeros(())
+        self.ray_length = np.array(RAY_LENGTH)
+        self.ray_scale = np.array(1 / RAY_LENGTH)
+
+        # Nearest enemy bullets so far, closest first
+        self.nearest_rows = [0] * NEAREST_BULLETS
+        self.nearest_distances = [0.0] * NEAREST_BULLETS
+
+        self.out = None
+        self.out_parts = None
+        self.level = None  # get_all_obstacles() list the obstacle arrays were made for
+
+    def write(self, game, out):
+        """Fill the OBSERVATION_SIZE row `out` for `game`"""
+        if out is not self.out:
+            self.out = out
+            self.out_parts = (out[:BASE_SIZE], out[BULLETS_AT:ITEMS_AT], out[ITEMS_AT:RAYS_AT], out[RAYS_AT:])
+        base, bullets, items, rays = self.out_parts
+        write_observation(game, base)
+        rect = game.player.rect
+        px = rect.centerx
+        py = rect.centery
+        self.write_bullets(game.enemy_bullets.archetype, px, py, bullets)
+        self.write_items(game.health_item_manager.health_items, px, py, items)
+        self.write_rays(game.obstacle_manager, px, py, rays)
+
+    def write_bullets(self, archetype, px, py, out):
+        # Only a handful of enemy bullets fly at once, a plain insertion into the
+        # nearest few beats NumPy calls and reads only Python floats
+        columns = archetype.columns
+        x = columns['x']
+        y = columns['y']
+        n = archetype.count
+        rows = self.nearest_rows
+        distances = self.nearest_distances
+        found = 0
+        i = 0
+        while i < n:
+            dx = x.item(i) - px
+            dy = y.item(i) - py
+            distance = dx * dx + dy * dy
+            if found < NEAREST_BULLETS:
+                k = found
+                found += 1
+            elif distance < distances[found - 1]:
+                k = found - 1
+            else:
+                i += 1
+                continue
+            # Ties keep spawn order, as the earlier bullet is already in place
+            while k and distances[k - 1] > distance:
+                distances[k] = distances[k - 1]
+                rows[k] = rows[k - 1]
+                k -= 1
+            distances[k] = distance
+            rows[k] = i
+            i += 1
+
+        out.fill(0)
+        velocity_x = columns['velocity_x']
+        velocity_y = columns['velocity_y']
+        k = 0
+        while k < found:
+            i = rows[k]
+            at = k * BULLET_FEATURES
+            out[at] = 1.0
+            out[at + 1] = (x.item(i) - px) / WIDTH
+            out[at + 2] = (y.item(i) - py) / HEIGHT
+            out[at + 3] = velocity_x.item(i) / 15.0
+            out[at + 4] = velocity_y.item(i) / 15.0
+            k += 1
+
+    def write_items(self, health_items, px, py, out):
+        # Only a couple of items exist at a time, plain Python is fastest here.
+        # Index loops, as iterating makes an iterator object per call.
+        first = second = None
+        first_distance = second_distance = math.inf
+        i = 0
+        while i < len(health_items):
+            item = health_items[i]
+            i += 1
+            if not item.active:
+                continue
+            distance = (item.rect.centerx - px) ** 2 + (item.rect.centery - py) ** 2
+            if distance < first_distance:
+                second, second_distance = first, first_distance
+                first, first_distance = item, distance
+            elif distance < second_distance:
+                second, second_distance = item, distance
+
+        out.fill(0)
+        if first is not None:
+            out[0] = 1.0
+            out[1] = (first.rect.centerx - px) / WIDTH
+            out[2] = (first.rect.centery - py) / HEIGHT
+        if second is not None:
+            out[ITEM_FEATURES] = 1.0
+            out[ITEM_FEATURES + 1] = (second.rect.centerx - px) / WIDTH
+            out[ITEM_FEATURES + 2] = (second.rect.centery - py) / HEIGHT
+
+    def _load_level(self, obstacle_manager, obstacles):
+        """Make the obstacle arrays for a new obstacle list and fill in its rects"""
+        m = len(obstacles)
+        self.level = obstacles
+        self.moving_at = list(obstacle_manager.get_moving_indices())
+        self.moving_rects = [obstacles[i] for i in self.moving_at]
+        if m == 0:
+            return
+        # Absolute left, top, right and bottom rows, used as columns against the rays
+        self.level_edges = np.array([[rect.left, rect.top, rect.right, rect.bottom] for rect in obstacles],
+                                    dtype=np.float64).T.copy()
+        self.level_left, self.level_top, self.level_right, self.level_bottom = self.level_edges
+        self.level_columns = self.level_edges[:, :, None]
+        self.edges = np.zeros((4, m, 1))  # Relative to the player
+        self.left, self.top, self.right, self.bottom = self.edges
+        self.slabs = tuple(np.zeros((m, NUM_RAYS)) for _ in range(5))
+        self.hits = tuple(np.zeros((m, NUM_RAYS), dtype=np.bool_) for _ in range(2))
+
+    def write_rays(self, obstacle_manager, px, py, out):
+        """Distance along each ray to the first obstacle, as a fraction of RAY_LENGTH"""
+        obstacles = obstacle_manager.get_all_obstacles()
+        if obstacles is not self.level:
+            self._load_level(obstacle_manager, obstacles)
+        if not obstacles:
+            out.fill(1.0)
+            return
+
+        # Moving platforms move their rects in place, copy just those
+        moving_rects = self.moving_rects
+        moving_at = self.moving_at
+        j = 0
+        while j < len(moving_rects):
+            rect = moving_rects[j]
+            i = moving_at[j]
+            self.level_left[i] = rect.left
+            self.level_top[i] = rect.top
+            self.level_right[i] = rect.right
+            self.level_bottom[i] = rect.bottom
+            j += 1
+
+        # Rects cover the pixels up to right - 1 and bottom - 1, as in Rect.clipline. Their
+        # edges lie halfway between pixels, so an edge is never exactly at the (integer)
+        # player center and infinite inverse directions can't produce NaNs.
+        origin = self.origin
+        origin[0] = origin[2] = px + 0.5
+        origin[1] = origin[3] = py + 0.5
+        np.subtract(self.level_columns, self.origin_column, out=self.edges)
+
+        # Slab test: each ray is inside an obstacle between entering both its
+        # x and y ranges and leaving either of them
+        x1, x2, y1, y2, entry = self.slabs
+        np.multiply(self.left, self.inv_dx, out=x1)
+        np.multiply(self.right, self.inv_dx, out=x2)
+        np.multiply(self.top, self.inv_dy, out=y1)
+        np.multiply(self.bottom, self.inv_dy, out=y2)
+        np.minimum(x1, x2, out=entry)
+        np.maximum(x1, x2, out=x2)
+        np.minimum(y1, y2, out=x1)
+        np.maximum(y1, y2, out=y2)
+        np.maximum(entry, x1, out=entry)
+        leave = np.minimum(x2, y2, out=x2)
+
+        # Rays that never enter (or only behind the player) see nothing, rays starting inside see 0
+        hit, miss = self.hits
+        np.less_equal(entry, leave, out=hit)
+        hit &= np.greater_equal(leave, self.zero, out=miss)
+        np.logical_not(hit, out=miss)
+        np.maximum(entry, self.zero, out=entry)
+        np.copyto(entry, self.ray_length, where=miss)
+
+        nearest = np.min(entry, axis=0, out=self.ray_hits)
+        np.minimum(nearest, self.ray_length, out=nearest)
+        np.multiply(nearest, self.ray_scale, out=out)
+
+
+class RogueShotEnv(gymnasium.Env if gymnasium else object):
+    """The player as an agent against the built-in enemy AI, one game tick per step.
+
+    Rewards are damage dealt minus damage taken during the step. An episode
+    terminates when the player or the enemy dies and is truncated after
+    max_episode_steps. The observation array (and the rgb_array frame) are
+    reused between steps, copy them to keep them.
+
+    reset(seed) starts a new game from that seed, reset() without a seed
+    returns the current game to how it started, continuing its random streams.
+    """
+    metadata = {'render_modes': ['rgb_array'], 'render_fps': 60}
+
+    def __init__(self, render_mode=None, level_id=None, max_episode_steps=MAX_EPISODE_STEPS, render_scale=4):
+        if render_mode not in (None, 'rgb_array'):
+            raise ValueError(f"Unsupported render mode: {render_mode}")
+        self.render_mode = render_mode
+        self.level_id = level_id  # Shared level layout, each game makes its own from the seed if None
+        self.max_episode_steps = max_episode_steps
+        self.render_scale = render_scale
+
+        self.game = None
+        self.initial_state = None  # Snapshot of the game when it was made, see reset
+        self.writer = ObservationWriter()
+        self.observation = np.zeros(OBSERVATION_SIZE, dtype=np.float32)
+        self.info = {'damage_dealt': 0, 'damage_taken': 0, 'steps': 0}
+        self.score = 0
+        self.steps = 0
+        self.deaths = (0, 0)  # Player and enemy deaths when the episode started
+
+        # Low resolution frame for rgb_array rendering, made on first render
+        self.frame_surface = None
+        self.frame = None
+
+        if gymnasium is not None:
+            self.action_space = spaces.Box(ACTION_LOW, ACTION_HIGH, dtype=np.float32)
+            self.observation_space = spaces.Box(-np.inf, np.inf, (OBSERVATION_SIZE,), dtype=np.float32)
+
+    def reset(self, seed=None, options=None):
+        if gymnasium is not None:
+            super().reset(seed=seed)
+        if seed is not None or self.game is None:
+            self.game = Game(headless=True, seed=seed, level_id=self.level_id)
+            self.initial_state = self.game.snapshot()
+        else:
+            restart_game(self.game, self.initial_state)
+        game = self.game
+        self.score = 0
+        self.steps = 0
+        self.deaths = (game.player.deaths, game.enemy.combat.deaths)
+        self.writer.write(game, self.observation)
+        self._update_info()
+        return self.observation, self.info
+
+    def step(self, action):
+        game = self.game
+        game.step(action_to_input(action, game.player))
+        self.steps += 1
+
+        score = game.damage_dealt - game.damage_taken
+        reward = float(score - self.score)
+        self.score = score
+        terminated = (game.player.deaths, game.enemy.combat.deaths) != self.deaths
+        truncated = not terminated and self.steps >= self.max_episode_steps
+
+        self.writer.write(game, self.observation)
+        self._update_info()
+        return self.observation, reward, terminated, truncated, self.info
+
+    def _update_info(self):
+        info = self.info
+        info['damage_dealt'] = self.game.damage_dealt
+        info['damage_taken'] = self.game.damage_taken
+        info['steps'] = self.steps
+
+    def render(self):
+        """Screen scaled down by render_scale as an (height, width, 3) uint8 array, in rgb_array mode"""
+        if self.render_mode != 'rgb_array':
+            return None
+        game = self.game
+        game.draw()
+        if self.frame_surface is None:
+            size = (WIDTH // self.render_scale, HEIGHT // self.render_scale)
+            self.frame_surface = pygame.Surface(size)
+            self.frame = np.zeros((size[0], size[1], 3), dtype=np.uint8)
+        pygame.transform.smoothscale(game.screen, self.frame_surface.get_size(), self.frame_surface)
+        pygame.pixelcopy.surface_to_array(self.frame, self.frame_surface)
+        return self.frame.transpose(1, 0, 2)
+
+    def close(self):
+        self.game = None
+
+
+if gymnasium is not None and 'RogueShot-v0' not in gymnasium.registry:
+    gymnasium.register(id='RogueShot-v0', entry_point='gymEnv:RogueShotEnv')
+
+
+def observation_allocations(env, writes=100):
+    """Bytes retained and peak bytes of `writes` observation writes of the env's current state.
+
+    A first write makes the arrays for the level outside the measurement.
+    """
+    writer, game, out = env.writer, env.game, env.observation
+    writer.write(game, out)
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    for _ in itertools.repeat(None, writes):  # repeat, a range would leave its last int alive
+        writer.write(game, out)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size - start, peak - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure environment steps per second with random actions")
+    parser.add_argument('--steps', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check-allocations', action='store_true',
+                        help="Instead of timing, check every 100 steps that writing observations keeps no memory")
+    args = parser.parse_args(argv)
+
+    env = RogueShotEnv()
+    env.reset(seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    actions = rng.uniform(ACTION_LOW, ACTION_HIGH, (1024, len(ACTION_LOW))).astype(np.float32)
+    episodes = 0
+    retained = peak = checks = 0
+    start = time.perf_counter()
+    for step in range(args.steps):
+        _, _, terminated, truncated, _ = env.step(actions[step % len(actions)])
+        if terminated or truncated:
+            episodes += 1
+            env.reset()
+        if args.check_allocations and step % 100 == 0:
+            step_retained, step_peak = observation_allocations(env)
+            retained = max(retained, step_retained)
+            peak = max(peak, step_peak)
+            checks += 1
+    seconds = time.perf_counter() - start
+
+    if args.check_allocations:
+        # NumPy's ufuncs make short-lived internal buffers, so only retained memory has to be 0
+        print(f"{checks} checks, observation writes retained at most {retained} B, peak {peak} B")
+        sys.exit(1 if retained else 0)
+    print(f"{args.steps} steps in {seconds:.2f} s, {args.steps / seconds:.0f} steps/s, {episodes} episodes")
+
+
+if __name__ == "__main__":
+    main()
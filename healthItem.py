@@ -2,16 +2,83 @@ import math
 import pygame
 import random
 
+from assets import sprite_surface
+from events import ItemCollected, ItemExpired
+
+# Pre-rendered heart pulse frames keyed by (color, pulse size), see heart_frame
+_heart_frames = {}
+HEART_PAD = 2  # Room for the outline around the heart's corner points
+HEART_ORIGIN = (20 + HEART_PAD, 10 + HEART_PAD)  # Item center inside a frame
+HEART_MARGIN = 40  # Frames never reach further than this past an item's rect
+
+
+def heart_frame(color, pulse_size):
+    """Heart with outline for one pulse size, blit at the item center minus HEART_ORIGIN"""
+    key = (color, pulse_size)
+    frame = _heart_frames.get(key)
+    if frame is None:
+        ox, oy = HEART_ORIGIN
+        frame = sprite_surface(2 * ox + 1, 35 + 2 * HEART_PAD + 1)
+        points = [
+            (ox, oy - 5 - pulse_size),  # Top point
+            (ox + 15 + pulse_size, oy + 10),  # Bottom right
+            (ox, oy + 20 + pulse_size),  # Bottom center
+            (ox - 15 - pulse_size, oy + 10),  # Bottom left
+        ]
+        pygame.draw.polygon(frame, color, points)
+        # Outline for better visibility
+        pygame.draw.polygon(frame, (150, 0, 0), points, 2)
+        _heart_frames[key] = frame
+    return frame
+
+
+class ActiveItemRegistry:
+    """Set of currently active health items owned by one HealthItemManager.
+
+    Backed by a dict so insert, remove and membership are O(1) while
+    iteration keeps spawn order.
+    """
+
+    def __init__(self, max_items=2):
+        self.max_items = max_items
+        self.items = {}
+
+    def has_space(self):
+        return len(self.items) < self.max_items
+
+    def add(self, item):
+        """Register an item, returns False if the registry is already full"""
+        if not self.has_space():
+            return False
+        self.items[item] = None
+        return True
+
+    def remove(self, item):
+        self.items.pop(item, None)
+
+    def clear(self):
+        self.items.clear()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def __iter__(self):
+        return iter(self.items)
+
 
 class HealthItem:
-    # A class variable to track the current number of health items
+    # Default number of items that may be active at once
     max_items = 2
-    active_items = []
 
-    def __init__(self, x=None, y=None, width=30, height=30):
+    def __init__(self, x=None, y=None, width=30, height=30, events=None, registry=None, rng=None):
+        self.rng = rng if rng is not None else random
+
         # If position is not specified, generate random x position
         if x is None:
-            self.x = random.randint(50, 950)  # Keeping away from edges
+            self.x = self.rng.randint(50, 950)  # Keeping away from edges
         else:
             self.x = x
 
@@ -26,7 +93,7 @@ class HealthItem:
         self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
 
         # Movement properties
-        self.falling_speed = random.uniform(2, 4)
+        self.falling_speed = self.rng.uniform(2, 4)
         self.wobble_speed = 0  # Disable wobble
         self.wobble_amount = 0  # Disable wobble
         self.initial_x = self.x
@@ -35,7 +102,7 @@ class HealthItem:
         self.lifetime=7*60
 
         # Health restoration amount
-        self.health_amount = random.randint(10, 25)
+        self.health_amount = self.rng.randint(10, 25)
 
         # Appearance properties
         self.color = (255, 50, 50)  # Red for health
@@ -43,14 +110,40 @@ class HealthItem:
         self.pulse_time = 0
         self.active = True
 
-        # Particle effect for collection
-        self.particles = []
-
-        # Add the item to the active items list if there's space
-        if len(HealthItem.active_items) < HealthItem.max_items:
-            HealthItem.active_items.append(self)
-        else:
-            self.active = False  # Deactivate if there are already 2 active items
+        # EventBus told about collection and expiry
+        self.events = events
+
+        # Register with the owning manager's active items if there's space
+        if registry is None:
+            registry = ActiveItemRegistry(HealthItem.max_items)
+        self.registry = registry
+        if not self.registry.add(self):
+            self.active = False  # Deactivate if there are already max_items active items
+
+    def deactivate(self):
+        """Mark the item inactive and drop it from the active registry"""
+        self.active = False
+        self.registry.remove(self)
+
+    def snapshot(self):
+        """Simulation state as an immutable tuple, see Game.snapshot"""
+        return (self.x, self.y, self.width, self.height, self.rect.x, self.rect.y,
+                self.falling_speed, self.initial_x, self.time, self.lifetime,
+                self.health_amount, self.pulse_time, self.active)
+
+    @classmethod
+    def from_snapshot(cls, state, events, registry, rng):
+        """Rebuild an item from HealthItem.snapshot.
+
+        The constructor still draws from rng, callers restore the rng state afterwards.
+        """
+        item = cls(state[0], state[1], state[2], state[3], events, registry, rng)
+        (item.x, item.y, item.width, item.height, item.rect.x, item.rect.y,
+         item.falling_speed, item.initial_x, item.time, item.lifetime,
+         item.health_amount, item.pulse_time, active) = state
+        if not active:
+            item.deactivate()
+        return item
 
     def update(self, obstacles):
         if not self.active:
@@ -59,9 +152,7 @@ class HealthItem:
 
         self.lifetime -= 1
         if self.lifetime <= 0:
-            self.active = False
-            if self in HealthItem.active_items:
-                HealthItem.active_items.remove(self)
+            self.expire('timeout')
             return False
 
 
@@ -86,8 +177,7 @@ class HealthItem:
 
         # Check if item has fallen off the bottom of the screen
         if self.y > 650:  # Greater than screen height + margin
-            self.active = False
-            HealthItem.active_items.remove(self)
+            self.expire('fell')
             return False
 
         # Update pulse animation
@@ -95,104 +185,29 @@ class HealthItem:
 
         return True
 
+    def expire(self, reason):
+        self.deactivate()
+        if self.events is not None:
+            self.events.publish(ItemExpired(reason, self.rect.centerx, self.rect.centery))
+
     def collect(self, entity):
-        """Apply health effect to the entity that collected the item"""
-        if not self.active:
+        """Heal the entity (Player or Enemy) that touched the item, returns True if the item was used"""
+        if not self.active or not entity.heal(self.health_amount):
             return False
+        self.deactivate()
+        entity.items_collected += 1
+        if self.events is not None:
+            self.events.publish(ItemCollected(entity.name, self.health_amount, self.rect.centerx, self.rect.centery))
+        return True
 
-        # Check if entity is Enemy (has combat attribute) or Player (has direct health attribute)
-        if hasattr(entity, 'combat'):
-            # Entity is Enemy
-            if entity.combat.health < entity.combat.max_health:
-                entity.combat.health = min(entity.combat.health + self.health_amount, entity.combat.max_health)
-                self.active = False
-                HealthItem.active_items.remove(self)
-
-                # Create particles for effect
-                for _ in range(15):
-                    angle = random.uniform(0, 6.28)  # 0 to 2π
-                    speed = random.uniform(1, 3)
-                    self.particles.append({
-                        'x': self.rect.centerx,
-                        'y': self.rect.centery,
-                        'dx': speed * math.cos(angle),
-                        'dy': speed * math.sin(angle),
-                        'life': random.randint(10, 20),
-                        'size': random.randint(2, 6)
-                    })
-
-                return True
-        else:
-            # Entity is Player or other entity with direct health attribute
-            if entity.health < entity.max_health:
-                entity.health = min(entity.health + self.health_amount, entity.max_health)
-                self.active = False
-                HealthItem.active_items.remove(self)
-
-                # Create particles for effect
-                for _ in range(15):
-                    angle = random.uniform(0, 6.28)  # 0 to 2π
-                    speed = random.uniform(1, 3)
-                    self.particles.append({
-                        'x': self.rect.centerx,
-                        'y': self.rect.centery,
-                        'dx': speed * math.cos(angle),
-                        'dy': speed * math.sin(angle),
-                        'life': random.randint(10, 20),
-                        'size': random.randint(2, 6)
-                    })
-
-                return True
-        return False
-
-    def update_particles(self):
-        """Update collection particle effect"""
-        if self.active:
-            return
-
-        for particle in self.particles[:]:
-            particle['x'] += particle['dx']
-            particle['y'] += particle['dy']
-            particle['life'] -= 1
-
-            if particle['life'] <= 0:
-                self.particles.remove(particle)
-
-        # Return True if we still have particles to animate
-        return len(self.particles) > 0
+    def sprite(self, offset=(0, 0)):
+        """(surface, screen position) of the current pulse frame, for Surface.blits"""
+        # Pulsing size effect, one of six pre-rendered frames
+        pulse_size = int(5 * abs(math.sin(self.pulse_time)))
+        ox, oy = HEART_ORIGIN
+        return (heart_frame(self.color, pulse_size),
+                (self.rect.centerx - ox - offset[0], self.rect.centery - oy - offset[1]))
 
-    def draw(self, screen):
+    def draw(self, screen, offset=(0, 0)):
         if self.active:
-            # Calculate pulsing size effect
-            pulse = abs(math.sin(self.pulse_time))
-            pulse_size = int(5 * pulse)
-
-            # Draw health item (heart shape)
-            center_x = self.rect.centerx
-            center_y = self.rect.centery
-
-            # Draw a heart shape
-            heart_color = self.color
-
-            # Draw the heart shape (simplified)
-            points = [
-                (center_x, center_y - 5 - pulse_size),  # Top point
-                (center_x + 15 + pulse_size, center_y + 10),  # Bottom right
-                (center_x, center_y + 20 + pulse_size),  # Bottom center
-                (center_x - 15 - pulse_size, center_y + 10),  # Bottom left
-            ]
-
-            # Draw filled heart
-            pygame.draw.polygon(screen, heart_color, points)
-
-            # Draw heart outline for better visibility
-            pygame.draw.polygon(screen, (150, 0, 0), points, 2)
-        else:
-            # Draw particles
-            for particle in self.particles:
-                pygame.draw.circle(
-                    screen,
-                    (255, 100, 100),
-                    (int(particle['x']), int(particle['y'])),
-                    particle['size']
-                )
\ No newline at end of file
+            screen.blit(*self.sprite(offset))
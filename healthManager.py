@@ -1,17 +1,22 @@
 import random
 import pygame
-from healthItem import HealthItem
+from camera import arena_bounds
+from healthItem import HEART_MARGIN, ActiveItemRegistry, HealthItem
 
 
 class HealthItemManager:
-    def __init__(self):
+    def __init__(self, events=None, rng=None):
+        self.rng = rng if rng is not None else random
         self.health_items = []
+        self.events = events  # EventBus for pickups and expiry, passed on to every item
+        self.active_items = ActiveItemRegistry(HealthItem.max_items)  # Active pickups of this manager only
         self.spawn_timer = 0
         self.spawn_interval = 600  # 10 seconds at 60 FPS (10 * 60 = 600)
+        self.spawn_area = arena_bounds()  # Items drop in from above this area, games may pass the camera view
 
     def update(self, obstacles, player, enemy):
         # Only increment spawn timer if we're below the max number of active items
-        if len(HealthItem.active_items) < HealthItem.max_items:
+        if self.active_items.has_space():
             self.spawn_timer += 1
 
         # Update existing health items
@@ -26,7 +31,7 @@ class HealthItemManager:
             # Check if the item just disappeared and we need a new one
             if was_active and not is_active:
                 # If below max items, set timer to spawn soon
-                if len(HealthItem.active_items) < HealthItem.max_items:
+                if self.active_items.has_space():
                     self.spawn_timer = max(self.spawn_timer, self.spawn_interval - 180)  # At most 3 seconds
 
             # Check for collection by player
@@ -41,34 +46,49 @@ class HealthItemManager:
                     # Item was collected - no need to adjust timer here
                     pass
 
-            # Keep item if active or has particles
-            if not item.active:
-                has_particles = item.update_particles()
-                if has_particles:
-                    items_to_keep.append(item)
-            elif is_active:
+            # Keep item only while active
+            if item.active:
                 items_to_keep.append(item)
 
         self.health_items = items_to_keep
 
         # Spawn new health item if timer reaches interval and below max items
-        if self.spawn_timer >= self.spawn_interval and len(HealthItem.active_items) < HealthItem.max_items:
+        if self.spawn_timer >= self.spawn_interval and self.active_items.has_space():
             self.spawn_health_item()
             # Reset timer
             self.spawn_timer = 0
 
     def spawn_health_item(self):
         """Create a new health item at a random position"""
-        x = random.randint(50, 950)  # Random position across the screen
-        new_item = HealthItem(x, -50)  # Start above the screen
+        x = self.rng.randint(self.spawn_area.left + 50, self.spawn_area.right - 50)  # Random position across the area
+        new_item = HealthItem(x, -50,  # Start above the screen
+                              events=self.events, registry=self.active_items, rng=self.rng)
         self.health_items.append(new_item)
 
-    def draw(self, screen):
-        """Draw all active health items"""
-        for item in self.health_items:
-            item.draw(screen)
+    def snapshot(self):
+        return self.spawn_timer, tuple(item.snapshot() for item in self.health_items)
+
+    def restore(self, state):
+        self.spawn_timer, items = state
+        self.active_items.clear()
+        self.health_items = [
+            HealthItem.from_snapshot(item, self.events, self.active_items, self.rng)
+            for item in items
+        ]
+
+    def draw(self, screen, offset=(0, 0)):
+        """Draw the active health items on screen with a single blits call"""
+        # Heart frames reach up to HEART_MARGIN past the item rect
+        view = screen.get_rect(topleft=offset).inflate(2 * HEART_MARGIN, 2 * HEART_MARGIN)
+        screen.blits([
+            item.sprite(offset) for item in self.health_items
+            if item.active and item.rect.colliderect(view)
+        ], doreturn=False)
 
     def clear(self):
         """Clear all health items"""
+        for item in self.health_items:
+            item.deactivate()
         self.health_items.clear()
+        self.active_items.clear()
         self.spawn_timer = 0
\ No newline at end of file
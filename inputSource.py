@@ -0,0 +1,123 @@
+# inputSource.py - Per-tick player input and the sources that produce it
+from collections import deque, namedtuple
+
+import pygame
+
+# Everything the player can do in one tick. move_x is -1, 0 or 1 and the aim
+# point, in world coordinates, is only used when fire is set.
+PlayerInput = namedtuple('PlayerInput', ['move_x', 'jump', 'fast_fall', 'fire', 'aim_x', 'aim_y'])
+
+NO_INPUT = PlayerInput(0, False, False, False, 0, 0)
+
+# Clicks arriving while this many wait to be fired are ignored, so a burst can't keep shooting for long
+MAX_QUEUED_CLICKS = 8
+
+
+class InputSource:
+    """Base class for anything that drives the player, produces one PlayerInput per tick"""
+
+    def handle_event(self, event, camera):
+        """Receive a pygame event from Game.handle_events (only called for windowed games).
+
+        `camera` is the view the player saw the event in, for turning screen positions into world ones.
+        """
+        pass
+
+    def poll(self, game):
+        """Return the PlayerInput for the coming tick"""
+        return NO_INPUT
+
+
+class KeyboardMouseInput(InputSource):
+    """Live keyboard and mouse of a windowed game.
+
+    A PlayerInput fires at most one shot, so clicks are queued and every
+    tick fires the oldest one, several clicks within a tick fire on the
+    ticks that follow.
+    """
+
+    def __init__(self):
+        self.clicks = deque()  # World positions of clicks not fired yet
+        self.fire_pos = (0, 0)
+
+    def handle_event(self, event, camera):
+        # Clicks arrive as events between ticks, queue them until the next polls. They
+        # aim where the player clicked, converted now as the camera may move before they fire.
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:  # Left click
+            if len(self.clicks) < MAX_QUEUED_CLICKS:
+                self.clicks.append(camera.to_world(event.pos))
+
+    def poll(self, game):
+        keys = pygame.key.get_pressed()
+
+        move_x = 0
+        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
+            move_x = -1
+        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
+            move_x = 1
+
+        fire = bool(self.clicks)
+        if fire:
+            self.fire_pos = self.clicks.popleft()
+        return PlayerInput(
+            move_x,
+            bool(keys[pygame.K_w] or keys[pygame.K_SPACE]),
+            bool(keys[pygame.K_s] or keys[pygame.K_DOWN]),
+            fire,
+            *self.fire_pos
+        )
+
+
+class BufferedInput(InputSource):
+    """Inputs pushed from elsewhere (network, replay files, tests), one consumed per tick.
+
+    When the buffer runs dry the last input is repeated, except that a shot
+    is never fired twice.
+    """
+
+    def __init__(self, inputs=()):
+        self.buffer = deque(inputs)
+        self.last = NO_INPUT
+
+    def push(self, player_input):
+        self.buffer.append(player_input)
+
+    def poll(self, game):
+        if self.buffer:
+            self.last = self.buffer.popleft()
+            return self.last
+        if self.last.fire:
+            self.last = self.last._replace(fire=False)
+        return self.last
+
+
+class ScriptedBotInput(InputSource):
+    """Scripted player that keeps its distance from the enemy and shoots on a fixed cadence"""
+
+    def __init__(self, rng, fire_interval=20, preferred_range=250):
+        self.rng = rng
+        self.fire_interval = fire_interval
+        self.preferred_range = preferred_range
+        self.fire_timer = 0
+
+    def poll(self, game):
+        player = game.player
+        enemy = game.enemy
+
+        # Close in when far away, back off when too close
+        dx = enemy.rect.centerx - player.rect.centerx
+        move_x = 0
+        if abs(dx) > self.preferred_range:
+            move_x = 1 if dx > 0 else -1
+        elif abs(dx) < self.preferred_range // 2:
+            move_x = -1 if dx > 0 else 1
+
+        # Jump towards enemies above us, plus the occasional random hop
+        jump = enemy.rect.bottom < player.rect.top or self.rng.random() < 0.02
+
+        self.fire_timer -= 1
+        fire = self.fire_timer <= 0
+        if fire:
+            self.fire_timer = self.fire_interval
+
+        return PlayerInput(move_x, jump, False, fire, enemy.rect.centerx, enemy.rect.centery)
@@ -0,0 +1,118 @@
+# matchFarm.py - Runs seeded headless matches across a process pool for balance sweeps
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+
+# Workers never open a window or play audio, and stdout is reserved for results
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from gameClass import Game
+from inputSource import ScriptedBotInput
+
+MAX_TICKS = 60 * 60 * 3  # Three minutes at 60 FPS before a match is called a draw
+
+# EnemyCombat fields a sweep may override
+COMBAT_PARAMS = ('attack_range', 'shoot_cooldown_max', 'flee_health_threshold',
+                 'bullet_speed', 'max_health')
+
+
+def apply_combat_params(combat, params):
+    """Override EnemyCombat fields from a sweep parameter dict"""
+    for name, value in (params or {}).items():
+        if name not in COMBAT_PARAMS:
+            raise ValueError(f"Unknown combat parameter: {name}")
+        setattr(combat, name, value)
+    combat.health = combat.max_health
+
+
+def run_match(seed, params=None, max_ticks=MAX_TICKS):
+    """Play one headless match until the first kill or max_ticks and return its result"""
+    game = Game(headless=True, seed=seed)
+    game.input_source = ScriptedBotInput(game.streams.stream('bot'))
+    apply_combat_params(game.enemy.combat, params)
+
+    winner = 'draw'
+    time_to_kill = None
+    tick = 0
+    while tick < max_ticks:
+        tick += 1
+        game.step()
+
+        if game.enemy.combat.deaths:
+            winner = 'player'
+        elif game.player.deaths:
+            winner = 'enemy'
+        else:
+            continue
+        time_to_kill = tick
+        break
+
+    return {
+        'seed': seed,
+        'params': params or {},
+        'winner': winner,
+        'ticks': tick,
+        'time_to_kill': time_to_kill,
+        'damage_dealt': game.damage_dealt,
+        'damage_taken': game.damage_taken,
+        'player_items_collected': game.player.items_collected,
+        'enemy_items_collected': game.enemy.items_collected,
+    }
+
+
+def _run_job(job):
+    seed, params, max_ticks = job
+    return run_match(seed, params, max_ticks)
+
+
+def sweep_jobs(param_grid, seeds, max_ticks=MAX_TICKS):
+    """Build (seed, params, max_ticks) jobs for every combination in param_grid and every seed.
+
+    param_grid maps an EnemyCombat field to the list of values to try.
+    """
+    names = sorted(param_grid)
+    for values in itertools.product(*(param_grid[name] for name in names)):
+        params = dict(zip(names, values))
+        for seed in seeds:
+            yield seed, params, max_ticks
+
+
+def run_matches(jobs, processes=None, chunksize=4):
+    """Run jobs on a process pool and yield each result as soon as it finishes"""
+    with multiprocessing.Pool(processes) as pool:
+        for result in pool.imap_unordered(_run_job, jobs, chunksize):
+            yield result
+
+
+def parse_param(text):
+    """Parse 'name=v1,v2,...' into (name, [values])"""
+    name, _, values = text.partition('=')
+    return name, [json.loads(value) for value in values.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run seeded headless matches on a process pool")
+    parser.add_argument('--matches', type=int, default=100, help="Seeds per parameter combination")
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None, help="Worker count (default: all cores)")
+    parser.add_argument('--max-ticks', type=int, default=MAX_TICKS)
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=V1,V2',
+                        help="EnemyCombat field to sweep, may be given several times")
+    args = parser.parse_args(argv)
+
+    param_grid = dict(parse_param(text) for text in args.param)
+    seeds = range(args.first_seed, args.first_seed + args.matches)
+
+    # One JSON line per finished match
+    for result in run_matches(sweep_jobs(param_grid, seeds, args.max_ticks), args.processes):
+        sys.stdout.write(json.dumps(result) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,8 @@ import math
 
 
 class MovingObstacle:
-    def __init__(self, x, y, width, height, move_type='horizontal', speed=1, amplitude=50):
+    def __init__(self, x, y, width, height, move_type='horizontal', speed=1, amplitude=50,
+                 phase=None, color_index=None, rng=random):
         self.rect = pygame.Rect(x, y, width, height)
         self.original_x = x
         self.original_y = y
@@ -13,9 +14,15 @@ class MovingObstacle:
         self.move_type = move_type  # 'horizontal', 'vertical', or 'circular'
         self.speed = speed
         self.amplitude = amplitude
-        self.time = random.uniform(0, math.pi * 2)  # Random starting phase
         self.platform_colors = [(120, 60, 20), (110, 55, 15), (130, 65, 25), (100, 50, 10)]
-        self.color_index = random.randint(0, len(self.platform_colors) - 1)
+        # Random starting phase and color unless restored from a saved layout
+        if phase is None:
+            phase = rng.uniform(0, math.pi * 2)
+        if color_index is None:
+            color_index = rng.randint(0, len(self.platform_colors) - 1)
+        self.time = phase
+        self.initial_time = phase
+        self.color_index = color_index
         self.prev_x = x
         self.prev_y = y
 
@@ -40,18 +47,25 @@ class MovingObstacle:
             self.rect.x = self.original_x + math.cos(self.time) * self.amplitude
             self.rect.y = self.original_y + math.sin(self.time) * self.amplitude
 
+    def snapshot(self):
+        return self.rect.x, self.rect.y, self.time, self.prev_x, self.prev_y
+
+    def restore(self, state):
+        self.rect.x, self.rect.y, self.time, self.prev_x, self.prev_y = state
+
     def get_movement(self):
         """Return how much this obstacle moved in the last frame"""
         dx = self.rect.x - self.prev_x
         dy = self.rect.y - self.prev_y
         return dx, dy
 
-    def draw(self, screen):
+    def draw(self, screen, offset=(0, 0)):
         # Choose a slightly different brown for each platform for variety
         color = self.platform_colors[self.color_index]
-        pygame.draw.rect(screen, color, self.rect)
+        rect = self.rect.move(-offset[0], -offset[1])
+        pygame.draw.rect(screen, color, rect)
 
         # Add a highlight on top
         pygame.draw.line(screen, (color[0] + 20, color[1] + 20, color[2] + 20),
-                         (self.rect.left, self.rect.top),
-                         (self.rect.right, self.rect.top), 2)
\ No newline at end of file
+                         (rect.left, rect.top),
+                         (rect.right, rect.top), 2)
\ No newline at end of file
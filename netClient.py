@@ -0,0 +1,247 @@
+# netClient.py - Client of a netServer.py arena
+#
+# Sends the local player's inputs to the server and rebuilds the arena from
+# the snapshots it sends back, see netProtocol.py. Only the local player is
+# simulated on the client, ahead of the server (see netPrediction.py), apply()
+# writes the client's view into a mirror Game that is only ever drawn.
+import argparse
+import socket
+from collections import deque
+
+from healthItem import HealthItem
+from netPrediction import INTERPOLATION_DELAY, Interpolator, PlayerPredictor, lerp_fields
+from netProtocol import (
+    DEFAULT_PORT, ENEMY_STATES, FIELD_INDEX, FIELDS, HISTORY_TICKS, MSG_DISCONNECT, MSG_SNAPSHOT, MSG_WELCOME,
+    POSITION_SCALE, bullet_rows, decode_snapshot, decode_welcome, encode_connect, encode_input, restore_player,
+    snapshot_ticks
+)
+from replay import quantize
+
+# Unprocessed inputs resent with every new one, covers this many lost datagrams in a row
+INPUT_REDUNDANCY = 8
+# Unprocessed inputs kept for prediction, older ones are given up on
+MAX_PENDING = HISTORY_TICKS
+MAX_DATAGRAM = 65536
+
+
+class GameClient:
+    """UDP connection to one arena of a GameServer"""
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, arena=0, interpolation_delay=INTERPOLATION_DELAY):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.connect((host, port))
+        self.socket.setblocking(False)
+        self.arena = arena
+        self.welcome = None  # (version, seed, level_id, controls) once the server accepted us
+        self.states = {}  # tick -> NetState, the bases the server may encode against
+        self.latest = None  # Newest NetState
+        self.pending = deque()  # (seq, input) sent but not yet processed by the server, replayed by predictions
+        self.next_seq = 1
+        self.events = []  # (tick, event) received since the last take_events
+        self.event_tick = 0  # Newest tick whose events were received, they are resent until acknowledged
+        self.bytes_received = 0
+        self.applied_layout = None
+        self.predictor = PlayerPredictor()
+        self.interpolator = Interpolator(interpolation_delay)
+
+    @property
+    def controls(self):
+        return self.welcome is not None and self.welcome[3]
+
+    def connect(self):
+        """Ask to join the arena, call again until `welcome` is set"""
+        self.send(encode_connect(self.arena))
+
+    def send(self, datagram):
+        try:
+            self.socket.send(datagram)
+        except (BlockingIOError, ConnectionRefusedError):
+            pass  # Lost, the next message carries everything again
+
+    def ack(self):
+        return self.latest.tick if self.latest is not None else 0
+
+    def send_input(self, player_input):
+        """Send the input for the next tick and predict it, returns it as the server will apply it"""
+        player_input = quantize(player_input)
+        self.pending.append((self.next_seq, player_input))
+        self.next_seq += 1
+        if len(self.pending) > MAX_PENDING:
+            self.pending.popleft()
+        self.predictor.predict(player_input)
+        # Older inputs are kept for replaying but only the newest few are resent
+        inputs = list(self.pending)[-INPUT_REDUNDANCY:]
+        self.send(encode_input(self.ack(), inputs[0][0], [entry[1] for entry in inputs]))
+        return player_input
+
+    def send_ack(self):
+        """Acknowledge the newest snapshot without sending input, what spectators do every tick"""
+        self.send(encode_input(self.ack(), self.next_seq, []))
+
+    def poll(self):
+        """Handle every datagram waiting on the socket, returns True if a new snapshot arrived"""
+        updated = False
+        while True:
+            try:
+                data = self.socket.recv(MAX_DATAGRAM)
+            except (BlockingIOError, ConnectionRefusedError):
+                return updated
+            self.bytes_received += len(data)
+            if data[0] == MSG_WELCOME:
+                self.welcome = decode_welcome(data)
+            elif data[0] == MSG_SNAPSHOT:
+                updated = self.receive_snapshot(data) or updated
+
+    def receive_snapshot(self, data):
+        tick, base_tick = snapshot_ticks(data)
+        if self.latest is not None and tick <= self.latest.tick:
+            return False  # Late or duplicate
+        base = None
+        if base_tick:
+            base = self.states.get(base_tick)
+            if base is None:
+                return False  # Base already dropped, the server moves on to a newer one once we ack
+        state, events = decode_snapshot(data, base)
+
+        self.states[tick] = state
+        for old in [old for old in self.states if old <= tick - HISTORY_TICKS]:
+            del self.states[old]
+        self.latest = state
+        self.events.extend(entry for entry in events if entry[0] > self.event_tick)
+        self.event_tick = tick
+
+        # The server has acted on these inputs, stop resending them
+        pending = self.pending
+        while pending and pending[0][0] <= state.input_seq:
+            pending.popleft()
+        if self.controls:
+            self.predictor.reconcile(state, pending)
+        return True
+
+    def take_events(self, until=None):
+        """Received events up to tick `until` (all by default), as (tick, event) in tick order"""
+        events = self.events
+        if until is None:
+            self.events = []
+            return events
+        count = 0
+        while count < len(events) and events[count][0] <= until:
+            count += 1
+        self.events = events[count:]
+        return events[:count]
+
+    def apply(self, game):
+        """Write the client's view of the arena into `game`, a headless Game used for drawing.
+
+        Call once per frame. The controlled player and the platforms it
+        moves on are predicted, everything else is interpolated between the
+        buffered snapshots a few ticks in the past.
+        """
+        latest = self.latest
+        if latest is None:
+            return
+        if latest.layout is not self.applied_layout:
+            game.obstacle_manager.load_layout(latest.layout)
+            self.applied_layout = latest.layout
+        render_tick = self.interpolator.advance(latest.tick)
+        older, newer, fraction = self.interpolator.bracket(self.states)
+
+        # Health and match stats are shown as the server has them now
+        player = game.player
+        restore_player(player, latest.fields)
+        predictor = self.predictor
+        if self.controls and predictor.ready:
+            player.rect.topleft = predictor.display_rect().topleft
+            player.is_jumping = predictor.player.is_jumping
+            player.is_on_ground = predictor.player.is_on_ground
+        else:
+            player.rect.topleft = lerp_fields(older, newer, fraction, 0, 2)
+
+        enemy = game.enemy
+        enemy_x = FIELD_INDEX['enemy_x']
+        enemy.rect.topleft = lerp_fields(older, newer, fraction, enemy_x, enemy_x + 2)
+        enemy.current_state = enemy.states[ENEMY_STATES[older.fields[FIELD_INDEX['enemy_state']]]]
+        enemy.combat.health, enemy.combat.deaths, game.damage_dealt, game.damage_taken = \
+            latest.fields[FIELD_INDEX['enemy_health']:len(FIELDS)]
+
+        platforms = game.obstacle_manager.moving_obstacles
+        if self.controls and predictor.ready and predictor.layout is latest.layout:
+            for obstacle, predicted in zip(platforms, predictor.obstacle_manager.moving_obstacles):
+                obstacle.rect.topleft = predicted.rect.topleft
+        else:
+            positions = lerp_fields(older, newer, fraction, len(FIELDS), None)
+            for i, obstacle in enumerate(platforms[:len(positions) // 2]):
+                obstacle.rect.topleft = positions[2 * i], positions[2 * i + 1]
+
+        game.bullets.restore(bullet_rows(older.bullets[0], render_tick))
+        game.enemy_bullets.restore(bullet_rows(older.bullets[1], render_tick))
+
+        manager = game.health_item_manager
+        items = older.items
+        if newer is not None and len(newer.items) == len(items):
+            items = [(x + (nx - x) * fraction, y + (ny - y) * fraction)
+                     for (x, y), (nx, ny) in zip(items, newer.items)]
+        if len(manager.health_items) != len(items):
+            manager.active_items.clear()
+            manager.health_items = [HealthItem(registry=manager.active_items, rng=manager.rng) for _ in items]
+        for item, (x, y) in zip(manager.health_items, items):
+            item.x = x / POSITION_SCALE
+            item.y = y / POSITION_SCALE
+            item.rect.x = item.x
+            item.rect.y = item.y
+            item.pulse_time = render_tick * item.pulse_speed
+
+        # Impact flashes and pickup bursts come from the server's events, shown
+        # when the interpolated view reaches the tick they happened on
+        for _, event in self.take_events(render_tick):
+            game.events.publish(event)
+        game.events.dispatch()
+
+    def close(self):
+        self.send(bytes((MSG_DISCONNECT,)))
+        self.socket.close()
+
+
+def main(argv=None):
+    import pygame
+
+    from gameClass import Game
+    from inputSource import KeyboardMouseInput
+
+    parser = argparse.ArgumentParser(description="Play on a Rogue Shot server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--arena', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    client = GameClient(args.host, args.port, args.arena)
+    view = Game()
+    keyboard = KeyboardMouseInput()
+    clock = pygame.time.Clock()
+    running = True
+    try:
+        while running:
+            clock.tick(60)
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                keyboard.handle_event(event, view.camera)
+
+            if client.welcome is None:
+                client.connect()
+            elif client.controls:
+                client.send_input(keyboard.poll(view))
+            else:
+                client.send_ack()
+
+            client.poll()
+            client.apply(view)
+            view.particles.update()
+            view.draw()
+    finally:
+        client.close()
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
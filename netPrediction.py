@@ -0,0 +1,152 @@
+# netPrediction.py - Latency hiding for netClient.py
+#
+# A client's own player would otherwise react one round trip after every key
+# press. PlayerPredictor runs Player.move on the client for every input the
+# moment it is sent. When a snapshot arrives it rewinds to the server's player
+# state and replays the inputs the server hasn't processed yet, so a correct
+# prediction never shows and a wrong one is corrected within a snapshot.
+# Moving platforms are deterministic, the predictor steps its own copy of them
+# from the exact states sent with the level, so replays land on the same
+# platform positions as the server.
+#
+# Everything else (the enemy, bullets, items, and the platforms for
+# spectators) is drawn a few ticks in the past by the Interpolator, between
+# the two buffered snapshots around that tick, which hides jitter and lost
+# datagrams instead of showing entities stop and jump.
+from obstacalsManager import ObstacleManager
+from player import Player
+from netProtocol import restore_player
+
+# Ticks the interpolated view trails the newest snapshot, enough to bridge one lost datagram
+INTERPOLATION_DELAY = 3
+# The view jumps instead of catching up when it is this many ticks off
+MAX_DRIFT = 30
+# Fraction of its distance to the target tick the view closes per frame
+DRIFT_CORRECTION = 0.1
+# Fraction of a misprediction still shown one frame after it was corrected
+CORRECTION_DECAY = 0.75
+
+
+class PlayerPredictor:
+    """The local player simulated ahead of the server from unacknowledged inputs"""
+
+    def __init__(self):
+        self.player = Player(0, 0, 50, 50)
+        self.obstacle_manager = ObstacleManager()
+        self.layout = None
+        self.platform_history = {}  # tick -> platform snapshots after that tick
+        self.tick = 0  # Server tick the predicted state belongs to
+        self.ready = False  # Set by the first reconcile
+        self.corrections = 0  # Snapshots that disagreed with the prediction
+        self.error = (0.0, 0.0)  # Misprediction still being smoothed out, see display_rect
+
+    def _platforms_at(self, tick):
+        """Step the platforms to their state after `tick`, from the newest known state before it"""
+        history = self.platform_history
+        known = tick
+        while known not in history:
+            known -= 1
+        platforms = self.obstacle_manager.moving_obstacles
+        for obstacle, state in zip(platforms, history[known]):
+            obstacle.restore(state)
+        while known < tick:
+            known += 1
+            for obstacle in platforms:
+                obstacle.update()
+            history[known] = tuple(obstacle.snapshot() for obstacle in platforms)
+
+    def predict(self, player_input):
+        """Simulate the player one tick ahead with an input that was just sent"""
+        if not self.ready:
+            return
+        self.tick += 1
+        self._platforms_at(self.tick)
+        self.player.move(self.obstacle_manager.get_all_obstacles(), player_input)
+
+    def reconcile(self, state, pending):
+        """Rewind to a snapshot's player and replay the inputs it hasn't processed.
+
+        pending is the client's (seq, input) list of inputs newer than state.input_seq.
+        """
+        if state.layout is not self.layout:
+            self.obstacle_manager.load_layout(state.layout)
+            self.layout = state.layout
+            platform_tick, platforms = state.platforms
+            self.platform_history = {platform_tick: platforms}
+
+        before = self.player.rect.topleft if self.ready else None
+        restore_player(self.player, state.fields)
+        self.tick = state.tick
+        self.ready = True
+        # Keep the platform states from the newest one at or before the snapshot on,
+        # those after it were stepped exactly and are still valid
+        history = self.platform_history
+        start = max(known for known in history if known <= state.tick)
+        for old in [old for old in history if old < start]:
+            del history[old]
+        obstacles = None
+        for _, player_input in pending:
+            self.tick += 1
+            self._platforms_at(self.tick)
+            obstacles = self.obstacle_manager.get_all_obstacles()
+            self.player.move(obstacles, player_input)
+        if obstacles is None:
+            self._platforms_at(self.tick)
+
+        # Show a correction gradually instead of snapping to it
+        if before is not None and before != self.player.rect.topleft:
+            self.corrections += 1
+            ex, ey = self.error
+            self.error = (ex + before[0] - self.player.rect.x, ey + before[1] - self.player.rect.y)
+
+    def display_rect(self):
+        """Predicted player rect with what is left of recent corrections, call once per frame"""
+        ex, ey = self.error
+        self.error = (ex * CORRECTION_DECAY, ey * CORRECTION_DECAY)
+        return self.player.rect.move(round(ex), round(ey))
+
+
+class Interpolator:
+    """Picks the past tick to draw remote entities at and the snapshots around it"""
+
+    def __init__(self, delay=INTERPOLATION_DELAY):
+        self.delay = delay
+        self.render_tick = None
+
+    def advance(self, latest_tick):
+        """Move the view on by one frame, staying about `delay` ticks behind the newest snapshot"""
+        target = latest_tick - self.delay
+        if self.render_tick is None or abs(target - self.render_tick) > MAX_DRIFT:
+            self.render_tick = target
+        else:
+            self.render_tick += 1 + (target - self.render_tick) * DRIFT_CORRECTION
+        self.render_tick = min(self.render_tick, latest_tick)
+        return self.render_tick
+
+    def bracket(self, states):
+        """(older, newer, fraction) of the buffered NetStates around render_tick.
+
+        newer is None when nothing newer has arrived, older is the oldest
+        state when the view is behind every buffered one.
+        """
+        tick = self.render_tick
+        older = newer = None
+        for state in states.values():
+            if state.tick <= tick:
+                if older is None or state.tick > older.tick:
+                    older = state
+            elif newer is None or state.tick < newer.tick:
+                newer = state
+        if older is None:
+            return newer, None, 0.0
+        if newer is None:
+            return older, None, 0.0
+        return older, newer, (tick - older.tick) / (newer.tick - older.tick)
+
+
+def lerp_fields(older, newer, fraction, start, stop):
+    """Interpolated integer fields older.fields[start:stop], newer may be None"""
+    values = older.fields[start:stop]
+    if newer is None or fraction <= 0 or newer.layout is not older.layout:
+        return values
+    return tuple(round(a + (b - a) * fraction) for a, b in zip(values, newer.fields[start:stop]))
@@ -0,0 +1,454 @@
+# netProtocol.py - Wire format of networked games: inputs up, delta-compressed snapshots down
+#
+# One process runs the authoritative Game (netServer.py), clients only send
+# their inputs and draw what the server tells them (netClient.py). Every
+# message is a single UDP datagram starting with a MSG_* byte, integers are
+# LEB128 varints as in replay.py, signed ones zigzag encoded first.
+#
+#   MSG_CONNECT     version, arena                     client -> server, resent until welcomed
+#   MSG_WELCOME     version, zigzag(seed), level_id + 1, controls (1 if this client drives the player)
+#   MSG_INPUT       ack, first seq, count, inputs      the newest unprocessed inputs, resent until processed
+#   MSG_DISCONNECT
+#   MSG_SNAPSHOT    see below
+#
+# An input is a replay.py flags byte followed by the zigzag aim point if FIRE is set.
+# Inputs are numbered from 1 and `ack` is the newest snapshot tick the client
+# decoded. Spectators send inputs messages without inputs to acknowledge.
+#
+# Snapshots are encoded against the newest snapshot the client acknowledged
+# (the base), or against nothing when there is none:
+#   tick, base tick (0 for none), last processed input seq, flags byte (SNAPSHOT_LEVEL | SNAPSHOT_ITEMS)
+#   level layout, platform states      if SNAPSHOT_LEVEL, the level changed since the base
+#   field mask, then zigzag(value - base value) for every field whose bit is set
+#   per bullet array (player, enemy):  spawn count, spawns (id, x, y, velocity_x, velocity_y, size),
+#                                      despawn count, ids
+#   item count, items (x, y)           if SNAPSHOT_ITEMS, the active health items changed
+#   event count, events                effect events of the ticks after the base (tick offset, type, fields)
+# Bullets in flight need no updates at all, clients move them along their
+# velocity from the tick they were spawned at. Positions are quantized to
+# 1/POSITION_SCALE px and velocities to 1/VELOCITY_SCALE px per tick.
+# Platform states (x, y, exact phase, previous x, y) come with the level so
+# clients can step the platforms themselves, exactly like the server does.
+import struct
+from collections import namedtuple
+
+from events import BulletHit, ItemCollected
+from replay import FIRE, input_flags, input_from_flags, read_varint, unzigzag, write_varint, zigzag
+
+PROTOCOL_VERSION = 2
+DEFAULT_PORT = 47800
+
+MSG_CONNECT = 1
+MSG_WELCOME = 2
+MSG_INPUT = 3
+MSG_DISCONNECT = 4
+MSG_SNAPSHOT = 5
+
+SNAPSHOT_LEVEL = 0x01
+SNAPSHOT_ITEMS = 0x02
+
+POSITION_SCALE = 8
+VELOCITY_SCALE = 256
+FALL_SCALE = 1 << 16  # Falling speed, fine enough that replaying it never rounds a rect differently
+
+# Snapshots both sides keep around as bases, about one second
+HISTORY_TICKS = 64
+
+# Per-tick integer state, moving platform positions (x, y per platform) follow these
+FIELDS = (
+    'player_x', 'player_y', 'falling_speed', 'player_flags', 'player_health', 'invulnerable_timer',
+    'player_deaths', 'player_items',
+    'enemy_x', 'enemy_y', 'enemy_state', 'enemy_health', 'enemy_deaths',
+    'damage_dealt', 'damage_taken',
+)
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+# Bits of player_flags
+IS_JUMPING = 0x01
+IS_ON_GROUND = 0x02
+INVULNERABLE = 0x04
+
+ENEMY_STATES = ('patrol', 'chase', 'attack', 'flee', 'idle', 'seek_health')
+ENEMY_STATE_INDEX = {name: i for i, name in enumerate(ENEMY_STATES)}
+MOVE_TYPES = ('horizontal', 'vertical', 'circular')
+ENTITY_NAMES = ('obstacle', 'player', 'enemy')  # Shooters, targets and collectors in events
+ENTITY_INDEX = {name: i for i, name in enumerate(ENTITY_NAMES)}
+
+# Events clients need for their effects, see effects.py
+NET_EVENT_TYPES = (BulletHit, ItemCollected)
+
+_FLOATS = struct.Struct('<3d')
+_DOUBLE = struct.Struct('<d')
+
+# What the server remembers of a tick to encode later snapshots against it.
+# bullet_ids is (player ids, enemy ids) as frozensets, items the quantized
+# active items and events that tick's NET_EVENT_TYPES events.
+ServerState = namedtuple('ServerState', ['tick', 'fields', 'bullet_ids', 'items', 'layout', 'events'])
+
+# A decoded snapshot. bullets is (player, enemy) dicts of id -> (tick, x, y,
+# velocity_x, velocity_y, size), still quantized and positioned at `tick`.
+# platforms is (tick, MovingObstacle.snapshot() of every platform at that tick)
+# as sent with the level.
+NetState = namedtuple('NetState', ['tick', 'fields', 'bullets', 'items', 'layout', 'platforms', 'input_seq'])
+
+
+def quantize_position(value):
+    return int(round(value * POSITION_SCALE))
+
+
+def capture_fields(game):
+    """The FIELDS of a game followed by its moving platform positions"""
+    player = game.player
+    enemy = game.enemy
+    flags = 0
+    if player.is_jumping:
+        flags |= IS_JUMPING
+    if player.is_on_ground:
+        flags |= IS_ON_GROUND
+    if player.invulnerable:
+        flags |= INVULNERABLE
+    fields = [
+        player.rect.x, player.rect.y, int(round(player.falling_speed * FALL_SCALE)), flags, player.health,
+        player.invulnerable_timer, player.deaths, player.items_collected,
+        enemy.rect.x, enemy.rect.y, ENEMY_STATE_INDEX[enemy.current_state.name], enemy.combat.health,
+        enemy.combat.deaths,
+        game.damage_dealt, game.damage_taken,
+    ]
+    for obstacle in game.obstacle_manager.moving_obstacles:
+        fields.append(obstacle.rect.x)
+        fields.append(obstacle.rect.y)
+    return tuple(fields)
+
+
+def capture(game, tick, events=()):
+    """ServerState of a game right after `tick`"""
+    items = tuple(
+        (quantize_position(item.x), quantize_position(item.y))
+        for item in game.health_item_manager.health_items if item.active
+    )
+    bullet_ids = (frozenset(game.bullets.ids()), frozenset(game.enemy_bullets.ids()))
+    return ServerState(tick, capture_fields(game), bullet_ids, items, game.obstacle_manager.get_layout(),
+                       tuple(events))
+
+
+def restore_player(player, fields):
+    """Set a Player to the state in capture_fields() output"""
+    (player.rect.x, player.rect.y, falling_speed, flags, player.health, player.invulnerable_timer,
+     player.deaths, player.items_collected) = fields[:FIELD_INDEX['enemy_x']]
+    player.falling_speed = falling_speed / FALL_SCALE
+    player.is_jumping = bool(flags & IS_JUMPING)
+    player.is_on_ground = bool(flags & IS_ON_GROUND)
+    player.invulnerable = bool(flags & INVULNERABLE)
+
+
+def write_layout(out, layout):
+    static, moving = layout
+    write_varint(out, len(static))
+    for rect in static:
+        for value in rect:
+            write_varint(out, zigzag(value))
+    write_varint(out, len(moving))
+    for x, y, width, height, move_type, speed, amplitude, phase, color_index in moving:
+        for value in (x, y, width, height):
+            write_varint(out, zigzag(value))
+        out.append(MOVE_TYPES.index(move_type))
+        write_varint(out, color_index)
+        out += _FLOATS.pack(speed, amplitude, phase)
+
+
+def read_layout(data, pos):
+    static = []
+    count, pos = read_varint(data, pos)
+    for _ in range(count):
+        rect = []
+        for _ in range(4):
+            value, pos = read_varint(data, pos)
+            rect.append(unzigzag(value))
+        static.append(tuple(rect))
+    moving = []
+    count, pos = read_varint(data, pos)
+    for _ in range(count):
+        rect = []
+        for _ in range(4):
+            value, pos = read_varint(data, pos)
+            rect.append(unzigzag(value))
+        move_type = MOVE_TYPES[data[pos]]
+        color_index, pos = read_varint(data, pos + 1)
+        speed, amplitude, phase = _FLOATS.unpack_from(data, pos)
+        pos += _FLOATS.size
+        moving.append((*rect, move_type, speed, amplitude, phase, color_index))
+    return (tuple(static), tuple(moving)), pos
+
+
+def write_platforms(out, platforms):
+    for obstacle in platforms:
+        x, y, phase, prev_x, prev_y = obstacle.snapshot()
+        for value in (x, y, prev_x, prev_y):
+            write_varint(out, zigzag(value))
+        out += _DOUBLE.pack(phase)
+
+
+def read_platforms(data, pos, count):
+    platforms = []
+    for _ in range(count):
+        values = []
+        for _ in range(4):
+            value, pos = read_varint(data, pos)
+            values.append(unzigzag(value))
+        phase, = _DOUBLE.unpack_from(data, pos)
+        pos += _DOUBLE.size
+        x, y, prev_x, prev_y = values
+        platforms.append((x, y, phase, prev_x, prev_y))
+    return tuple(platforms), pos
+
+
+def write_event(out, event):
+    if type(event) is BulletHit:
+        out.append(0)
+        out.append(ENTITY_INDEX[event.shooter])
+        out.append(ENTITY_INDEX[event.target])
+    else:
+        out.append(1)
+        out.append(ENTITY_INDEX[event.collector])
+        write_varint(out, event.amount)
+    write_varint(out, zigzag(quantize_position(event.x)))
+    write_varint(out, zigzag(quantize_position(event.y)))
+
+
+def read_event(data, pos):
+    kind = data[pos]
+    if kind == 0:
+        first, second = ENTITY_NAMES[data[pos + 1]], ENTITY_NAMES[data[pos + 2]]
+        pos += 3
+    else:
+        first = ENTITY_NAMES[data[pos + 1]]
+        second, pos = read_varint(data, pos + 2)
+    x, pos = read_varint(data, pos)
+    y, pos = read_varint(data, pos)
+    x, y = unzigzag(x) / POSITION_SCALE, unzigzag(y) / POSITION_SCALE
+    event = BulletHit(first, second, x, y) if kind == 0 else ItemCollected(first, second, x, y)
+    return event, pos
+
+
+def encode_connect(arena=0):
+    out = bytearray((MSG_CONNECT,))
+    write_varint(out, PROTOCOL_VERSION)
+    write_varint(out, arena)
+    return bytes(out)
+
+
+def encode_welcome(seed, level_id, controls):
+    out = bytearray((MSG_WELCOME,))
+    write_varint(out, PROTOCOL_VERSION)
+    write_varint(out, zigzag(seed))
+    write_varint(out, 0 if level_id is None else level_id + 1)
+    out.append(1 if controls else 0)
+    return bytes(out)
+
+
+def encode_input(ack, first_seq, inputs):
+    """Input message carrying `inputs` (quantized, see replay.quantize) numbered from first_seq"""
+    out = bytearray((MSG_INPUT,))
+    write_varint(out, ack)
+    write_varint(out, first_seq)
+    write_varint(out, len(inputs))
+    for player_input in inputs:
+        out.append(input_flags(player_input))
+        if player_input.fire:
+            write_varint(out, zigzag(player_input.aim_x))
+            write_varint(out, zigzag(player_input.aim_y))
+    return bytes(out)
+
+
+def decode_connect(data):
+    """(version, arena) of a connect message"""
+    version, pos = read_varint(data, 1)
+    arena, pos = read_varint(data, pos)
+    return version, arena
+
+
+def decode_welcome(data):
+    """(version, seed, level_id, controls) of a welcome message"""
+    version, pos = read_varint(data, 1)
+    seed, pos = read_varint(data, pos)
+    level_id, pos = read_varint(data, pos)
+    return version, unzigzag(seed), level_id - 1 if level_id else None, bool(data[pos])
+
+
+def decode_input(data):
+    """(ack, first seq, inputs) of an input message"""
+    ack, pos = read_varint(data, 1)
+    first_seq, pos = read_varint(data, pos)
+    count, pos = read_varint(data, pos)
+    inputs = []
+    for _ in range(count):
+        flags = data[pos]
+        pos += 1
+        aim_x = aim_y = 0
+        if flags & FIRE:
+            aim_x, pos = read_varint(data, pos)
+            aim_y, pos = read_varint(data, pos)
+            aim_x, aim_y = unzigzag(aim_x), unzigzag(aim_y)
+        inputs.append(input_from_flags(flags, aim_x, aim_y))
+    return ack, first_seq, inputs
+
+
+def _write_bullets(out, bullets, ids, base_ids):
+    spawned = sorted(ids - base_ids)
+    write_varint(out, len(spawned))
+    if spawned:
+        columns = bullets.archetype.columns
+        index = {bullet_id: i for i, bullet_id in enumerate(bullets.ids())}
+        for bullet_id in spawned:
+            i = index[bullet_id]
+            write_varint(out, bullet_id)
+            write_varint(out, zigzag(quantize_position(columns['x'][i].item())))
+            write_varint(out, zigzag(quantize_position(columns['y'][i].item())))
+            write_varint(out, zigzag(int(round(columns['velocity_x'][i].item() * VELOCITY_SCALE))))
+            write_varint(out, zigzag(int(round(columns['velocity_y'][i].item() * VELOCITY_SCALE))))
+            write_varint(out, columns['size'][i].item())
+    despawned = sorted(base_ids - ids)
+    write_varint(out, len(despawned))
+    for bullet_id in despawned:
+        write_varint(out, bullet_id)
+
+
+def encode_snapshot(game, state, base, input_seq, history):
+    """Snapshot of `state`, the current state of `game`, delta-compressed against `base`.
+
+    base is the ServerState the client acknowledged or None, history maps
+    ticks to ServerStates and provides the events the client hasn't seen.
+    """
+    new_level = base is None or base.layout is not state.layout
+    new_items = base is None or base.items != state.items
+    out = bytearray((MSG_SNAPSHOT,))
+    write_varint(out, state.tick)
+    write_varint(out, 0 if base is None else base.tick)
+    write_varint(out, input_seq)
+    out.append((SNAPSHOT_LEVEL if new_level else 0) | (SNAPSHOT_ITEMS if new_items else 0))
+    if new_level:
+        write_layout(out, state.layout)
+        write_platforms(out, game.obstacle_manager.moving_obstacles)
+
+    # The number of fields changes with the level, a new level is sent against zeros
+    fields = state.fields
+    base_fields = (0,) * len(fields) if new_level else base.fields
+    mask = 0
+    deltas = []
+    for i, (value, base_value) in enumerate(zip(fields, base_fields)):
+        if value != base_value:
+            mask |= 1 << i
+            deltas.append(value - base_value)
+    write_varint(out, mask)
+    for delta in deltas:
+        write_varint(out, zigzag(delta))
+
+    no_ids = frozenset()
+    for bullets, ids, base_ids in zip((game.bullets, game.enemy_bullets), state.bullet_ids,
+                                      base.bullet_ids if base is not None else (no_ids, no_ids)):
+        _write_bullets(out, bullets, ids, base_ids)
+
+    if new_items:
+        write_varint(out, len(state.items))
+        for x, y in state.items:
+            write_varint(out, zigzag(x))
+            write_varint(out, zigzag(y))
+
+    first_tick = state.tick if base is None else base.tick + 1
+    events = []
+    for tick in range(first_tick, state.tick + 1):
+        past = history.get(tick)
+        if past is not None:
+            events.extend((tick, event) for event in past.events)
+    write_varint(out, len(events))
+    for tick, event in events:
+        write_varint(out, state.tick - tick)
+        write_event(out, event)
+    return bytes(out)
+
+
+def _read_bullets(data, pos, tick, bullets):
+    count, pos = read_varint(data, pos)
+    for _ in range(count):
+        bullet_id, pos = read_varint(data, pos)
+        values = []
+        for _ in range(4):
+            value, pos = read_varint(data, pos)
+            values.append(unzigzag(value))
+        size, pos = read_varint(data, pos)
+        bullets[bullet_id] = (tick, *values, size)
+    count, pos = read_varint(data, pos)
+    for _ in range(count):
+        bullet_id, pos = read_varint(data, pos)
+        bullets.pop(bullet_id, None)
+    return pos
+
+
+def snapshot_ticks(data):
+    """(tick, base tick) of a snapshot message, without decoding the rest"""
+    tick, pos = read_varint(data, 1)
+    base_tick, pos = read_varint(data, pos)
+    return tick, base_tick
+
+
+def decode_snapshot(data, base):
+    """Decode a snapshot against the NetState it names as its base.
+
+    Returns (NetState, [(tick, event)]). base must be the state of the
+    snapshot_ticks() base tick, or None when that is 0.
+    """
+    tick, pos = read_varint(data, 1)
+    base_tick, pos = read_varint(data, pos)
+    input_seq, pos = read_varint(data, pos)
+    flags = data[pos]
+    pos += 1
+    if flags & SNAPSHOT_LEVEL:
+        layout, pos = read_layout(data, pos)
+        platforms, pos = read_platforms(data, pos, len(layout[1]))
+        platforms = (tick, platforms)
+        base_fields = (0,) * (len(FIELDS) + 2 * len(layout[1]))
+    else:
+        layout = base.layout
+        platforms = base.platforms
+        base_fields = base.fields
+
+    mask, pos = read_varint(data, pos)
+    fields = list(base_fields)
+    for i in range(len(fields)):
+        if mask >> i & 1:
+            delta, pos = read_varint(data, pos)
+            fields[i] += unzigzag(delta)
+
+    bullets = ({}, {}) if base is None else (dict(base.bullets[0]), dict(base.bullets[1]))
+    for side in bullets:
+        pos = _read_bullets(data, pos, tick, side)
+
+    if flags & SNAPSHOT_ITEMS:
+        items = []
+        count, pos = read_varint(data, pos)
+        for _ in range(count):
+            x, pos = read_varint(data, pos)
+            y, pos = read_varint(data, pos)
+            items.append((unzigzag(x), unzigzag(y)))
+        items = tuple(items)
+    else:
+        items = base.items
+
+    events = []
+    count, pos = read_varint(data, pos)
+    for _ in range(count):
+        offset, pos = read_varint(data, pos)
+        event, pos = read_event(data, pos)
+        events.append((tick - offset, event))
+    return NetState(tick, tuple(fields), bullets, items, layout, platforms, input_seq), events
+
+
+def bullet_rows(bullets, tick):
+    """BulletArray.snapshot() rows of a NetState's bullet dict, moved on to `tick`"""
+    rows = []
+    for spawn_tick, x, y, velocity_x, velocity_y, size in bullets.values():
+        velocity_x /= VELOCITY_SCALE
+        velocity_y /= VELOCITY_SCALE
+        age = tick - spawn_tick
+        rows.append((x / POSITION_SCALE + velocity_x * age, y / POSITION_SCALE + velocity_y * age,
+                     velocity_x, velocity_y, size))
+    return rows
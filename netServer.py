@@ -0,0 +1,308 @@
+# netServer.py - Authoritative UDP server hosting networked arenas
+#
+# Every arena is a headless Game stepped by the server. The first client to
+# join an arena drives its player, later ones watch. Clients send inputs,
+# the server answers every tick with a snapshot delta-compressed against the
+# newest snapshot each client acknowledged (see netProtocol.py), so a client
+# that is in sync gets a few dozen bytes per tick and a lost datagram costs
+# nothing but a slightly bigger delta next time.
+import os
+
+# Servers never open a window, set before pygame is imported through gameClass
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import random
+import socket
+import time
+
+from gameClass import Game
+from inputSource import NO_INPUT, BufferedInput
+from netProtocol import (
+    DEFAULT_PORT, HISTORY_TICKS, MSG_CONNECT, MSG_DISCONNECT, MSG_INPUT, NET_EVENT_TYPES, PROTOCOL_VERSION,
+    capture, decode_connect, decode_input, encode_snapshot, encode_welcome
+)
+from replay import quantize
+
+# Clients not heard from for this many ticks are dropped
+CLIENT_TIMEOUT = 5 * 60
+# Inputs queued beyond this are dropped so a client running fast can't build up lag
+MAX_QUEUED_INPUTS = 8
+MAX_DATAGRAM = 2048
+
+
+class RemoteClient:
+    """A client connected to an arena"""
+
+    def __init__(self, address, controls, tick):
+        self.address = address
+        self.controls = controls  # Whether this client's inputs drive the player
+        self.acked = 0  # Newest snapshot tick the client decoded
+        self.last_heard = tick
+
+
+class NetArena:
+    """One authoritative Game and the clients connected to it.
+
+    Knows nothing about sockets: welcome(), receive_input() and leave() take
+    decoded client messages, step() and rest() return the (address, datagram)
+    pairs to send. Games that are never drawn may share one `screen`.
+    """
+
+    def __init__(self, seed=None, level_id=None, snapshot_interval=1, screen=None):
+        if seed is None:
+            seed = random.randrange(1 << 32)
+        self.input_source = BufferedInput()
+        self.game = Game(headless=True, seed=seed, level_id=level_id, input_source=self.input_source, screen=screen)
+        self.snapshot_interval = snapshot_interval
+        self.tick = 0  # Ticks simulated
+        self.clock = 0  # Ticks hosted, including those rest() skipped simulating
+        self.last_input = 0  # Clock of the newest input from the controlling client that did something
+        self.received_seq = 0  # Newest input seq pushed to input_source
+        self.clients = {}  # address -> RemoteClient
+        self.history = {}  # tick -> ServerState
+
+        # Effects are never drawn here, clients spawn their own from the events in snapshots
+        self.game.events.unsubscribe(self.game.effects)
+        self.tick_events = []
+        self.game.events.subscribe(self.tick_events.extend, *NET_EVENT_TYPES)
+
+    def welcome(self, address):
+        """Add a client (or greet it again), returns the welcome message"""
+        client = self.clients.get(address)
+        if client is None:
+            controls = not any(other.controls for other in self.clients.values())
+            client = self.clients[address] = RemoteClient(address, controls, self.clock)
+            if controls:
+                self.last_input = self.clock
+        client.last_heard = self.clock
+        return encode_welcome(self.game.seed, self.game.level_id, client.controls)
+
+    def leave(self, address):
+        client = self.clients.pop(address, None)
+        if client is not None and client.controls:
+            # Stop the player, whoever joins next takes over with inputs numbered from 1
+            self.input_source.buffer.clear()
+            self.input_source.last = NO_INPUT
+            self.received_seq = 0
+
+    def receive_input(self, address, ack, first_seq, inputs):
+        client = self.clients.get(address)
+        if client is None:
+            return
+        client.last_heard = self.clock
+        if ack in self.history and ack > client.acked:
+            client.acked = ack
+        if not client.controls:
+            return
+
+        # Inputs are resent until processed, only the new ones are queued. Clients
+        # send one every frame, only those doing something keep the room awake
+        # (quantizing drops the aim of inputs that don't fire).
+        source = self.input_source
+        for seq, player_input in enumerate(inputs, first_seq):
+            if seq > self.received_seq:
+                player_input = quantize(player_input)
+                if player_input != NO_INPUT:
+                    self.last_input = self.clock
+                source.push(player_input)
+                self.received_seq = seq
+        while len(source.buffer) > MAX_QUEUED_INPUTS:
+            source.buffer.popleft()
+
+    def processed_seq(self):
+        """Seq of the last input the player acted on"""
+        return self.received_seq - len(self.input_source.buffer)
+
+    def step(self):
+        """Simulate one tick, returns the snapshots to send as (address, datagram) pairs"""
+        self.game.step()
+        self.tick += 1
+        tick = self.tick
+        state = capture(self.game, tick, self.tick_events)
+        self.tick_events.clear()
+        history = self.history
+        history[tick] = state
+        history.pop(tick - HISTORY_TICKS, None)
+
+        self.clock += 1
+        self.drop_silent_clients()
+        if tick % self.snapshot_interval:
+            return []
+        return self.snapshots()
+
+    def rest(self, snapshot_interval=1):
+        """Host one tick without simulating, snapshots of the unchanged state go out every snapshot_interval"""
+        self.clock += 1
+        self.drop_silent_clients()
+        if not self.history or self.clock % snapshot_interval:
+            return []
+        return self.snapshots()
+
+    def drop_silent_clients(self):
+        clock = self.clock
+        for address in [address for address, client in self.clients.items()
+                        if clock - client.last_heard > CLIENT_TIMEOUT]:
+            self.leave(address)
+
+    def snapshots(self):
+        """(address, datagram) snapshots of the newest tick for every client"""
+        history = self.history
+        state = history[self.tick]
+        seq = self.processed_seq()
+        return [
+            (address, encode_snapshot(self.game, state, history.get(client.acked), seq, history))
+            for address, client in self.clients.items()
+        ]
+
+
+class ArenaHost:
+    """Routes client datagrams to NetArenas, created as clients ask for them.
+
+    Datagrams go out through `transmit(datagram, address)`, a socket's or
+    asyncio transport's sendto. Subclasses decide when arenas step.
+    """
+
+    def __init__(self, transmit, seed=None, level_id=None, snapshot_interval=1, max_arenas=64):
+        self.transmit = transmit
+        self.seed = seed
+        self.level_id = level_id
+        self.snapshot_interval = snapshot_interval
+        self.max_arenas = max_arenas
+        self.arenas = {}  # arena id -> NetArena
+        self.routes = {}  # client address -> arena id
+        self.bytes_sent = 0
+        self.datagrams_sent = 0
+
+    def create_arena(self, arena_id):
+        seed = None if self.seed is None else self.seed + arena_id
+        return NetArena(seed, self.level_id, self.snapshot_interval)
+
+    def arena(self, arena_id):
+        arena = self.arenas.get(arena_id)
+        if arena is None:
+            arena = self.arenas[arena_id] = self.create_arena(arena_id)
+        return arena
+
+    def receive(self, address, data):
+        """Handle one datagram from a client, malformed ones are ignored like lost ones"""
+        try:
+            self.handle(address, data)
+        except (IndexError, ValueError, KeyError):
+            pass
+
+    def handle(self, address, data):
+        kind = data[0]
+        if kind == MSG_CONNECT:
+            version, arena_id = decode_connect(data)
+            if version != PROTOCOL_VERSION:
+                return
+            if arena_id not in self.arenas and len(self.arenas) >= self.max_arenas:
+                return  # Full, the client keeps retrying
+            previous = self.routes.get(address)
+            if previous is not None and previous != arena_id:
+                self.arenas[previous].leave(address)
+            self.routes[address] = arena_id
+            self.send(address, self.arena(arena_id).welcome(address))
+            return
+
+        arena_id = self.routes.get(address)
+        if arena_id is None:
+            return
+        arena = self.arenas[arena_id]
+        if kind == MSG_INPUT:
+            arena.receive_input(address, *decode_input(data))
+        elif kind == MSG_DISCONNECT:
+            arena.leave(address)
+            del self.routes[address]
+
+    def send(self, address, datagram):
+        try:
+            self.transmit(datagram, address)
+        except BlockingIOError:
+            return  # Full send buffer, same as a lost datagram
+        self.bytes_sent += len(datagram)
+        self.datagrams_sent += 1
+
+    def close_empty_arenas(self):
+        for arena_id in [arena_id for arena_id, arena in self.arenas.items() if not arena.clients]:
+            del self.arenas[arena_id]
+        for address in [address for address, arena_id in self.routes.items()
+                        if arena_id not in self.arenas or address not in self.arenas[arena_id].clients]:
+            del self.routes[address]
+
+    def tick(self):
+        """Step every arena once and send its snapshots, empty arenas are closed"""
+        for arena in self.arenas.values():
+            for address, datagram in arena.step():
+                self.send(address, datagram)
+        self.close_empty_arenas()
+
+
+class GameServer(ArenaHost):
+    """ArenaHost on a non-blocking UDP socket, stepped by serve_forever"""
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, seed=None, level_id=None, snapshot_interval=1,
+                 max_arenas=64):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+        super().__init__(self.socket.sendto, seed, level_id, snapshot_interval, max_arenas)
+
+    def poll(self):
+        """Handle every datagram waiting on the socket"""
+        while True:
+            try:
+                data, address = self.socket.recvfrom(MAX_DATAGRAM)
+            except (BlockingIOError, ConnectionResetError):
+                return
+            self.receive(address, data)
+
+    def serve_forever(self, tick_rate=60, report_interval=None):
+        period = 1 / tick_rate
+        next_tick = time.perf_counter()
+        next_report = next_tick + (report_interval or 0)
+        while True:
+            self.poll()
+            now = time.perf_counter()
+            if now < next_tick:
+                time.sleep(min(next_tick - now, 0.002))
+                continue
+            self.tick()
+            next_tick += period
+            if next_tick < now:
+                next_tick = now + period  # Fell behind, don't try to catch up
+            if report_interval and now >= next_report:
+                print(f"{len(self.arenas)} arenas, {len(self.routes)} clients, "
+                      f"{self.bytes_sent / report_interval / 1024:.1f} KiB/s in {self.datagrams_sent} datagrams")
+                self.bytes_sent = self.datagrams_sent = 0
+                next_report = now + report_interval
+
+    def close(self):
+        self.socket.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an authoritative Rogue Shot server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--seed', type=int, default=None, help="Arena n uses seed + n")
+    parser.add_argument('--level-id', type=int, default=None)
+    parser.add_argument('--tick-rate', type=int, default=60)
+    parser.add_argument('--snapshot-interval', type=int, default=1, help="Send a snapshot every N ticks")
+    args = parser.parse_args(argv)
+
+    server = GameServer(args.host, args.port, args.seed, args.level_id, args.snapshot_interval)
+    print(f"Serving on {server.address[0]}:{server.address[1]}")
+    try:
+        server.serve_forever(args.tick_rate, report_interval=5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,43 @@
 import pygame
 import random
+
+from camera import arena_bounds
 from movingObstacale import MovingObstacle
+from spatialIndex import SpatialGrid
 
 
 class ObstacleManager:
-    def __init__(self):
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random
         self.obstacles = []
         self.moving_obstacles = []
         self.platform_colors = [(120, 60, 20), (110, 55, 15), (130, 65, 25), (100, 50, 10)]
+        self.layout = None  # Cached result of get_layout for the current level
+        self.static_index = None  # SpatialGrid of static obstacle indices, built on first draw
+        self.all_obstacles = None  # Cached get_all_obstacles result for the current level
+
+    def generate_level(self, player, num_platforms=8, num_moving=4, bounds=None):
+        """Fill `bounds` (the arena by default) with ground and platforms.
 
-    def generate_level(self, player):
+        A platform under the player is added unless player is None.
+        """
+        if bounds is None:
+            bounds = arena_bounds()
         self.obstacles = []
         self.moving_obstacles = []
+        self.layout = None
+        self.static_index = None
+        self.all_obstacles = None
 
-        # Add ground - now spans the full 1000px width
-        ground = pygame.Rect(0, 550, 1000, 50)
+        # Add ground - spans the full width of the area
+        ground = pygame.Rect(bounds.left, bounds.bottom - 50, bounds.width, 50)
         self.obstacles.append(ground)
 
         # Add static platforms
-        for i in range(8):  # Reduced from 12 to 8 (as we'll add 4 moving platforms)
-            width = random.randint(100, 200)
-            x = random.randint(0, 1000 - width)
-            y = random.randint(200, 500)
+        for i in range(num_platforms):  # 8 by default (as we'll add 4 moving platforms)
+            width = self.rng.randint(100, 200)
+            x = self.rng.randint(bounds.left, bounds.right - width)
+            y = self.rng.randint(200, 500)
 
             # Don't place platforms too close to each other
             valid_position = True
@@ -35,10 +51,10 @@ class ObstacleManager:
                 self.obstacles.append(platform)
 
         # Add moving platforms (20% of platforms)
-        for i in range(4):  # Adding 4 moving platforms
-            width = random.randint(80, 150)
-            x = random.randint(0, 1000 - width)
-            y = random.randint(200, 500)
+        for i in range(num_moving):  # Adding 4 moving platforms by default
+            width = self.rng.randint(80, 150)
+            x = self.rng.randint(bounds.left, bounds.right - width)
+            y = self.rng.randint(200, 500)
 
             # Don't place platforms too close to each other
             valid_position = True
@@ -54,44 +70,112 @@ class ObstacleManager:
 
             if valid_position:
                 # Randomly choose movement type
-                move_type = random.choice(
+                move_type = self.rng.choice(
                     ['horizontal', 'vertical', 'horizontal', 'vertical','circular'])  # More horizontal/vertical than circular
 
                 # Create moving obstacle with random speed and amplitude
-                speed = random.uniform(0.5, 2.0)
-                amplitude = random.randint(30, 80)
+                speed = self.rng.uniform(0.5, 2.0)
+                amplitude = self.rng.randint(30, 80)
 
-                moving_platform = MovingObstacle(x, y, width, 20, move_type, speed, amplitude)
+                moving_platform = MovingObstacle(x, y, width, 20, move_type, speed, amplitude, rng=self.rng)
                 self.moving_obstacles.append(moving_platform)
 
         # Ensure player can reach at least one platform
-        player_platform = pygame.Rect(player.rect.x - 50, player.rect.y + 100, 150, 20)
-        self.obstacles.append(player_platform)
+        if player is not None:
+            player_platform = pygame.Rect(player.rect.x - 50, player.rect.y + 100, 150, 20)
+            self.obstacles.append(player_platform)
+
+    def get_layout(self):
+        """Return the current level as immutable data that other games can share.
+
+        Moving platforms are stored with their starting phase so a loaded level
+        starts exactly like the generated one.
+        """
+        if self.layout is not None:
+            return self.layout
+
+        static = tuple((obs.x, obs.y, obs.width, obs.height) for obs in self.obstacles)
+        moving = tuple(
+            (obs.original_x, obs.original_y, obs.width, obs.height,
+             obs.move_type, obs.speed, obs.amplitude, obs.initial_time, obs.color_index)
+            for obs in self.moving_obstacles
+        )
+        self.layout = (static, moving)
+        return self.layout
+
+    def load_layout(self, layout):
+        """Rebuild the level from data returned by get_layout"""
+        static, moving = layout
+        self.obstacles = [pygame.Rect(*rect) for rect in static]
+        self.moving_obstacles = [
+            MovingObstacle(x, y, width, height, move_type, speed, amplitude, phase, color_index)
+            for x, y, width, height, move_type, speed, amplitude, phase, color_index in moving
+        ]
+        self.layout = layout
+        self.static_index = None
+        self.all_obstacles = None
+
+    def snapshot(self):
+        """Level plus moving platform phases, see Game.snapshot"""
+        return self.get_layout(), tuple(obs.snapshot() for obs in self.moving_obstacles)
+
+    def restore(self, state):
+        layout, moving = state
+        # The level itself only needs rebuilding if it changed since the snapshot
+        if self.layout is not layout:
+            self.load_layout(layout)
+        for obstacle, obstacle_state in zip(self.moving_obstacles, moving):
+            obstacle.restore(obstacle_state)
+
+    def focus(self, rects):
+        """Arena levels are always simulated whole, see ChunkedLevel.focus"""
+        pass
 
     def update(self):
         # Update all moving obstacles
         for obstacle in self.moving_obstacles:
             obstacle.update()
 
-    def draw(self, screen):
-        # Draw static obstacles
-        for i, obstacle in enumerate(self.obstacles):
-            # Skip the ground as it's usually handled separately
-            if obstacle.y >= 550:  # Assuming ground is at y=550
+    def visible_obstacles(self, view):
+        """Indices of the static obstacles overlapping `view`, found through a grid built once per level"""
+        if self.static_index is None:
+            self.static_index = SpatialGrid()
+            for i, obstacle in enumerate(self.obstacles):
+                self.static_index.insert(i, obstacle)
+        return self.static_index.query(view)
+
+    def draw(self, screen, offset=(0, 0)):
+        ox, oy = offset
+        view = screen.get_rect(topleft=offset)
+
+        # Draw static obstacles on screen
+        for i in self.visible_obstacles(view):
+            obstacle = self.obstacles[i]
+            # The ground is the only obstacle reaching the bottom 50px
+            if obstacle.y >= 550:
                 # Draw ground with green color
-                pygame.draw.rect(screen, (0, 180, 0), obstacle)
+                pygame.draw.rect(screen, (0, 180, 0), obstacle.move(-ox, -oy))
             else:
                 # Draw platform with platform colors
                 color = self.platform_colors[i % len(self.platform_colors)]
-                pygame.draw.rect(screen, color, obstacle)
+                pygame.draw.rect(screen, color, obstacle.move(-ox, -oy))
 
-        # Draw moving obstacles
+        # Draw moving obstacles on screen, with a margin for the highlight line sticking out
+        margin_view = view.inflate(4, 4)
         for obstacle in self.moving_obstacles:
-            obstacle.draw(screen)
+            if obstacle.rect.colliderect(margin_view):
+                obstacle.draw(screen, offset)
 
     def get_all_obstacles(self):
-        """Returns a list containing both static and moving obstacles for collision detection"""
-        all_obstacles = self.obstacles.copy()
-        for moving_obs in self.moving_obstacles:
-            all_obstacles.append(moving_obs.rect)
-        return all_obstacles
\ No newline at end of file
+        """Static and moving obstacles for collision detection, one list per level.
+
+        Moving platforms move their rects in place, so the list stays current.
+        """
+        if self.all_obstacles is None:
+            self.all_obstacles = self.obstacles + [obstacle.rect for obstacle in self.moving_obstacles]
+        return self.all_obstacles
+
+    def get_moving_indices(self):
+        """Positions of the moving platforms in get_all_obstacles(), the other rects never move"""
+        start = len(self.obstacles)
+        return range(start, start + len(self.moving_obstacles))
\ No newline at end of file
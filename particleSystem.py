@@ -0,0 +1,168 @@
+# particleSystem.py - Fixed-capacity particle pool for impact flashes and pickup bursts
+import math
+import random
+
+import numpy as np
+import pygame
+
+
+class ParticleSystem:
+    """Array-backed particle pool.
+
+    Live particles are kept packed in the first `count` slots of each array so
+    integration, aging and culling are single vectorized operations per frame.
+    """
+
+    def __init__(self, capacity=2048, rng=None):
+        self.capacity = capacity
+        self.count = 0
+        self.rng = rng if rng is not None else random  # Only used for burst directions and sizes
+
+        # Per-particle state, one array per field
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.dx = np.zeros(capacity, dtype=np.float64)
+        self.dy = np.zeros(capacity, dtype=np.float64)
+        self.life = np.zeros(capacity, dtype=np.int32)
+        self.max_life = np.ones(capacity, dtype=np.int32)
+        self.size = np.zeros(capacity, dtype=np.float64)
+        self.shrink = np.zeros(capacity, dtype=np.bool_)  # Flashes shrink with age, bursts keep their size
+        self.color = np.zeros(capacity, dtype=np.int16)  # Index into self.palette
+
+        # Colors are interned so the pool only stores a small index per particle
+        self.palette = []
+        self.palette_index = {}
+        self.palette_rgb = np.zeros((0, 3), dtype=np.uint8)  # self.palette as an array, see snapshot
+
+        # Pre-rendered circles keyed by (color index, radius)
+        self.circle_cache = {}
+
+    def _color_id(self, color):
+        color = tuple(color)
+        color_id = self.palette_index.get(color)
+        if color_id is None:
+            color_id = len(self.palette)
+            self.palette.append(color)
+            self.palette_index[color] = color_id
+        return color_id
+
+    def emit(self, x, y, dx, dy, life, size, color, shrink=False):
+        """Add a single particle, dropping it if the pool is full"""
+        i = self.count
+        if i >= self.capacity:
+            return False
+
+        self.x[i] = x
+        self.y[i] = y
+        self.dx[i] = dx
+        self.dy[i] = dy
+        self.life[i] = life
+        self.max_life[i] = life
+        self.size[i] = size
+        self.shrink[i] = shrink
+        self.color[i] = self._color_id(color)
+        self.count = i + 1
+        return True
+
+    def emit_impact(self, x, y, color=(255, 165, 0), life=10, max_radius=10):
+        """Stationary flash that shrinks to nothing over its lifetime"""
+        return self.emit(x, y, 0.0, 0.0, life, max_radius, color, shrink=True)
+
+    def emit_burst(self, x, y, count=15, color=(255, 100, 100)):
+        """Radial burst of small particles, used when a health item is collected"""
+        rng = self.rng
+        for _ in range(count):
+            angle = rng.uniform(0, 6.28)  # 0 to 2π
+            speed = rng.uniform(1, 3)
+            if not self.emit(x, y,
+                             speed * math.cos(angle),
+                             speed * math.sin(angle),
+                             rng.randint(10, 20),
+                             rng.randint(2, 6),
+                             color):
+                break
+
+    def update(self):
+        """Integrate and age every live particle, then compact out the dead ones"""
+        n = self.count
+        if n == 0:
+            return
+
+        self.x[:n] += self.dx[:n]
+        self.y[:n] += self.dy[:n]
+        self.life[:n] -= 1
+
+        alive = self.life[:n] > 0
+        if alive.all():
+            return
+
+        keep = np.flatnonzero(alive)
+        k = len(keep)
+        for field in self.fields():
+            field[:k] = field[keep]
+        self.count = k
+
+    def clear(self):
+        self.count = 0
+
+    def fields(self):
+        return (self.x, self.y, self.dx, self.dy, self.life,
+                self.max_life, self.size, self.shrink, self.color)
+
+    def snapshot(self):
+        """Copy of the live particles, with colors as RGB rows since palette indices are per instance"""
+        n = self.count
+        if len(self.palette_rgb) != len(self.palette):
+            self.palette_rgb = np.array(self.palette, dtype=np.uint8).reshape(-1, 3)
+        fields = self.fields()
+        return n, tuple(field[:n].copy() for field in fields[:-1]) + (self.palette_rgb[self.color[:n]],)
+
+    def restore(self, state):
+        n, saved = state
+        *values, rgb = saved
+        for field, field_values in zip(self.fields()[:-1], values):
+            field[:n] = field_values
+        if n:
+            colors, inverse = np.unique(rgb, axis=0, return_inverse=True)
+            color_ids = np.array([self._color_id(color) for color in colors.tolist()], dtype=np.int16)
+            self.color[:n] = color_ids[inverse.reshape(-1)]
+        self.count = n
+
+    def _circle(self, color_id, radius):
+        key = (color_id, radius)
+        surface = self.circle_cache.get(key)
+        if surface is None:
+            surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surface, self.palette[color_id], (radius, radius), radius)
+            self.circle_cache[key] = surface
+        return surface
+
+    def draw(self, screen, offset=(0, 0)):
+        """Draw the live particles on screen with a single blits call"""
+        n = self.count
+        if n == 0:
+            return
+
+        # Flashes shrink linearly with remaining life, bursts keep a fixed size
+        radius = np.where(
+            self.shrink[:n],
+            self.size[:n] * self.life[:n] / self.max_life[:n],
+            self.size[:n]
+        ).astype(np.int32)
+        left = self.x[:n].astype(np.int32) - radius - offset[0]
+        top = self.y[:n].astype(np.int32) - radius - offset[1]
+
+        # Cull invisible and off-screen particles in one vectorized pass
+        width, height = screen.get_size()
+        visible = (radius > 0) & (left < width) & (left + 2 * radius > 0) & (top < height) & (top + 2 * radius > 0)
+        if not visible.all():
+            radius, left, top = radius[visible], left[visible], top[visible]
+            colors = self.color[:n][visible].tolist()
+        else:
+            colors = self.color[:n].tolist()
+
+        circle = self._circle
+        screen.blits([
+            (circle(c, r), (lx, ty))
+            for c, r, lx, ty in zip(colors, radius.tolist(), left.tolist(), top.tolist())
+        ], doreturn=False)
@@ -1,24 +1,23 @@
 import pygame
 import math
 
+from assets import load_image
 from bullet import Bullet
+from camera import arena_bounds
+from events import PlayerDamaged, Respawned
 
 
 class Player:
+    name = 'player'  # How events refer to the player
+
     def __init__(self, x, y, width, height):
         self.rect = pygame.Rect(x, y, width, height)
         self.width = width
         self.height = height
         self.color = (0, 0, 255)  # Blue color as fallback
 
-        # Load the character image and handle potential errors
-        try:
-            self.image = pygame.image.load("assets/player/character.png")
-            self.image = pygame.transform.scale(self.image, (width, height))
-            self.use_image = True
-        except (pygame.error, FileNotFoundError):
-            print("Character image not found, using rectangle instead")
-            self.use_image = False
+        # World the player is kept inside, the single-screen arena unless a game sets a larger one
+        self.bounds = arena_bounds()
 
         # Movement variables
         self.velocity_x = 0
@@ -40,24 +39,28 @@ class Player:
         self.invulnerable = False
         self.invulnerable_timer = 0
         self.invulnerable_duration = 60  # Frames of invulnerability after taking damage
+        self.deaths = 0
+        self.items_collected = 0
 
         # Respawn variables
         self.respawn_point = (x, y)  # Default respawn at initial position
 
-    def move(self, obstacles):
+        # EventBus told about damage and respawns, set by the game
+        self.events = None
+
+    def move(self, obstacles, player_input):
+        """Step the player one frame using a PlayerInput from inputSource"""
         # Update invulnerability timer
         if self.invulnerable:
             self.invulnerable_timer -= 1
             if self.invulnerable_timer <= 0:
                 self.invulnerable = False
 
-        keys = pygame.key.get_pressed()
-
         # Horizontal movement
         self.velocity_x = 0
-        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
+        if player_input.move_x < 0:
             self.velocity_x = -self.move_speed
-        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
+        elif player_input.move_x > 0:
             self.velocity_x = self.move_speed
 
         # Apply horizontal movement
@@ -71,20 +74,20 @@ class Player:
                 elif self.velocity_x < 0:  # Moving left
                     self.rect.left = obstacle.right
 
-        # Keep player within screen bounds
-        if self.rect.left < 0:
-            self.rect.left = 0
-        if self.rect.right > 1000:  # Updated to 1000 for new WIDTH
-            self.rect.right = 1000
+        # Keep player within world bounds
+        if self.rect.left < self.bounds.left:
+            self.rect.left = self.bounds.left
+        if self.rect.right > self.bounds.right:
+            self.rect.right = self.bounds.right
 
         # Jumping and falling
-        if (keys[pygame.K_w] or keys[pygame.K_SPACE]) and self.is_on_ground:
+        if player_input.jump and self.is_on_ground:
             self.falling_speed = -self.jump_strength
             self.is_jumping = True
             self.is_on_ground = False
 
         # Fast fall
-        if keys[pygame.K_s] or keys[pygame.K_DOWN]:
+        if player_input.fast_fall:
             if not self.is_on_ground:
                 self.falling_speed += 1
 
@@ -159,8 +162,8 @@ class Player:
             self.rect.y += dy
 
         # Prevent falling through the ground
-        if self.rect.bottom > 600:  # Assuming screen height is 600
-            self.rect.bottom = 600
+        if self.rect.bottom > self.bounds.bottom:
+            self.rect.bottom = self.bounds.bottom
             self.velocity_y = 0
             self.is_jumping = False
     def shoot(self, target_pos):
@@ -190,9 +193,12 @@ class Player:
             # Activate invulnerability after being hit
             self.invulnerable = True
             self.invulnerable_timer = self.invulnerable_duration
+            if self.events is not None:
+                self.events.publish(PlayerDamaged(amount, self.health))
 
             # Check if player died
             if self.health <= 0:
+                self.deaths += 1
                 self.respawn()
 
             return True  # Successfully damaged player
@@ -213,12 +219,33 @@ class Player:
         # Set invulnerability to prevent immediate death after respawn
         self.invulnerable = True
         self.invulnerable_timer = self.invulnerable_duration * 2  # Double invulnerability on respawn
+        if self.events is not None:
+            self.events.publish(Respawned(self.name, self.rect.x, self.rect.y))
+
+    def heal(self, amount):
+        """Restore up to `amount` health, returns False if already at full health"""
+        if self.health >= self.max_health:
+            return False
+        self.health = min(self.health + amount, self.max_health)
+        return True
 
     def set_respawn_point(self, x, y):
         # Update the respawn point
         self.respawn_point = (x, y)
 
-    def draw(self, screen):
+    @property
+    def image(self):
+        """Character image, loaded on first draw and shared between instances"""
+        return load_image("assets/player/character.png", (self.width, self.height))
+
+    @property
+    def use_image(self):
+        # Fall back to a rectangle if the image can't be loaded
+        return self.image is not None
+
+    def draw(self, screen, offset=(0, 0)):
+        rect = self.rect.move(-offset[0], -offset[1])
+
         # Flicker when invulnerable
         if self.invulnerable and self.invulnerable_timer % 8 >= 4:
             # Skip drawing player every few frames to create flickering effect
@@ -226,17 +253,17 @@ class Player:
         else:
             if self.use_image:
                 # Draw player using the character image
-                screen.blit(self.image, self.rect)
+                screen.blit(self.image, rect)
             else:
                 # Fallback to drawing a rectangle if image isn't available
-                pygame.draw.rect(screen, self.color, self.rect)
+                pygame.draw.rect(screen, self.color, rect)
 
         # Draw health bar above player
         health_bar_width = self.width * (self.health / self.max_health)
         health_bar_height = 5
         health_bar_rect = pygame.Rect(
-            self.rect.x,
-            self.rect.y - 10,
+            rect.x,
+            rect.y - 10,
             health_bar_width,
             health_bar_height
         )
@@ -252,6 +279,19 @@ class Player:
 
         pygame.draw.rect(screen, health_color, health_bar_rect)
 
+    def snapshot(self):
+        """Simulation state as an immutable tuple, see Game.snapshot"""
+        return (self.rect.x, self.rect.y, self.velocity_x, self.falling_speed,
+                self.is_jumping, self.is_on_ground, self.health,
+                self.invulnerable, self.invulnerable_timer, self.respawn_point,
+                self.deaths, self.items_collected)
+
+    def restore(self, state):
+        (self.rect.x, self.rect.y, self.velocity_x, self.falling_speed,
+         self.is_jumping, self.is_on_ground, self.health,
+         self.invulnerable, self.invulnerable_timer, self.respawn_point,
+         self.deaths, self.items_collected) = state
+
     def get_debug_info(self):
         return [
             f"Player X: {self.rect.x}",
@@ -0,0 +1,282 @@
+# replay.py - Compact match recordings and fast headless playback
+#
+# A recording is the seed, level ID and world size a Game was created with plus the input
+# it received every tick. Because the simulation only draws randomness from
+# the game's own seeded stream, re-running those inputs reproduces the match.
+#
+# Binary format (all integers are unsigned LEB128 varints, signed values are
+# zigzag encoded first):
+#   b'RSRP', version byte, zigzag(seed), level_id + 1 (0 means no level ID),
+#   world_chunks (0 means the single-screen arena)
+#   then entries until the end of the data:
+#     input entry: flags byte, run length, and aim_x, aim_y if FIRE is set
+#     event entry: an EVENT_* byte on its own
+# flags = (move_x + 1) | JUMP | FAST_FALL | FIRE. Identical consecutive inputs
+# are stored once with their run length, which keeps idle stretches and held
+# keys down to a couple of bytes.
+import argparse
+import time
+
+from inputSource import PlayerInput
+
+MAGIC = b'RSRP'
+VERSION = 3  # Bumped whenever the simulation changes so old logs no longer replay the same
+
+MOVE_MASK = 0x03
+JUMP = 0x04
+FAST_FALL = 0x08
+FIRE = 0x10
+
+# Non-input events that change the simulation, stored as a reserved flags byte
+EVENT_RESET = 0xFF
+EVENT_SPAWN_HEALTH = 0xFE
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def input_flags(player_input):
+    """The flags byte of a quantized input"""
+    flags = player_input.move_x + 1
+    if player_input.jump:
+        flags |= JUMP
+    if player_input.fast_fall:
+        flags |= FAST_FALL
+    if player_input.fire:
+        flags |= FIRE
+    return flags
+
+
+def input_from_flags(flags, aim_x=0, aim_y=0):
+    return PlayerInput((flags & MOVE_MASK) - 1, bool(flags & JUMP), bool(flags & FAST_FALL), bool(flags & FIRE),
+                       aim_x, aim_y)
+
+
+def quantize(player_input):
+    """Reduce an input to exactly what the format can store"""
+    move_x = (player_input.move_x > 0) - (player_input.move_x < 0)
+    fire = bool(player_input.fire)
+    return PlayerInput(
+        move_x,
+        bool(player_input.jump),
+        bool(player_input.fast_fall),
+        fire,
+        int(round(player_input.aim_x)) if fire else 0,
+        int(round(player_input.aim_y)) if fire else 0
+    )
+
+
+class ReplayRecorder:
+    """Collects the inputs and events of a Game as run-length entries"""
+
+    def __init__(self, seed, level_id=None, world_chunks=None):
+        self.seed = seed
+        self.level_id = level_id
+        self.world_chunks = world_chunks
+        self.entries = []  # [PlayerInput, run length] lists and EVENT_* ints
+        self.ticks = 0
+
+    def record(self, player_input):
+        """Record one tick of input and return the quantized input the game should apply"""
+        player_input = quantize(player_input)
+        last = self.entries[-1] if self.entries else None
+        if isinstance(last, list) and last[0] == player_input:
+            last[1] += 1
+        else:
+            self.entries.append([player_input, 1])
+        self.ticks += 1
+        return player_input
+
+    def record_event(self, event):
+        self.entries.append(event)
+
+    def to_bytes(self):
+        out = bytearray(MAGIC)
+        out.append(VERSION)
+        write_varint(out, zigzag(self.seed))
+        write_varint(out, 0 if self.level_id is None else self.level_id + 1)
+        write_varint(out, self.world_chunks or 0)
+
+        for entry in self.entries:
+            if isinstance(entry, int):
+                out.append(entry)
+                continue
+
+            player_input, run = entry
+            out.append(input_flags(player_input))
+            write_varint(out, run)
+            if player_input.fire:
+                write_varint(out, zigzag(player_input.aim_x))
+                write_varint(out, zigzag(player_input.aim_y))
+        return bytes(out)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+
+class Replay:
+    """A decoded recording: seed, level ID, world size and the expanded per-tick timeline"""
+
+    def __init__(self, seed, level_id, timeline, world_chunks=None):
+        self.seed = seed
+        self.level_id = level_id
+        self.world_chunks = world_chunks
+        # One PlayerInput per tick, with EVENT_* ints inserted where events happened
+        self.timeline = timeline
+        self.ticks = sum(1 for item in timeline if not isinstance(item, int))
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != MAGIC:
+            raise ValueError("Not a Rogue Shot replay")
+        if data[4] != VERSION:
+            raise ValueError(f"Unsupported replay version {data[4]}")
+
+        pos = 5
+        seed, pos = read_varint(data, pos)
+        level_id, pos = read_varint(data, pos)
+        world_chunks, pos = read_varint(data, pos)
+
+        timeline = []
+        while pos < len(data):
+            flags = data[pos]
+            pos += 1
+            if flags in (EVENT_RESET, EVENT_SPAWN_HEALTH):
+                timeline.append(flags)
+                continue
+
+            run, pos = read_varint(data, pos)
+            aim_x = aim_y = 0
+            if flags & FIRE:
+                aim_x, pos = read_varint(data, pos)
+                aim_y, pos = read_varint(data, pos)
+                aim_x, aim_y = unzigzag(aim_x), unzigzag(aim_y)
+
+            timeline.extend([input_from_flags(flags, aim_x, aim_y)] * run)
+
+        return cls(unzigzag(seed), level_id - 1 if level_id else None, timeline, world_chunks or None)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayPlayer:
+    """Re-simulates a replay in a headless Game as fast as possible.
+
+    A snapshot is kept every keyframe_interval ticks while playing, seeking
+    restores the closest keyframe before the target tick and re-simulates
+    only the remaining ticks.
+    """
+
+    def __init__(self, replay, keyframe_interval=300):
+        self.replay = replay
+        self.keyframe_interval = keyframe_interval
+        self.keyframes = {}  # tick -> (timeline position, Game.snapshot())
+        self.game = None
+        self.tick = 0
+        self.position = 0  # Index into replay.timeline
+        self.restart()
+
+    def restart(self):
+        from gameClass import Game
+        self.game = Game(headless=True, seed=self.replay.seed, level_id=self.replay.level_id,
+                         world_chunks=self.replay.world_chunks)
+        self.tick = 0
+        self.position = 0
+
+    def finished(self):
+        return self.position >= len(self.replay.timeline)
+
+    def step(self):
+        """Simulate the next tick, returns False once the replay is over"""
+        timeline = self.replay.timeline
+        game = self.game
+        while self.position < len(timeline):
+            item = timeline[self.position]
+            self.position += 1
+            if item == EVENT_RESET:
+                game.reset_game()
+            elif item == EVENT_SPAWN_HEALTH:
+                game.spawn_health_item()
+            else:
+                game.step(item)
+                self.tick += 1
+                if self.tick % self.keyframe_interval == 0 and self.tick not in self.keyframes:
+                    self.keyframes[self.tick] = (self.position, game.snapshot())
+                return True
+        return False
+
+    def seek(self, tick):
+        """Move the simulation to the state right after `tick` ticks"""
+        # Jump to the latest keyframe at or before the target if it beats simulating from here
+        keyframe_tick = tick - tick % self.keyframe_interval
+        while keyframe_tick > 0 and keyframe_tick not in self.keyframes:
+            keyframe_tick -= self.keyframe_interval
+
+        if tick < self.tick or keyframe_tick > self.tick:
+            if keyframe_tick > 0:
+                self.position, state = self.keyframes[keyframe_tick]
+                self.game.restore(state)
+                self.tick = keyframe_tick
+            else:
+                self.restart()
+
+        while self.tick < tick and self.step():
+            pass
+
+    def run(self):
+        """Play to the end and return the final game"""
+        while self.step():
+            pass
+        return self.game
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-simulate a recorded match headlessly")
+    parser.add_argument('path')
+    parser.add_argument('--seek', type=int, default=None, help="Stop after this many ticks")
+    args = parser.parse_args(argv)
+
+    player = ReplayPlayer(Replay.load(args.path))
+    start = time.perf_counter()
+    if args.seek is None:
+        player.run()
+    else:
+        player.seek(args.seek)
+    elapsed = time.perf_counter() - start
+
+    game = player.game
+    print(f"Seed {player.replay.seed}, level {player.replay.level_id}, tick {player.tick}/{player.replay.ticks}")
+    print(f"Damage dealt {game.damage_dealt}, damage taken {game.damage_taken}")
+    print(f"{player.tick / max(elapsed, 1e-9):.0f} ticks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# roomScheduler.py - Hundreds of networked arenas in one process on an asyncio fixed tick
+#
+# RoomScheduler is a netServer.ArenaHost driven by an asyncio loop: datagrams
+# are handled as they arrive between ticks and every tick steps each room
+# (arena) once. Rooms share what they only read, the level bank through
+# gameClass.level_layout and one never-drawn screen, so a room costs little
+# more than its simulation state.
+#
+# Each tick has to fit in the tick period. Rooms left over when the tick's
+# deadline passes wait for the next tick, which starts with them, so an
+# overloaded server slows rooms down a little instead of freezing the rooms at
+# the end of the list. Rooms are timed against a per-room budget and those that
+# keep overrunning it are stepped after the others, so they are the ones that
+# wait rather than the cheap rooms that happen to come after them. Rooms
+# whose player stopped sending input sleep: they are not simulated and only
+# refresh their clients now and then until input arrives again.
+import os
+
+# Servers never open a window, set before pygame is imported through gameClass
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import asyncio
+import time
+
+import pygame
+
+from gameClass import HEIGHT, WIDTH, level_layout
+from netProtocol import DEFAULT_PORT
+from netServer import ArenaHost, NetArena
+
+# Seconds a room's tick may take before it counts as an overrun
+ROOM_BUDGET = 0.002
+# A room that overran this many ticks in a row is stepped after the others
+HEAVY_OVERRUNS = 3
+# Part of the tick period rooms may use, the rest is left for datagram handling
+TICK_BUDGET = 0.8
+# A room sleeps once its player has sent no input for this many ticks
+IDLE_TICKS = 60
+# Sleeping rooms send their clients a snapshot this often so new spectators see something
+SLEEP_SNAPSHOT_INTERVAL = 30
+
+
+class RoomStats:
+    """Timing of one room's ticks"""
+
+    def __init__(self):
+        self.steps = 0  # Ticks simulated
+        self.slept = 0  # Ticks skipped while asleep
+        self.deferred = 0  # Ticks skipped because the server ran out of time
+        self.overruns = 0  # Ticks that took longer than the room budget
+        self.overrun_streak = 0  # Overruns in a row up to the last tick, kept by reset_metrics
+        self.total_time = 0.0
+        self.worst_time = 0.0
+
+    def record(self, elapsed, budget):
+        self.total_time += elapsed
+        if elapsed > self.worst_time:
+            self.worst_time = elapsed
+        if elapsed > budget:
+            self.overruns += 1
+            self.overrun_streak += 1
+        else:
+            self.overrun_streak = 0
+
+    @property
+    def heavy(self):
+        """Whether the room keeps overrunning its budget"""
+        return self.overrun_streak >= HEAVY_OVERRUNS
+
+
+class RoomProtocol(asyncio.DatagramProtocol):
+    """Hands every datagram to the scheduler as it arrives"""
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+
+    def datagram_received(self, data, address):
+        self.scheduler.receive(address, data)
+
+    def error_received(self, exc):
+        pass  # ICMP errors about clients that went away, they time out on their own
+
+
+class RoomScheduler(ArenaHost):
+    """Hosts many NetArenas on one UDP endpoint, stepped by an asyncio fixed tick"""
+
+    def __init__(self, seed=None, level_ids=(), tick_rate=60, room_budget=ROOM_BUDGET, idle_ticks=IDLE_TICKS,
+                 snapshot_interval=1, max_rooms=512):
+        # The transport only exists once start() has run, which is before any datagram arrives
+        super().__init__(lambda datagram, address: self.transport.sendto(datagram, address),
+                         seed, None, snapshot_interval, max_rooms)
+        # Rooms cycle through the level bank, generated once and shared read-only
+        if len(level_ids) > level_layout.cache_info().maxsize:
+            raise ValueError(f"A level bank holds at most {level_layout.cache_info().maxsize} levels")
+        self.level_ids = tuple(level_ids)
+        for level_id in self.level_ids:
+            level_layout(level_id)
+        self.screen = pygame.Surface((WIDTH, HEIGHT))  # Shared by every room, servers never draw
+
+        self.tick_rate = tick_rate
+        self.room_budget = room_budget
+        self.idle_ticks = idle_ticks
+        self.transport = None
+        self.address = None
+        self.running = False
+        self.resume_from = None  # Room the next tick starts with, the first one deferred
+
+        # Metrics
+        self.room_stats = {}  # arena id -> RoomStats
+        self.ticks = 0
+        self.tick_overruns = 0  # Ticks that ran past the tick period
+        self.deferred = 0  # Room ticks pushed to the next tick
+        self.total_tick_time = 0.0
+        self.worst_tick_time = 0.0
+
+    def create_arena(self, arena_id):
+        seed = None if self.seed is None else self.seed + arena_id
+        level_id = self.level_ids[arena_id % len(self.level_ids)] if self.level_ids else None
+        self.room_stats[arena_id] = RoomStats()
+        return NetArena(seed, level_id, self.snapshot_interval, screen=self.screen)
+
+    def asleep(self, arena):
+        """Whether nobody is playing in a room: no controlling client, or one that went quiet"""
+        if arena.clock - arena.last_input > self.idle_ticks:
+            return True
+        return not any(client.controls for client in arena.clients.values())
+
+    def tick(self, deadline=None):
+        """Step every room once, or rest it if asleep.
+
+        Rooms not reached by `deadline` (a time.perf_counter() value) are
+        deferred to the next tick, which starts with them.
+        """
+        start = time.perf_counter()
+        room_stats = self.room_stats
+        room_ids = list(self.arenas)
+        # Heavy rooms go last, so running out of time defers them first. The
+        # next tick still starts with whichever room was deferred.
+        heavy = [arena_id for arena_id in room_ids if room_stats[arena_id].heavy]
+        if heavy:
+            room_ids = [arena_id for arena_id in room_ids if not room_stats[arena_id].heavy] + heavy
+        if self.resume_from in self.arenas:
+            first = room_ids.index(self.resume_from)
+            room_ids = room_ids[first:] + room_ids[:first]
+        self.resume_from = None
+
+        budget = self.room_budget
+        for n, arena_id in enumerate(room_ids):
+            began = time.perf_counter()
+            if deadline is not None and n and began > deadline:
+                self.resume_from = arena_id
+                self.deferred += len(room_ids) - n
+                for deferred_id in room_ids[n:]:
+                    room_stats[deferred_id].deferred += 1
+                break
+            arena = self.arenas[arena_id]
+            stats = room_stats[arena_id]
+            if self.asleep(arena):
+                datagrams = arena.rest(SLEEP_SNAPSHOT_INTERVAL)
+                stats.slept += 1
+            else:
+                datagrams = arena.step()
+                stats.steps += 1
+            for address, datagram in datagrams:
+                self.send(address, datagram)
+            stats.record(time.perf_counter() - began, budget)
+
+        self.close_empty_arenas()
+        for arena_id in [arena_id for arena_id in room_stats if arena_id not in self.arenas]:
+            del room_stats[arena_id]
+
+        elapsed = time.perf_counter() - start
+        self.ticks += 1
+        self.total_tick_time += elapsed
+        if elapsed > self.worst_tick_time:
+            self.worst_tick_time = elapsed
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        """Open the UDP endpoint, `address` is where it ended up"""
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(lambda: RoomProtocol(self), local_addr=(host, port))
+        self.address = self.transport.get_extra_info('sockname')
+
+    async def run(self, ticks=None, report_interval=None):
+        """Tick at tick_rate until stop() is called or `ticks` ticks have passed"""
+        loop = asyncio.get_running_loop()
+        period = 1 / self.tick_rate
+        next_tick = loop.time()
+        next_report = next_tick + (report_interval or 0)
+        last = self.ticks
+        self.running = True
+        while self.running and (ticks is None or self.ticks - last < ticks):
+            self.tick(time.perf_counter() + period * TICK_BUDGET)
+            next_tick += period
+            now = loop.time()
+            if now > next_tick:
+                self.tick_overruns += 1
+                next_tick = now  # Fell behind, don't try to catch up
+            if report_interval and now >= next_report:
+                print(self.format_report())
+                self.reset_metrics()
+                next_report = now + report_interval
+            # Datagrams are handled while waiting for the next tick
+            await asyncio.sleep(next_tick - now)
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+    def report(self):
+        """Metrics since the last reset_metrics() as a dict"""
+        rooms = self.room_stats
+        asleep = sum(1 for arena in self.arenas.values() if self.asleep(arena))
+        worst = sorted(rooms, key=lambda arena_id: rooms[arena_id].overruns, reverse=True)[:5]
+        return {
+            'rooms': len(self.arenas),
+            'asleep': asleep,
+            'clients': len(self.routes),
+            'ticks': self.ticks,
+            'tick_overruns': self.tick_overruns,
+            'deferred_room_ticks': self.deferred,
+            'mean_tick_ms': 1000 * self.total_tick_time / self.ticks if self.ticks else 0.0,
+            'worst_tick_ms': 1000 * self.worst_tick_time,
+            'room_overruns': sum(stats.overruns for stats in rooms.values()),
+            'heavy_rooms': sum(1 for stats in rooms.values() if stats.heavy),
+            'worst_rooms': {arena_id: rooms[arena_id].overruns for arena_id in worst if rooms[arena_id].overruns},
+            'bytes_sent': self.bytes_sent,
+            'datagrams_sent': self.datagrams_sent,
+        }
+
+    def format_report(self):
+        report = self.report()
+        return (f"{report['rooms']} rooms ({report['asleep']} asleep), {report['clients']} clients, "
+                f"tick {report['mean_tick_ms']:.2f} ms mean / {report['worst_tick_ms']:.2f} ms worst, "
+                f"{report['tick_overruns']} tick overruns, {report['deferred_room_ticks']} deferred room ticks, "
+                f"{report['room_overruns']} room overruns, {report['bytes_sent'] / 1024:.1f} KiB sent")
+
+    def reset_metrics(self):
+        self.ticks = 0
+        self.tick_overruns = 0
+        self.deferred = 0
+        self.total_tick_time = 0.0
+        self.worst_tick_time = 0.0
+        self.bytes_sent = 0
+        self.datagrams_sent = 0
+        for arena_id, old in self.room_stats.items():
+            stats = self.room_stats[arena_id] = RoomStats()
+            stats.overrun_streak = old.overrun_streak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host many Rogue Shot arenas in one process")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--seed', type=int, default=None, help="Room n uses seed + n")
+    parser.add_argument('--level-bank', type=int, default=16, help="Rooms cycle through level IDs 0 to N - 1")
+    parser.add_argument('--max-rooms', type=int, default=512)
+    parser.add_argument('--tick-rate', type=int, default=60)
+    parser.add_argument('--room-budget-ms', type=float, default=ROOM_BUDGET * 1000)
+    parser.add_argument('--idle-ticks', type=int, default=IDLE_TICKS)
+    parser.add_argument('--report-interval', type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    scheduler = RoomScheduler(args.seed, range(args.level_bank), args.tick_rate, args.room_budget_ms / 1000,
+                              args.idle_ticks, max_rooms=args.max_rooms)
+
+    async def serve():
+        await scheduler.start(args.host, args.port)
+        print(f"Serving up to {args.max_rooms} rooms on {scheduler.address[0]}:{scheduler.address[1]}")
+        await scheduler.run(report_interval=args.report_interval)
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# spatialIndex.py - Uniform grid for finding the rects that overlap an area
+import pygame
+
+
+class SpatialGrid:
+    """Items bucketed by the grid cells their rects touch.
+
+    Meant for things that rarely move, like level geometry: inserting costs a
+    bucket append per touched cell, and a query only tests the items stored in
+    the cells the query rect covers.
+    """
+
+    def __init__(self, cell_size=256):
+        self.cell_size = cell_size
+        self.cells = {}  # (column, row) -> [(insertion order, rect, item)]
+        self.count = 0
+
+    def clear(self):
+        self.cells.clear()
+        self.count = 0
+
+    def _cells(self, rect):
+        size = self.cell_size
+        for column in range(rect.left // size, (rect.right - 1) // size + 1):
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield column, row
+
+    def insert(self, item, rect):
+        entry = (self.count, pygame.Rect(rect), item)
+        self.count += 1
+        for cell in self._cells(rect):
+            bucket = self.cells.get(cell)
+            if bucket is None:
+                bucket = self.cells[cell] = []
+            bucket.append(entry)
+
+    def query(self, rect):
+        """Items whose rect collides with `rect`, each once and in insertion order"""
+        found = {}
+        cells = self.cells
+        for cell in self._cells(rect):
+            bucket = cells.get(cell)
+            if bucket:
+                for order, item_rect, item in bucket:
+                    if order not in found and item_rect.colliderect(rect):
+                        found[order] = item
+        return [found[order] for order in sorted(found)]
@@ -0,0 +1,59 @@
+# traceRecorder.py - Records frame and AI timelines as Chrome Trace Event JSON
+#
+# The output loads in Perfetto (ui.perfetto.dev) or chrome://tracing. Events
+# are stored as raw tuples while recording and only converted to JSON on save.
+# Code that can be traced keeps a `tracer` attribute that is None when tracing
+# is off, so the disabled cost is a single attribute check.
+import json
+import os
+import time
+
+
+class TraceRecorder:
+    def __init__(self, max_events=2_000_000):
+        self.max_events = max_events
+        self.events = []  # (phase, name, category, timestamp, duration, args)
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+
+    def _add(self, event):
+        if len(self.events) < self.max_events:
+            self.events.append(event)
+
+    def complete(self, name, start, duration, category='frame', args=None):
+        """A span whose start and duration (perf_counter seconds) are already known"""
+        self._add(('X', name, category, start, duration, args))
+
+    def begin(self, name, category='frame', args=None):
+        self._add(('B', name, category, time.perf_counter(), 0.0, args))
+
+    def end(self, name, category='frame'):
+        self._add(('E', name, category, time.perf_counter(), 0.0, None))
+
+    def instant(self, name, category='frame', args=None):
+        self._add(('i', name, category, time.perf_counter(), 0.0, args))
+
+    def to_json(self):
+        trace_events = []
+        origin = self.origin
+        for phase, name, category, timestamp, duration, args in self.events:
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': phase,
+                'ts': (timestamp - origin) * 1e6,  # Microseconds
+                'pid': self.pid,
+                'tid': 1,
+            }
+            if phase == 'X':
+                event['dur'] = duration * 1e6
+            elif phase == 'i':
+                event['s'] = 't'
+            if args:
+                event['args'] = args
+            trace_events.append(event)
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_json(), f)
@@ -0,0 +1,113 @@
+# vectorGame.py - Steps many independent headless games in lockstep
+import numpy as np
+
+from gameClass import Game, WIDTH, HEIGHT
+from inputSource import PlayerInput
+
+# Columns of one action row, in PlayerInput field order
+ACTION_SIZE = len(PlayerInput._fields)
+
+# Enemy states in the order they are encoded in observations
+STATE_NAMES = ['patrol', 'chase', 'attack', 'flee', 'idle', 'seek_health']
+STATE_INDEX = {name: i for i, name in enumerate(STATE_NAMES)}
+
+OBSERVATION_SIZE = 12
+
+
+def write_observation(game, out):
+    """Write the observation vector of one game into the preallocated row `out`"""
+    player = game.player
+    enemy = game.enemy
+
+    out[0] = player.rect.centerx / WIDTH
+    out[1] = player.rect.centery / HEIGHT
+    out[2] = player.velocity_x / 15.0
+    out[3] = player.falling_speed / 15.0
+    out[4] = player.health / player.max_health
+    out[5] = 1.0 if player.is_on_ground else 0.0
+
+    out[6] = enemy.rect.centerx / WIDTH
+    out[7] = enemy.rect.centery / HEIGHT
+    out[8] = enemy.movement.velocity_x / 15.0
+    out[9] = enemy.movement.velocity_y / 15.0
+    out[10] = enemy.combat.health / enemy.combat.max_health
+    out[11] = STATE_INDEX.get(enemy.current_state.name, 0) / (len(STATE_NAMES) - 1)
+
+
+def restart_game(game, initial_state):
+    """Start a new episode from `initial_state`, a snapshot of the game when it was made.
+
+    The random streams carry on instead of going back with the rest, and
+    reset_game() then reloads the level and respawns the enemy as usual.
+    """
+    streams = game.streams.getstate()
+    game.restore(initial_state)
+    game.streams.setstate(streams)
+    game.reset_game()
+
+
+class VectorGame:
+    """N independent Game simulations stepped together with batched inputs and outputs.
+
+    Games run headless with their own random streams, and share the image cache
+    and a small bank of levels (see gameClass.level_layout).
+    """
+
+    def __init__(self, num_games, seed=0, num_levels=None):
+        self.num_games = num_games
+        self.seed = seed
+
+        # Level IDs of the bank, each layout is generated once and loaded by every game that uses it
+        self.level_ids = [seed * 1000003 + i for i in range(num_levels or num_games)]
+
+        self.games = [
+            Game(headless=True, seed=seed + i, level_id=self.level_ids[i % len(self.level_ids)])
+            for i in range(num_games)
+        ]
+        self.initial_states = [game.snapshot() for game in self.games]  # Restored by reset
+
+        # Batched outputs, rewritten in place every step
+        self.observations = np.zeros((num_games, OBSERVATION_SIZE), dtype=np.float32)
+        self.rewards = np.zeros(num_games, dtype=np.float32)
+        self.scores = [0] * num_games
+
+    def reset(self):
+        """Reset every game on its bank level and return the initial observations"""
+        for i, game in enumerate(self.games):
+            restart_game(game, self.initial_states[i])
+            self.scores[i] = 0
+            write_observation(game, self.observations[i])
+        self.rewards[:] = 0
+        return self.observations
+
+    def step(self, actions):
+        """Advance every game by one tick.
+
+        actions is an (N, ACTION_SIZE) array-like of
+        (move_x, jump, fast_fall, fire, aim_x, aim_y) rows. Returns the
+        (N, OBSERVATION_SIZE) observations and the (N,) rewards, where the
+        reward is damage dealt minus damage taken during this tick.
+        """
+        observations = self.observations
+        rewards = self.rewards
+        scores = self.scores
+
+        # Plain Python values are much cheaper to branch on than NumPy scalars
+        if isinstance(actions, np.ndarray):
+            actions = actions.tolist()
+
+        for i, game in enumerate(self.games):
+            game.step(PlayerInput._make(actions[i]))
+
+            score = game.damage_dealt - game.damage_taken
+            rewards[i] = score - scores[i]
+            scores[i] = score
+            write_observation(game, observations[i])
+
+        return observations, rewards
+
+    def render(self, index):
+        """Draw one game to its off-screen surface and return the surface"""
+        game = self.games[index]
+        game.draw()
+        return game.screen
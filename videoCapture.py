@@ -0,0 +1,128 @@
+# videoCapture.py - Renders a replay or seeded match offline, frame by frame, into a frame sink
+#
+# The match runs in a headless Game at full simulation speed: no window, no
+# 60 FPS pacing, and every tick is drawn to the off-screen surface, so no
+# frames are dropped however slow encoding is. Sinks write numbered PNGs or a
+# raw RGB stream for an external encoder, for example
+#   python videoCapture.py --replay match.rsrp --raw - | \
+#       ffmpeg -f rawvideo -pix_fmt rgb24 -s 1000x600 -r 60 -i - clip.mp4
+import argparse
+import os
+import sys
+
+# Capture never opens a window or plays audio, and stdout may carry the raw stream
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from gameClass import Game, WIDTH, HEIGHT
+from inputSource import ScriptedBotInput
+from replay import Replay, ReplayPlayer
+
+
+class PngSequenceSink:
+    """Saves every frame as directory/frame_000000.png, frame_000001.png, ..."""
+
+    def __init__(self, directory, pattern="frame_{:06d}.png"):
+        self.directory = directory
+        self.pattern = pattern
+        self.frames = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, surface):
+        pygame.image.save(surface, os.path.join(self.directory, self.pattern.format(self.frames)))
+        self.frames += 1
+
+    def close(self):
+        pass
+
+
+class RawRgbSink:
+    """Writes frames back to back as packed 24-bit RGB, '-' means stdout"""
+
+    def __init__(self, path):
+        self.frames = 0
+        if path == '-':
+            self.file = sys.stdout.buffer
+            self.owns_file = False
+            # Keep the game's own print() output out of the frame stream
+            sys.stdout = sys.stderr
+        else:
+            self.file = open(path, 'wb')
+            self.owns_file = True
+
+    def write(self, surface):
+        self.file.write(pygame.image.tobytes(surface, 'RGB'))
+        self.frames += 1
+
+    def close(self):
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+def capture(game, advance, sink, max_frames=None, every=1):
+    """Call advance() until it returns False, drawing every `every`-th tick into the sink"""
+    ticks = 0
+    while (max_frames is None or sink.frames < max_frames) and advance():
+        ticks += 1
+        if ticks % every == 0:
+            game.draw()
+            sink.write(game.screen)
+    return ticks
+
+
+def capture_replay(replay, sink, start=0, max_frames=None, every=1):
+    """Render a replay from tick `start` until it ends"""
+    player = ReplayPlayer(replay)
+    if start:
+        player.seek(start)
+    return capture(player.game, player.step, sink, max_frames, every)
+
+
+def capture_seed(seed, ticks, sink, level_id=None, max_frames=None, every=1):
+    """Render `ticks` ticks of a bot-driven match from a seed"""
+    game = Game(headless=True, seed=seed, level_id=level_id)
+    game.input_source = ScriptedBotInput(game.streams.stream('bot'))
+    remaining = [ticks]
+
+    def advance():
+        if remaining[0] <= 0:
+            return False
+        remaining[0] -= 1
+        game.step()
+        return True
+    return capture(game, advance, sink, max_frames, every)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a replay or seeded match to frames without a window")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--replay', metavar='PATH', help="Replay file saved with gameClass.py --record")
+    source.add_argument('--seed', type=int, help="Render a bot-driven match from this seed")
+    parser.add_argument('--level-id', type=int, default=None, help="Level for --seed matches")
+    parser.add_argument('--ticks', type=int, default=600, help="Ticks to simulate for --seed matches")
+    parser.add_argument('--start', type=int, default=0, help="Replay tick to start rendering from")
+    parser.add_argument('--frames', type=int, default=None, help="Stop after this many frames")
+    parser.add_argument('--every', type=int, default=1, help="Render only every Nth tick")
+    sink = parser.add_mutually_exclusive_group(required=True)
+    sink.add_argument('--png', metavar='DIR', help="Write numbered PNG files into DIR")
+    sink.add_argument('--raw', metavar='PATH', help=f"Write raw RGB24 {WIDTH}x{HEIGHT} frames to PATH, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    frame_sink = PngSequenceSink(args.png) if args.png else RawRgbSink(args.raw)
+    try:
+        if args.replay:
+            capture_replay(Replay.load(args.replay), frame_sink, args.start, args.frames, args.every)
+        else:
+            capture_seed(args.seed, args.ticks, frame_sink, args.level_id, args.frames, args.every)
+    finally:
+        frame_sink.close()
+    print(f"Wrote {frame_sink.frames} frames", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()